@@ -13,7 +13,14 @@ try:
 except Exception:
     pass
 from .async_client import AIOClient
-from .enums import GameMode
+from .enums import GameMode, VehicleType
+from .cache import ResultCache
+from .store import PageStore
+from .tracker import PlayerTracker
+from .instrumentation import Instrumentation
+from .search_index import BattalionSearchIndex
+from .accounts import AccountPool
+from .ratelimit import TokenBucket, RetryPolicy
 from .dataobjects import *
 
 import aw_api.exceptions
@@ -0,0 +1,185 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Union
+
+from .exceptions import NotAuthException
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['Account', 'AccountPool']
+
+
+class Account:
+    """
+    One authenticated account of :class:`AccountPool`
+
+    versionadded:: 2.1
+    """
+    __slots__ = ('name', 'cookies', 'rate_limiter', 'quarantined_until')
+
+    def __init__(self, name: str, cookies: Dict[str, str], rate_limiter: TokenBucket):
+        """
+        :param name: Name of the account, used in logs and for :meth:`AccountPool.update`
+        :param cookies: Cookies sent with requests made on behalf of the account
+        :param rate_limiter: Limiter of requests made on behalf of the account
+        """
+        self.name = name
+        self.cookies = cookies
+        self.rate_limiter = rate_limiter
+        self.quarantined_until = 0.0
+
+    @property
+    def quarantined(self) -> bool:
+        """
+        :return: True if account is excluded from the pool right now
+        """
+        return self.quarantined_until > time.monotonic()
+
+    def __repr__(self):
+        return f'<Account {self.name}{" (quarantined)" if self.quarantined else ""}>'
+
+
+class AccountPool:
+    """
+    Several authenticated accounts requests are spread across.
+
+    Every account has own rate limiter, so total throughput grows with the number of accounts.
+    Accounts are picked in turn, accounts which pages say that client is not authenticated are quarantined
+    for ``quarantine_time`` seconds and the request is repeated with another account.
+    Put fresh cookies with :meth:`update` to bring account back earlier.
+    The pool is thread-safe and can be shared between several clients.
+
+    versionadded:: 2.1
+    """
+
+    def __init__(self, raw_cookies: Iterable[Union[List[Dict], Dict[str, str]]] = (), rate: float = 1.0,
+                 burst: int = 1, quarantine_time: float = 900.0):
+        """
+        :param raw_cookies: Cookies of every account, exported with "EditThisCookie" Chrome extension from aw.mail.ru
+        :param rate: Maximum average number of requests per second for each account
+        :param burst: Number of requests each account can perform at once after being idle
+        :param quarantine_time: Seconds account is excluded from the pool after it turned out to be logged out
+        """
+        self.rate = rate
+        self.burst = burst
+        self.quarantine_time = quarantine_time
+
+        self.__accounts: List[Account] = []
+        self.__next = 0
+        self.__lock = threading.Lock()
+        for raw_cookie in raw_cookies:
+            self.add(raw_cookie)
+
+    @staticmethod
+    def __prepare_cookie(raw_cookie: Union[List[Dict], Dict[str, str]]) -> Dict[str, str]:
+        """
+        :param raw_cookie: Raw cookie from EditThisCookie or already prepared dict
+
+        :return: :class:`dict` with "cleaned" cookies
+        """
+        if isinstance(raw_cookie, dict):
+            return dict(raw_cookie)
+        return {item['name']: item['value'] for item in raw_cookie}
+
+    def add(self, raw_cookie: Union[List[Dict], Dict[str, str]], name: Optional[str] = None,
+            rate_limiter: Optional[TokenBucket] = None) -> Account:
+        """
+        :param raw_cookie: Cookies of the account
+        :param name: Name of the account, "account-N" by default
+        :param rate_limiter: Limiter of the account, :class:`TokenBucket` with pool ``rate`` and ``burst`` by default
+        :return: Added :class:`Account`
+        """
+        with self.__lock:
+            account = Account(name if name is not None else f'account-{len(self.__accounts)}',
+                              self.__prepare_cookie(raw_cookie),
+                              rate_limiter if rate_limiter is not None else TokenBucket(self.rate, self.burst))
+            self.__accounts.append(account)
+        return account
+
+    def update(self, name: str, raw_cookie: Union[List[Dict], Dict[str, str]]):
+        """
+        Replaces cookies of the account and brings it back from quarantine
+
+        :param name: Name of the account
+        :param raw_cookie: New cookies of the account
+        """
+        with self.__lock:
+            for account in self.__accounts:
+                if account.name == name:
+                    account.cookies = self.__prepare_cookie(raw_cookie)
+                    account.quarantined_until = 0.0
+                    return
+        raise KeyError(name)
+
+    def acquire(self) -> Account:
+        """
+        Picks the next account that is not quarantined
+
+        :raises :exc:`NotAuthException` if every account is quarantined
+
+        :return: :class:`Account` to perform request with
+        """
+        with self.__lock:
+            now = time.monotonic()
+            for _ in range(len(self.__accounts)):
+                account = self.__accounts[self.__next]
+                self.__next = (self.__next + 1) % len(self.__accounts)
+                if account.quarantined_until <= now:
+                    return account
+        raise NotAuthException('Every account in the pool is not authenticated on aw.mail.ru')
+
+    def quarantine(self, account: Account, duration: Optional[float] = None):
+        """
+        Excludes account from the pool
+
+        :param account: Account that turned out to be logged out
+        :param duration: Seconds account is excluded for, ``quarantine_time`` by default
+        """
+        duration = self.quarantine_time if duration is None else duration
+        with self.__lock:
+            account.quarantined_until = time.monotonic() + duration
+        logger.warning('Account {0} is not authenticated, quarantined for {1:.0f}s'.format(account.name, duration))
+
+    @property
+    def accounts(self) -> List[Account]:
+        """
+        :return: All accounts of the pool
+        """
+        return list(self.__accounts)
+
+    @property
+    def healthy(self) -> List[Account]:
+        """
+        :return: Accounts that are not quarantined
+        """
+        return [account for account in self.__accounts if not account.quarantined]
+
+    def __len__(self):
+        return len(self.__accounts)
@@ -24,19 +24,38 @@ SOFTWARE.
 """
 
 from .dataobjects import *
-from .enums import GameMode
+from .enums import GameMode, VehicleType
 from .parser import Parser
-from .exceptions import BadHTTPStatusCode
-
+from .cache import ResultCache
+from .store import PageStore
+from .instrumentation import Instrumentation
+from .search_index import BattalionSearchIndex
+from .accounts import Account, AccountPool
+from .ratelimit import TokenBucket, RetryPolicy
+from .exceptions import BadHTTPStatusCode, UserNotFoundException, UserHasClosedStatisticsException, NotAuthException, \
+    BattalionSearchTooShortQuery, BattalionSearchBattalionNotFound
+from .utils import as_completed_bounded
+
+import codecs
 import logging
 import aiohttp
 import asyncio
-from typing import Optional, Union, Dict, List
+import functools
+from concurrent.futures import Executor
+from typing import Optional, Union, Dict, List, Iterable, AsyncIterator, Awaitable, Tuple, Callable, TypeVar, \
+    Mapping
 
 logger = logging.getLogger()
 
 __all__ = ['AIOClient']
 
+T = TypeVar('T')
+
+
+def _parse_battalion_players(page: bytes, parser: Parser, battalion_id: int) -> List[BattalionMemberEntry]:
+    # Module-level function, so it can be sent to process pool together with parser
+    return list(parser.parse_battalion_players(page, battalion_id))
+
 
 class AIOClient:
     """
@@ -46,42 +65,138 @@ class AIOClient:
 
     versionadded:: 2.0
     """
-    def __init__(self, raw_cookie: Optional[List[Dict]] = None):
+    # Number of bytes in the beginning of a page that are checked for error notices
+    HEAD_CHECK_LIMIT = 16 * 1024
+    # Rest of the page aborted after head check is still read if it is not longer than that,
+    # otherwise the connection is closed instead of being returned to the pool
+    DRAIN_LIMIT = 64 * 1024
+
+    def __init__(self, raw_cookie: Optional[List[Dict]] = None, parser_backend: str = 'auto',
+                 cache: Optional[ResultCache] = None, parse_executor: Optional[Executor] = None,
+                 connection_limit: int = 100, connection_limit_per_host: int = 0, keepalive_timeout: float = 15.0,
+                 dns_cache_ttl: Optional[int] = 10, timeout: Union[float, aiohttp.ClientTimeout, None] = None,
+                 rate_limiter: Optional[TokenBucket] = None, retry_policy: Optional[RetryPolicy] = None,
+                 page_store: Optional[PageStore] = None, instrumentation: Optional[Instrumentation] = None,
+                 account_pool: Optional[AccountPool] = None, search_cache: Optional[ResultCache] = None,
+                 search_index: Optional[BattalionSearchIndex] = None):
         """
 
         :param raw_cookie :class:`Optional[Dict, List]`
         containing exported with "EditThisCookie" Chrome extension cookie from aw.mail.ru
-
+        :param parser_backend :class:`str` HTML backend used for parsing statistics pages,
+        one of "auto", "selectolax", "lxml" or "bs4"
+        :param cache :class:`Optional[ResultCache]` cache for player statistics lookups, disabled if None
+        :param parse_executor :class:`Optional[Executor]` executor to run HTML parsing in, so parsing does not block
+        event loop. Pass ``ProcessPoolExecutor(max_workers=N)`` to parse on N cores or ``ThreadPoolExecutor``
+        to just keep event loop responsive. One executor can be shared between several clients,
+        client never shuts it down. If None, pages are parsed right in the event loop
+        :param connection_limit :class:`int` total number of simultaneous connections, 0 means no limit
+        :param connection_limit_per_host :class:`int` number of simultaneous connections to one host, 0 means no limit
+        :param keepalive_timeout :class:`float` seconds idle connection is kept open for reuse
+        :param dns_cache_ttl :class:`Optional[int]` seconds resolved addresses are cached, None caches forever
+        :param timeout :class:`Union[float, aiohttp.ClientTimeout, None]` request timeout in seconds or
+        :class:`aiohttp.ClientTimeout` instance, aiohttp default is used if None
+        :param rate_limiter :class:`Optional[TokenBucket]` limiter shared by all requests of the client
+        :param retry_policy :class:`Optional[RetryPolicy]` how to retry failed requests, requests are not retried if None
+        :param page_store :class:`Optional[PageStore]` persistent store of fetched pages, unchanged pages are
+        revalidated with conditional requests and are not parsed again. Disabled if None
+        :param instrumentation :class:`Optional[Instrumentation]` hooks called with timings of every request,
+        parse and cache lookup
+        :param account_pool :class:`Optional[AccountPool]` several accounts to spread requests across,
+        can not be used together with ``raw_cookie``
+        :param search_cache :class:`Optional[ResultCache]` cache for battalion search responses, disabled if None.
+        Pass ``ResultCache(negative_exceptions=(BattalionSearchBattalionNotFound,))`` to cache empty results as well
+        :param search_index :class:`Optional[BattalionSearchIndex]` index of found battalions used by
+        :meth:`autocomplete_battalion`, new empty index is created if None
+
+        Session is created on the first request, so client can be constructed outside of running event loop.
+        Use client as ``async with AIOClient(...) as client:`` or call :meth:`close` when you are done.
+
+        versionchanged:: 2.1 Added connection pool, timeout, rate limit, retry, page store, instrumentation,
+        account pool and battalion search settings, session is created lazily
         """
 
         # Base URL for player statistics
         self.__user_stats_url = 'https://arwar.ru/dynamic/user/?a=stats'
         # Base URL for battalion page
         self.__battalion_stats_url = 'https://arwar.ru/dynamic/aliance/index.php?a=index'
+        # URL battalion search form is posted to
+        self.__battalion_search_url = 'https://armata.my.games/dynamic/gamecenter/?a=clan_search'
+
+        if raw_cookie and account_pool is not None:
+            raise ValueError('Either raw_cookie or account_pool can be given, not both')
 
         # Dict with cookies
         self.__cookie: Union[Dict, List, None] = None
+        self.__account_pool: Optional[AccountPool] = account_pool
 
         if raw_cookie:
             self.__cookie = self.__prepare_cookie(raw_cookie)
 
-        # Session that will contain cookies
-        self.__session: aiohttp.ClientSession = aiohttp.ClientSession(cookies=self.__cookie)
-        self.__parser: Parser = Parser()
+        # Session that will contain cookies, created on first request
+        self.__session: Optional[aiohttp.ClientSession] = None
+        self.__connector_settings = {'limit': connection_limit, 'limit_per_host': connection_limit_per_host,
+                                     'keepalive_timeout': keepalive_timeout, 'ttl_dns_cache': dns_cache_ttl}
+        if isinstance(timeout, (int, float)):
+            timeout = aiohttp.ClientTimeout(total=timeout)
+        self.__timeout: Optional[aiohttp.ClientTimeout] = timeout
+        self.__rate_limiter: Optional[TokenBucket] = rate_limiter
+        self.__retry_policy: RetryPolicy = retry_policy if retry_policy is not None else RetryPolicy(retries=0)
+
+        self.__parser: Parser = Parser(parser_backend)
+        self.__cache: Optional[ResultCache] = cache
+        self.__parse_executor: Optional[Executor] = parse_executor
+        self.__page_store: Optional[PageStore] = page_store
+        self.__instrumentation: Optional[Instrumentation] = instrumentation
+        self.__search_cache: Optional[ResultCache] = search_cache
+        self.__search_index: BattalionSearchIndex = search_index if search_index is not None \
+            else BattalionSearchIndex()
+        # Requests that are being performed right now, (URL, parse function) -> task that fetches and parses the page
+        self.__in_flight: Dict[Tuple[str, Callable], asyncio.Future] = {}
         logger.info(f'Initialized AIOClient. Is with cookies: {raw_cookie is not None}')
 
+    def __get_session(self) -> aiohttp.ClientSession:
+        """
+        Creates session on first use, so it is bound to running event loop
+
+        :return: :class:`aiohttp.ClientSession`
+        """
+        if self.__session is None or self.__session.closed:
+            connector = aiohttp.TCPConnector(**self.__connector_settings)
+            session_settings = {'cookies': self.__cookie, 'connector': connector}
+            if self.__account_pool is not None:
+                # Cookies are sent with every request on behalf of one of accounts, so session must not keep any
+                session_settings['cookie_jar'] = aiohttp.DummyCookieJar()
+            if self.__timeout is not None:
+                session_settings['timeout'] = self.__timeout
+            self.__session = aiohttp.ClientSession(**session_settings)
+        return self.__session
+
     async def close(self):
         """
         Closes session if it's not closed yet
         Please, call this when you done using class
         :return: None
         """
-        if self.__session.closed:
+        if self.__session is None or self.__session.closed:
             return
         await self.__session.close()
 
+    async def __aenter__(self) -> 'AIOClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
     def __del__(self):
-        asyncio.ensure_future(self.close())
+        # __init__ could fail before session attribute was set
+        session = self.__dict__.get('_AIOClient__session')
+        if session is None or session.closed:
+            return
+        try:
+            asyncio.get_running_loop().create_task(session.close())
+        except RuntimeError:
+            logger.warning('AIOClient was garbage collected without being closed, call close() or use "async with"')
 
     @staticmethod
     def __prepare_cookie(raw_cookie: Union[Dict, List]) -> Dict:
@@ -96,16 +211,248 @@ class AIOClient:
             new_cookie_dict[item['name']] = item['value']
         return new_cookie_dict
 
-    async def __get_page(self, page_url: str):
-        request = await self.__session.get(url=page_url)
-        logger.info('Performing request to {0}'.format(page_url))
-        if request.status == 200:
-            return await request.text()
-        logger.error('Got non 200 status code on request to {0}. Status code: {1}'.format(page_url, request.status))
-        raise BadHTTPStatusCode(f'Got non 200 status code: {request.status}', status_code=request.status)
+    async def __fetch(self, page_url: str, headers: Optional[Dict[str, str]] = None,
+                      head_check: Optional[Callable[[str], bool]] = None, account: Optional[Account] = None,
+                      method: str = 'GET', data: Optional[Dict[str, str]] = None
+                      ) -> Tuple[int, Optional[bytes], Mapping[str, str]]:
+        """
+        Retrieves page respecting rate limiter and retrying request according to retry policy
+
+        versionadded:: 2.1
+
+        :raises :exc:`BadHTTPStatusCode` if request did not succeed after all retries
+
+        :param page_url: URL to retrieve
+        :param headers: Additional request headers. If conditional headers are given, 304 status code is accepted
+        :param head_check: Function that looks for error notices in the beginning of the page, see :meth:`__read_body`
+        :param account: Account of account pool to perform request on behalf of
+        :param method: HTTP method of request
+        :param data: Form data sent in request body
+        :return: Status code, raw HTML page (None if page was not modified) and response headers
+        """
+        success_statuses = (200, 304) if headers else (200,)
+        attempt = 0
+        while True:
+            if self.__rate_limiter is not None:
+                await self.__rate_limiter.acquire()
+            if account is not None:
+                await account.rate_limiter.acquire()
+
+            logger.info('Performing request to {0}'.format(page_url))
+            recorder = self.__instrumentation.record_fetch(page_url, attempt, method) \
+                if self.__instrumentation is not None else None
+            try:
+                cookies = account.cookies if account is not None else None
+                async with self.__get_session().request(method, page_url, headers=headers, data=data,
+                                                        cookies=cookies) as request:
+                    if recorder is not None:
+                        recorder.first_byte(request.status)
+                    if request.status in success_statuses:
+                        page = await self.__read_body(request, head_check) if request.status == 200 else None
+                        if self.__rate_limiter is not None:
+                            self.__rate_limiter.reward()
+                        if recorder is not None:
+                            recorder.finish(len(page) if page is not None else 0)
+                        return request.status, page, request.headers
+                    retry_after = request.headers.get('Retry-After')
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+                if recorder is not None:
+                    recorder.finish(exception=exc)
+                if not self.__retry_policy.can_retry(attempt):
+                    raise
+                delay = self.__retry_policy.delay(attempt)
+                logger.warning('Request to {0} failed: {1!r}. Retrying in {2:.2f}s'.format(page_url, exc, delay))
+            except Exception as exc:
+                # E.g. error page recognized by head check
+                if recorder is not None:
+                    recorder.finish(exception=exc)
+                raise
+            else:
+                if request.status == 429 and self.__rate_limiter is not None:
+                    self.__rate_limiter.penalize()
+                if request.status not in self.__retry_policy.retry_statuses or \
+                        not self.__retry_policy.can_retry(attempt):
+                    logger.error('Got non 200 status code on request to {0}. Status code: {1}'.format(
+                        page_url, request.status))
+                    exc = BadHTTPStatusCode(f'Got non 200 status code: {request.status}', status_code=request.status)
+                    if recorder is not None:
+                        recorder.finish(exception=exc)
+                    raise exc
+                if recorder is not None:
+                    recorder.finish()
+                delay = self.__retry_policy.delay(attempt, retry_after)
+                logger.warning('Got {0} status code on request to {1}. Retrying in {2:.2f}s'.format(
+                    request.status, page_url, delay))
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def __read_body(self, response: aiohttp.ClientResponse, head_check: Optional[Callable[[str], bool]]) -> bytes:
+        """
+        Reads response body as it arrives. Until ``head_check`` returns True or ``HEAD_CHECK_LIMIT`` bytes are read,
+        the received part of the page is passed to ``head_check``, which raises if it recognizes an error page.
+        Then the rest of the body is not downloaded at all: if it is at most ``DRAIN_LIMIT`` bytes long,
+        it is read and thrown away so keep-alive connection returns to the pool, otherwise the connection is closed
+
+        versionadded:: 2.1
+
+        versionchanged:: 2.1 Charset of the response is honored
 
-    async def __get_player_statistic_page(self, nickname: str, mode: int, data: int, tank_id: int, day: int = 0,
-                                          ajax: int = 0, maintype: int = 0) -> str:
+        :param response: Response with 200 status code
+        :param head_check: Function that looks for error notices in the beginning of the page
+        :return: Raw page, transcoded to UTF-8 if the response declares another charset
+        """
+        encoding = self.__response_encoding(response)
+        if head_check is None:
+            return self.__to_utf8(await response.read(), encoding)
+
+        chunks = []
+        received = 0
+        # Decoder keeps the beginning of a character split between chunks until the rest of it arrives
+        decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+        head = ''
+        checking = True
+        async for chunk in response.content.iter_any():
+            chunks.append(chunk)
+            received += len(chunk)
+            if checking:
+                head += decoder.decode(chunk)
+                try:
+                    checking = not head_check(head) and received < self.HEAD_CHECK_LIMIT
+                except Exception:
+                    await self.__drain(response, received)
+                    raise
+        return self.__to_utf8(b''.join(chunks), encoding)
+
+    async def __drain(self, response: aiohttp.ClientResponse, received: int):
+        """
+        Reads the rest of aborted response if it is short, so its connection can be reused
+        """
+        if response.content_length is None or response.content_length - received > self.DRAIN_LIMIT:
+            return
+        async for _ in response.content.iter_any():
+            pass
+
+    @staticmethod
+    def __response_encoding(response: aiohttp.ClientResponse) -> str:
+        try:
+            return response.get_encoding()
+        except RuntimeError:
+            # No charset is given and the body is not read yet, the site serves UTF-8
+            return 'utf-8'
+
+    @staticmethod
+    def __to_utf8(page: bytes, encoding: str) -> bytes:
+        # Parser expects UTF-8
+        if codecs.lookup(encoding).name == 'utf-8':
+            return page
+        return page.decode(encoding, 'replace').encode('utf-8')
+
+    async def __get_parsed(self, url: str, parse: Callable[..., T], *args,
+                           head_check: Optional[Callable[[str], bool]] = None) -> T:
+        """
+        Fetches page and parses it with ``parse(page, *args)``.
+        Concurrent calls for the same URL share one request and one parse,
+        every caller receives the same result or exception.
+
+        versionadded:: 2.1
+
+        :param url: URL to retrieve
+        :param parse: Function that turns page into result
+        :param head_check: Function that recognizes error pages by their beginning
+        :return: Result of ``parse``
+        """
+        # The same page may be parsed by different functions, so parse function is a part of the key
+        key = (url, parse)
+        task = self.__in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.__fetch_and_parse(url, parse, *args, head_check=head_check))
+            self.__in_flight[key] = task
+            task.add_done_callback(lambda finished: self.__forget_in_flight(key, finished))
+        # Shield the shared task, so one cancelled caller does not cancel the request for everybody else
+        return await asyncio.shield(task)
+
+    def __forget_in_flight(self, key: Tuple[str, Callable], task: asyncio.Future):
+        if self.__in_flight.get(key) is task:
+            del self.__in_flight[key]
+        # Mark exception as retrieved, otherwise asyncio complains when all callers were cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def __fetch_and_parse(self, url: str, parse: Callable[..., T], *args,
+                                head_check: Optional[Callable[[str], bool]] = None) -> T:
+        return await self.__with_account(
+            functools.partial(self.__fetch_and_parse_as, head_check=head_check), url, parse, *args)
+
+    async def __with_account(self, func: Callable[..., Awaitable[T]], *args) -> T:
+        """
+        Calls ``func(account, *args)`` with account of account pool, or with None if there is no pool.
+        Account that turns out to be not authenticated is quarantined and call is repeated with the next one
+
+        :return: Result of ``func``
+        """
+        if self.__account_pool is None:
+            return await func(None, *args)
+
+        # Every attempt either succeeds or quarantines one more account, so there are at most that many attempts
+        for _ in range(len(self.__account_pool)):
+            account = self.__account_pool.acquire()
+            try:
+                return await func(account, *args)
+            except NotAuthException:
+                self.__account_pool.quarantine(account)
+        raise NotAuthException('Every account in the pool is not authenticated on aw.mail.ru')
+
+    async def __fetch_and_parse_as(self, account: Optional[Account], url: str, parse: Callable[..., T], *args,
+                                   head_check: Optional[Callable[[str], bool]] = None) -> T:
+        if self.__page_store is None:
+            _, page, _ = await self.__fetch(url, head_check=head_check, account=account)
+            return await self.__parse(url, page, parse, *args)
+
+        parse_key = self.__page_store.parse_key(parse)
+        entry = await self.__in_store_executor(self.__page_store.get, url)
+        if entry is not None and entry.parse_key != parse_key:
+            entry = None
+
+        status, page, headers = await self.__fetch(url, self.__page_store.conditional_headers(entry), head_check,
+                                                   account)
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        if entry is not None and (status == 304 or self.__page_store.hash_page(page) == entry.content_hash):
+            logger.info('Page {0} was not modified, using stored result'.format(url))
+            await self.__in_store_executor(self.__page_store.touch, url, etag, last_modified)
+            return self.__page_store.load(entry)
+
+        parsed = await self.__parse(url, page, parse, *args)
+        await self.__in_store_executor(self.__page_store.put, url, page, etag, last_modified, parse_key, parsed)
+        return parsed
+
+    @staticmethod
+    async def __in_store_executor(method: Callable[..., T], *args) -> T:
+        # Page store performs blocking SQLite queries and commits, it is thread-safe,
+        # so the queries run in default executor instead of stalling every other request
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(method, *args))
+
+    async def __parse(self, url: str, page: bytes, parse: Callable[..., T], *args) -> T:
+        in_event_loop = self.__parse_executor is None
+        recorder = self.__instrumentation.record_parse(url, parse, in_event_loop) \
+            if self.__instrumentation is not None else None
+        try:
+            if in_event_loop:
+                result = parse(page, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.__parse_executor, functools.partial(parse, page, *args))
+        except Exception as exc:
+            if recorder is not None:
+                recorder.finish(exc)
+            raise
+        if recorder is not None:
+            recorder.finish()
+        return result
+
+    def __player_statistic_url(self, nickname: str, mode: int, data: int, tank_id: int, day: int = 0,
+                               ajax: int = 0, maintype: int = 0) -> str:
         """
         :param nickname: Nickname of user to find.
         :param mode: Game mode Number from 0 to 4 {pvp, pve, low, glops, ranked}.
@@ -115,17 +462,15 @@ class AIOClient:
         :param ajax: Is data should be returned like in ajax request (DONT CHANGE IT OR WILL BROKE).
         :param maintype: In-game type of vehicle(0 all types, 1 - MBT, 2 - LT, 3 - TD, 4 - AFV)
 
-        :return: string with decoded HTML page
+        :return: URL of player statistics page
 
         """
 
-        url = f'{self.__user_stats_url}&name={nickname}&mode={mode}&data={data}&type={tank_id}&maintype={maintype}&day={day}&ajax={ajax}'
-        page = await self.__get_page(url)
-        return page
+        return f'{self.__user_stats_url}&name={nickname}&mode={mode}&data={data}&type={tank_id}&maintype={maintype}&day={day}&ajax={ajax}'
 
     async def get_statistic_by_nickname(self, nickname, mode: Union[int, GameMode] = 0, player_id: int = 0,
                                         tank_id: int = 0,
-                                        day: int = 0) -> PlayerStatistics:
+                                        day: int = 0, vehicle_type: Union[int, VehicleType] = 0) -> PlayerStatistics:
         """
         Retrieves player statistics in mode on specified tank by given nickname or playerID
 
@@ -136,6 +481,9 @@ class AIOClient:
         :param player_id: CSA ID of player to find(overwrites user nickname if not 0)
         :param tank_id: staticID of tank to find for(0 means overall stat for mode)
         :param day: Filter stats by some date/battle count
+        :param vehicle_type: Class of vehicles to find for, number from 0 to 4 {all, mbt, lt, td, afv}
+
+        versionchanged:: 2.1 Added vehicle_type argument
 
         :return: :class:`PlayerStatistics`
         """
@@ -143,13 +491,150 @@ class AIOClient:
         # If GameMode instance was passed as a mode, than assign number from GameMode.value to mode variable
         if isinstance(mode, GameMode):
             mode = mode.value
-
-        # Get page
-        page = await self.__get_player_statistic_page(nickname, mode, player_id, tank_id, day)
-        # Parse the page
-        parsed_data = self.__parser.parse_player_statistics(page, nickname)
+        if isinstance(vehicle_type, VehicleType):
+            vehicle_type = vehicle_type.value
+
+        cache_key = None
+        if self.__cache is not None:
+            cache_key = self.__cache.statistics_key(nickname, mode, player_id, tank_id, day, vehicle_type)
+            cached = self.__get_cached(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            # Get page and parse it
+            url = self.__player_statistic_url(nickname, mode, player_id, tank_id, day, maintype=vehicle_type)
+            head_check = functools.partial(self.__parser.check_player_statistics_head, nickname=nickname)
+            parsed_data = await self.__get_parsed(url, self.__parser.parse_player_statistics, nickname,
+                                                  head_check=head_check)
+        except Exception as exc:
+            if cache_key is not None:
+                self.__cache.set_exception(cache_key, exc)
+            raise
+
+        if cache_key is not None:
+            self.__cache.set(cache_key, parsed_data)
         return parsed_data
 
+    def __get_cached(self, cache_key) -> Optional[PlayerStatistics]:
+        if self.__instrumentation is None:
+            return self.__cache.get(cache_key)
+        try:
+            cached = self.__cache.get(cache_key)
+        except Exception:
+            self.__instrumentation.record_cache(cache_key, 'negative_hit')
+            raise
+        self.__instrumentation.record_cache(cache_key, 'hit' if cached is not None else 'miss')
+        return cached
+
+    @property
+    def cache(self) -> Optional[ResultCache]:
+        """
+        versionadded:: 2.1
+
+        :return: :class:`ResultCache` used by client or None if caching is disabled
+        """
+        return self.__cache
+
+    async def get_all_modes(self, nickname, player_id: int = 0, tank_id: int = 0,
+                            day: int = 0) -> PlayerModesStatistics:
+        """
+        Retrieves player statistics in every game mode, all modes are requested concurrently
+
+        versionadded:: 2.1
+
+        :raises :exc:`UserHasClosedStatisticsException`, :exc:`NotAuthException`,:exc:`UserNotFoundException`
+
+        :param nickname: Nickname of user to find
+        :param player_id: CSA ID of player to find(overwrites user nickname if not 0)
+        :param tank_id: staticID of tank to find for(0 means overall stat for mode)
+        :param day: Filter stats by some date/battle count
+
+        :return: :class:`PlayerModesStatistics`
+        """
+        modes = list(GameMode)
+        results = await asyncio.gather(
+            *(self.get_statistic_by_nickname(nickname, mode, player_id, tank_id, day) for mode in modes),
+            return_exceptions=True
+        )
+        # All modes fail the same way (e.g. closed statistics), so re-raise the first error after all requests finished
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return PlayerModesStatistics(nickname=results[0].nickname, modes=dict(zip(modes, results)))
+
+    async def get_vehicle_statistics(self, nickname, tank_ids: Iterable[int] = (),
+                                     vehicle_types: Iterable[Union[int, VehicleType]] = (),
+                                     modes: Iterable[Union[int, GameMode]] = (GameMode.PVP,), player_id: int = 0,
+                                     day: int = 0, concurrency: int = 5) -> VehicleStatisticsMatrix:
+        """
+        Retrieves player statistics for every combination of given vehicles and game modes,
+        running at most ``concurrency`` requests at the same time
+
+        versionadded:: 2.1
+
+        :raises :exc:`UserHasClosedStatisticsException`, :exc:`NotAuthException`,:exc:`UserNotFoundException`
+
+        :param nickname: Nickname of user to find
+        :param tank_ids: staticIDs of tanks to find for
+        :param vehicle_types: Vehicle classes to find for, pass :class:`VehicleType` itself to get all of them
+        :param modes: Game modes to find for
+        :param player_id: CSA ID of player to find(overwrites user nickname if not 0)
+        :param day: Filter stats by some date/battle count
+        :param concurrency: Maximum number of requests performed at the same time
+
+        :return: :class:`VehicleStatisticsMatrix`
+        """
+        modes = [GameMode(mode) for mode in modes]
+        vehicles: List[Union[int, VehicleType]] = list(tank_ids) + [VehicleType(item) for item in vehicle_types]
+        cells = [(vehicle, mode) for vehicle in vehicles for mode in modes]
+
+        async def lookup(cell: Tuple[Union[int, VehicleType], GameMode]) -> PlayerStatistics:
+            vehicle, mode = cell
+            if isinstance(vehicle, VehicleType):
+                return await self.get_statistic_by_nickname(nickname, mode, player_id, day=day, vehicle_type=vehicle)
+            return await self.get_statistic_by_nickname(nickname, mode, player_id, tank_id=vehicle, day=day)
+
+        statistics = {}
+        async for cell, result in as_completed_bounded(lookup, cells, concurrency):
+            statistics[cell] = result
+
+        # Keep cells in requested order rather than in order of completion
+        statistics = {cell: statistics[cell] for cell in cells}
+        proper_nickname = next(iter(statistics.values())).nickname if statistics else nickname
+        return VehicleStatisticsMatrix(nickname=proper_nickname, statistics=statistics)
+
+    async def get_statistics_many(self, nicknames: Iterable[str], mode: Union[int, GameMode] = 0, tank_id: int = 0,
+                                  day: int = 0, concurrency: int = 5
+                                  ) -> AsyncIterator[Tuple[str, Union[PlayerStatistics, Exception]]]:
+        """
+        Retrieves statistics of many players, running at most ``concurrency`` requests at the same time.
+        Results are yielded as soon as each lookup finishes, so they may come in a different order than nicknames.
+
+        :exc:`UserNotFoundException` and :exc:`UserHasClosedStatisticsException` are yielded as values
+        instead of being raised, any other exception aborts the whole batch.
+
+        versionadded:: 2.1
+
+        :param nicknames: Nicknames of players to find
+        :param mode: Game mode Number from 0 to 4 {pvp, pve, low, glops, ranked}
+        :param tank_id: staticID of tank to find for(0 means overall stat for mode)
+        :param day: Filter stats by some date/battle count
+        :param concurrency: Maximum number of requests performed at the same time
+
+        :return: Async iterator of ``(nickname, PlayerStatistics or exception)`` tuples
+        """
+
+        async def lookup(nickname: str) -> Union[PlayerStatistics, Exception]:
+            try:
+                return await self.get_statistic_by_nickname(nickname, mode, tank_id=tank_id, day=day)
+            except (UserNotFoundException, UserHasClosedStatisticsException) as exc:
+                return exc
+
+        async for nickname, result in as_completed_bounded(lookup, nicknames, concurrency):
+            yield nickname, result
+
     async def get_battalion_players(self, battalion_id: int) -> List[BattalionMemberEntry]:
         """
         Retrieves battalion players by given battalion ID
@@ -158,18 +643,169 @@ class AIOClient:
         :return: :class:`List[BattalionMemberEntry]`
         """
 
-        # TODO: Optimize that algorithm, so we would need to iterate over list two times here and in page parser method
+        url = f'{self.__battalion_stats_url}&data={battalion_id}'
+        battalion_players = await self.__get_parsed(url, _parse_battalion_players, self.__parser, battalion_id)
+        # Result is shared between concurrent callers, so everybody gets own list
+        return list(battalion_players)
+
+    async def iter_battalion_players(self, battalion_id: int) -> AsyncIterator[BattalionMemberEntry]:
+        """
+        Retrieves battalion players by given battalion ID and yields them one by one,
+        so consumers can start working on the first players before the rest are handed out.
+        The roster is fetched and parsed the same way as by :meth:`get_battalion_players`:
+        in ``parse_executor`` if it is given, and shared with concurrent callers
+
+        versionadded:: 2.1
+
+        :raises :exc:`BattalionNotFound`, :exc:`NotAuthException`
+
+        :param battalion_id: ID of battalion
+        :return: Async iterator of :class:`BattalionMemberEntry`
+        """
+        url = f'{self.__battalion_stats_url}&data={battalion_id}'
+        battalion_players = await self.__get_parsed(url, _parse_battalion_players, self.__parser, battalion_id)
+        for battalion_player in battalion_players:
+            yield battalion_player
+
+    async def get_battalion_statistics(self, battalion_id: int,
+                                       modes: Iterable[Union[int, GameMode]] = (GameMode.PVP,),
+                                       concurrency: int = 5) -> BattalionStatistics:
+        """
+        Retrieves statistics of every battalion member in given game modes.
+        Member lookups start as soon as roster members are handed out by :meth:`iter_battalion_players`,
+        at most ``concurrency`` of them run at the same time. Members are looked up by CSA ID, so nickname changes do not break the crawl.
+
+        versionadded:: 2.1
+
+        :raises :exc:`BattalionNotFound`, :exc:`NotAuthException`
+
+        :param battalion_id: ID of battalion
+        :param modes: Game modes to find for
+        :param concurrency: Maximum number of requests performed at the same time
+
+        :return: :class:`BattalionStatistics`, lookups of missing and closed profiles are stored in its ``errors``
+        """
+        modes = [GameMode(mode) for mode in modes]
+        members: List[BattalionMemberEntry] = []
+
+        async def cells() -> AsyncIterator[Tuple[BattalionMemberEntry, GameMode]]:
+            async for member in self.iter_battalion_players(battalion_id):
+                members.append(member)
+                for mode in modes:
+                    yield member, mode
+
+        async def lookup(cell: Tuple[BattalionMemberEntry, GameMode]) -> Union[PlayerStatistics, Exception]:
+            member, mode = cell
+            try:
+                return await self.get_statistic_by_nickname(member.nickname, mode, player_id=member.id)
+            except (UserNotFoundException, UserHasClosedStatisticsException) as exc:
+                return exc
+
+        results = {}
+        async for (member, mode), result in as_completed_bounded(lookup, cells(), concurrency):
+            results[member.id, mode] = result
+
+        # Keep members in roster order rather than in order of completion
+        statistics, errors = {}, {}
+        for member in members:
+            for mode in modes:
+                result = results[member.id, mode]
+                if isinstance(result, Exception):
+                    errors[member.id, mode] = result
+                else:
+                    statistics[member.id, mode] = result
+        return BattalionStatistics(battalion_id=battalion_id, members=members, statistics=statistics, errors=errors)
+
+    async def search_battalion(self, battalion_name: str) -> List[BattalionSearchResultEntry]:
+        """
+        Searches for battalion by given name
+
+        :raises :exc:`BattalionSearchTooShortQuery` if you gave less than 4 symbols for search
 
-        page = await self.__get_page(f'{self.__battalion_stats_url}&data={battalion_id}')
-        __temp_battalion_players = self.__parser.parse_battalion_players(page)
+        :raises :exc:`BattalionSearchBattalionNotFound` if battalion with given name was not found
 
-        battalion_players: List[BattalionMemberEntry] = []
-        for internal_dict_entry in __temp_battalion_players:
-            battalion_players.append(
-                BattalionMemberEntry(nickname=internal_dict_entry['nickname'],
-                                     id=internal_dict_entry['id'],
-                                     role=internal_dict_entry['role'],
-                                     battalion_id=battalion_id)
-            )
+        versionadded:: 2.1
+
+        :param battalion_name: Name or beginning of name of battalion
+        :return: :class:`List[BattalionSearchResultEntry]`
+        """
+        cache_key = None
+        if self.__search_cache is not None:
+            cache_key = self.__search_cache.search_key(battalion_name)
+            cached = self.__search_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+        try:
+            search_result = await self.__with_account(self.__search_battalion_request, battalion_name)
+        except BattalionSearchBattalionNotFound as exc:
+            # Nothing starts with this name, so longer queries do not need the site either
+            self.__search_index.add((), query=battalion_name)
+            if cache_key is not None:
+                self.__search_cache.set_exception(cache_key, exc)
+            raise
+
+        self.__search_index.add(search_result, query=battalion_name)
+        if cache_key is not None:
+            self.__search_cache.set(cache_key, search_result)
+        return list(search_result)
+
+    async def search_battalions_many(self, battalion_names: Iterable[str], concurrency: int = 5
+                                     ) -> AsyncIterator[Tuple[str, Union[List[BattalionSearchResultEntry], Exception]]]:
+        """
+        Searches for many battalions, running at most ``concurrency`` requests at the same time.
+        Results are yielded as soon as each search finishes, so they may come in a different order than names.
 
-        return battalion_players
+        :exc:`BattalionSearchTooShortQuery` and :exc:`BattalionSearchBattalionNotFound` are yielded as values
+        instead of being raised, any other exception aborts the whole batch.
+
+        versionadded:: 2.1
+
+        :param battalion_names: Names or beginnings of names of battalions
+        :param concurrency: Maximum number of requests performed at the same time
+        :return: Async iterator of ``(name, List[BattalionSearchResultEntry] or exception)`` tuples
+        """
+
+        async def lookup(battalion_name: str) -> Union[List[BattalionSearchResultEntry], Exception]:
+            try:
+                return await self.search_battalion(battalion_name)
+            except (BattalionSearchTooShortQuery, BattalionSearchBattalionNotFound) as exc:
+                return exc
+
+        async for battalion_name, result in as_completed_bounded(lookup, battalion_names, concurrency):
+            yield battalion_name, result
+
+    async def autocomplete_battalion(self, prefix: str, limit: Optional[int] = 10) -> List[BattalionSearchResultEntry]:
+        """
+        Finds battalions which names start with given prefix, case-insensitive.
+        Prefixes that were already searched for (or which beginning was) are answered from ``search_index``
+        without requests, prefixes shorter than 4 symbols are answered only from battalions found before
+
+        versionadded:: 2.1
+
+        :param prefix: Beginning of battalion name
+        :param limit: Maximum number of returned battalions, all of them if None
+        :return: :class:`List[BattalionSearchResultEntry]` sorted by name
+        """
+        if len(prefix) >= BattalionSearchIndex.MIN_QUERY_LENGTH and not self.__search_index.is_covered(prefix):
+            try:
+                await self.search_battalion(prefix)
+            except BattalionSearchBattalionNotFound:
+                return []
+        return self.__search_index.search(prefix, limit)
+
+    @property
+    def search_index(self) -> BattalionSearchIndex:
+        """
+        versionadded:: 2.1
+
+        :return: :class:`BattalionSearchIndex` with every battalion found by client
+        """
+        return self.__search_index
+
+    async def __search_battalion_request(self, account: Optional[Account], battalion_name: str
+                                         ) -> List[BattalionSearchResultEntry]:
+        _, content, _ = await self.__fetch(self.__battalion_search_url, account=account, method='POST',
+                                           data={'name': battalion_name})
+        return await self.__parse(self.__battalion_search_url, content, self.__parser.parse_battalion_search,
+                                  battalion_name)
@@ -0,0 +1,250 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import re
+import html
+from typing import Any, Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+__all__ = ['HTMLBackend', 'BS4Backend', 'LxmlBackend', 'SelectolaxBackend', 'get_backend', 'available_backends']
+
+
+class HTMLBackend:
+    """
+    Set of DOM primitives :class:`Parser` is written against.
+
+    Every backend must behave exactly like the BeautifulSoup one:
+    :meth:`text` returns the same string as stripping tags from ``str(tag)``,
+    :meth:`contents` returns child nodes including text nodes, as ``Tag.contents`` does.
+    :meth:`parse` accepts both decoded pages and raw UTF-8 bytes.
+
+    versionadded:: 2.1
+    """
+    name: str = ''
+
+    def parse(self, page: Union[str, bytes]) -> Any:
+        raise NotImplementedError
+
+    def find_all(self, node: Any, tag: str, class_: Optional[str] = None) -> List[Any]:
+        raise NotImplementedError
+
+    def find(self, node: Any, tag: str, class_: Optional[str] = None, id_: Optional[str] = None) -> Any:
+        raise NotImplementedError
+
+    def text(self, node: Any) -> str:
+        raise NotImplementedError
+
+    def outer_html(self, node: Any) -> str:
+        raise NotImplementedError
+
+    def contents(self, node: Any) -> List[Any]:
+        raise NotImplementedError
+
+
+class BS4Backend(HTMLBackend):
+    """Reference backend, uses BeautifulSoup with builtin "html.parser"."""
+    name = 'bs4'
+
+    __TAGS = re.compile('<.*?>')
+
+    def parse(self, page):
+        if isinstance(page, bytes):
+            return BeautifulSoup(page, 'html.parser', from_encoding='utf-8')
+        return BeautifulSoup(page, 'html.parser')
+
+    def find_all(self, node, tag, class_=None):
+        return node.find_all(tag, {'class': class_}) if class_ else node.find_all(tag)
+
+    def find(self, node, tag, class_=None, id_=None):
+        attrs = {}
+        if class_:
+            attrs['class'] = class_
+        if id_:
+            attrs['id'] = id_
+        return node.find(tag, attrs)
+
+    def text(self, node):
+        return self.__TAGS.sub('', str(node))
+
+    def outer_html(self, node):
+        return str(node)
+
+    def contents(self, node):
+        return node.contents
+
+
+class LxmlBackend(HTMLBackend):
+    """Backend built on top of lxml. Available only if lxml is installed."""
+    name = 'lxml'
+
+    def __init__(self):
+        if lxml is None:
+            raise ImportError('lxml is not installed')
+        self.__html_parser = lxml.html.HTMLParser(encoding='utf-8')
+        self.__queries: Dict[tuple, Any] = {}
+
+    def __query(self, tag, class_, id_):
+        key = (tag, class_, id_)
+        query = self.__queries.get(key)
+        if query is None:
+            conditions = ''
+            if class_:
+                conditions += f'[contains(concat(" ", normalize-space(@class), " "), " {class_} ")]'
+            if id_:
+                conditions += f'[@id="{id_}"]'
+            query = self.__queries[key] = etree.XPath(f'.//{tag}{conditions}')
+        return query
+
+    def parse(self, page):
+        if isinstance(page, str):
+            page = page.encode('utf-8')
+        try:
+            return lxml.html.document_fromstring(page, parser=self.__html_parser)
+        except etree.ParserError:
+            # lxml refuses to parse empty documents, BeautifulSoup just returns an empty tree
+            return lxml.html.document_fromstring(b'<html></html>', parser=self.__html_parser)
+
+    def find_all(self, node, tag, class_=None):
+        return self.__query(tag, class_, None)(node)
+
+    def find(self, node, tag, class_=None, id_=None):
+        found = self.__query(tag, class_, id_)(node)
+        return found[0] if found else None
+
+    def text(self, node):
+        if node is None or isinstance(node, str):
+            return str(node)
+        return html.escape(node.text_content(), quote=False)
+
+    def outer_html(self, node):
+        if node is None or isinstance(node, str):
+            return str(node)
+        return lxml.html.tostring(node, encoding='unicode', with_tail=False)
+
+    def contents(self, node):
+        contents = []
+        if node.text:
+            contents.append(node.text)
+        for child in node:
+            contents.append((child.text or '') if child.tag is etree.Comment else child)
+            if child.tail:
+                contents.append(child.tail)
+        return contents
+
+
+class SelectolaxBackend(HTMLBackend):
+    """Backend built on top of selectolax (lexbor engine). Available only if selectolax is installed."""
+    name = 'selectolax'
+
+    def __init__(self):
+        if LexborHTMLParser is None:
+            raise ImportError('selectolax is not installed')
+
+    @staticmethod
+    def __selector(tag, class_, id_):
+        return tag + (f'.{class_}' if class_ else '') + (f'#{id_}' if id_ else '')
+
+    def parse(self, page):
+        return LexborHTMLParser(page)
+
+    def find_all(self, node, tag, class_=None):
+        found = node.css(self.__selector(tag, class_, None))
+        # Unlike BeautifulSoup, selectolax matches the node it was called on as well
+        if found and getattr(node, 'mem_id', None) == found[0].mem_id:
+            found = found[1:]
+        return found
+
+    def find(self, node, tag, class_=None, id_=None):
+        found = self.find_all(node, tag, class_) if not id_ else node.css(self.__selector(tag, class_, id_))
+        return found[0] if found else None
+
+    def text(self, node):
+        if node is None or isinstance(node, str):
+            return str(node)
+        return html.escape(node.text(deep=True), quote=False)
+
+    def outer_html(self, node):
+        if node is None or isinstance(node, str):
+            return str(node)
+        return node.html
+
+    def contents(self, node):
+        contents = []
+        for child in node.iter(include_text=True):
+            if child.is_text_node:
+                contents.append(child.text(deep=False))
+            elif child.is_comment_node:
+                contents.append(child.comment_content or '')
+            else:
+                contents.append(child)
+        return contents
+
+
+_BACKENDS = {'selectolax': SelectolaxBackend, 'lxml': LxmlBackend, 'bs4': BS4Backend}
+
+
+def available_backends() -> List[str]:
+    """
+    versionadded:: 2.1
+
+    :return: Names of backends that can be used in current environment, fastest first
+    """
+    available = []
+    if LexborHTMLParser is not None:
+        available.append('selectolax')
+    if lxml is not None:
+        available.append('lxml')
+    available.append('bs4')
+    return available
+
+
+def get_backend(name: str = 'auto') -> HTMLBackend:
+    """
+    Creates HTML backend by its name
+
+    versionadded:: 2.1
+
+    :raises :exc:`ValueError` if backend name is unknown, :exc:`ImportError` if backend is not installed
+
+    :param name: One of "auto", "selectolax", "lxml" or "bs4". "auto" picks the fastest installed one
+    :return: :class:`HTMLBackend` instance
+    """
+    if name == 'auto':
+        name = available_backends()[0]
+    if name not in _BACKENDS:
+        raise ValueError(f'Unknown HTML backend "{name}". Use one of: auto, {", ".join(_BACKENDS)}')
+    return _BACKENDS[name]()
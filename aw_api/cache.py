@@ -0,0 +1,195 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Tuple, Type
+
+from .exceptions import UserNotFoundException, UserHasClosedStatisticsException
+
+__all__ = ['ResultCache', 'CacheInfo']
+
+
+class CacheInfo(NamedTuple):
+    """
+    Cache counters, returned by :meth:`ResultCache.cache_info`
+
+    versionadded:: 2.1
+    """
+    hits: int
+    negative_hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ResultCache:
+    """
+    In-process LRU cache with per-entry TTL for parsed API results.
+
+    Exceptions listed in ``negative_exceptions`` are cached as well (for ``negative_ttl`` seconds)
+    and raised again on every hit, so repeated lookups of missing or closed profiles do not hit the site.
+    The cache is thread-safe and can be shared between several clients.
+
+    versionadded:: 2.1
+    """
+    NEGATIVE_EXCEPTIONS: Tuple[Type[BaseException], ...] = (UserNotFoundException, UserHasClosedStatisticsException)
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, negative_ttl: float = 60.0,
+                 negative_exceptions: Tuple[Type[BaseException], ...] = NEGATIVE_EXCEPTIONS):
+        """
+        :param maxsize: Maximum number of stored entries, least recently used ones are evicted first
+        :param ttl: Time in seconds successful results stay valid
+        :param negative_ttl: Time in seconds cached exceptions stay valid
+        :param negative_exceptions: Exception types that should be cached
+        """
+        if maxsize < 1:
+            raise ValueError(f'Cache size must be positive, {maxsize} was given')
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.negative_exceptions = negative_exceptions
+
+        # key -> (expires_at, is_negative, value)
+        self.__entries: 'OrderedDict[Hashable, Tuple[float, bool, Any]]' = OrderedDict()
+        self.__lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def statistics_key(nickname: str, mode: int, player_id: int, tank_id: int, day: int,
+                       vehicle_type: int = 0) -> Tuple:
+        """
+        Builds key for player statistics lookup. Nickname is ignored by the site if player ID is given,
+        so it is ignored here as well.
+
+        :return: Hashable key
+        """
+        player = ('id', player_id) if player_id else ('nickname', nickname)
+        return ('statistics',) + player + (mode, tank_id, day, vehicle_type)
+
+    @staticmethod
+    def search_key(battalion_name: str) -> Tuple:
+        """
+        Builds key for battalion search
+
+        :return: Hashable key
+        """
+        return 'battalion_search', battalion_name
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Looks for non-expired entry
+
+        :raises Cached exception if the key holds negative entry
+
+        :param key: Key of the entry
+        :param default: Value returned on cache miss
+        :return: Cached value or ``default``
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self.__entries[key]
+                self.misses += 1
+                return default
+
+            self.__entries.move_to_end(key)
+            _, is_negative, value = entry
+            if not is_negative:
+                self.hits += 1
+                return value
+            self.negative_hits += 1
+
+        # Raise a copy, so tracebacks do not pile up on the cached exception instance
+        raise self.__copy_exception(value)
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Stores successful result
+
+        :param key: Key of the entry
+        :param value: Value to store
+        """
+        self.__store(key, False, value, self.ttl)
+
+    def set_exception(self, key: Hashable, exception: BaseException) -> bool:
+        """
+        Stores exception if it is one of ``negative_exceptions``
+
+        :param key: Key of the entry
+        :param exception: Raised exception
+        :return: True if exception was cached
+        """
+        if not isinstance(exception, self.negative_exceptions):
+            return False
+        self.__store(key, True, exception, self.negative_ttl)
+        return True
+
+    @staticmethod
+    def __copy_exception(exception: BaseException) -> BaseException:
+        # copy.copy calls __init__ with ``args`` only, and our exceptions take more parameters than the message
+        exception_copy = exception.__class__.__new__(exception.__class__, *exception.args)
+        exception_copy.__dict__.update(exception.__dict__)
+        return exception_copy
+
+    def __store(self, key: Hashable, is_negative: bool, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + ttl, is_negative, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """
+        Removes entry from the cache if it exists
+
+        :param key: Key of the entry
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self):
+        """Removes all entries and resets counters"""
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = self.negative_hits = self.misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        """
+        :return: :class:`CacheInfo` with hit/miss counters and current size
+        """
+        with self.__lock:
+            return CacheInfo(self.hits, self.negative_hits, self.misses, self.maxsize, len(self.__entries))
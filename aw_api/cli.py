@@ -0,0 +1,348 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional, Set, Tuple, Union
+
+import aiohttp
+
+from .async_client import AIOClient
+from .accounts import AccountPool
+from .enums import GameMode
+from .export import ExportWriter, open_writer
+from .exceptions import BaseAWStatsException, NotAuthException, UserNotFoundException, \
+    UserHasClosedStatisticsException, BattalionNotFound
+from .ratelimit import TokenBucket, RetryPolicy
+from .utils import as_completed_bounded
+
+__all__ = ['Checkpoint', 'CrawlSummary', 'read_keys', 'crawl', 'main']
+
+logger = logging.getLogger()
+
+KINDS = ('nicknames', 'player-ids', 'battalions')
+
+# Lookups that finished with these exceptions are final, they are not retried when crawl is resumed
+_FINAL_EXCEPTIONS = (UserNotFoundException, UserHasClosedStatisticsException, BattalionNotFound)
+
+
+class Checkpoint:
+    """
+    Append-only file with keys of finished lookups, one per line.
+    Keys are added only after results of their lookups were written to output, so interrupted crawl
+    can be resumed without losing results. At most one batch is looked up again after a crash.
+
+    versionadded:: 2.1
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to checkpoint file, created on the first :meth:`add_many`
+        """
+        self.path = path
+        self.__done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                # The last line may be incomplete if process was killed while writing it
+                lines = file.read().split('\n')
+            self.__done.update(line for line in lines[:-1] if line)
+        self.__file = None
+
+    def __contains__(self, key: Any) -> bool:
+        return str(key) in self.__done
+
+    def __len__(self):
+        return len(self.__done)
+
+    def add_many(self, keys: Iterable[Any]):
+        """
+        Marks keys as finished and syncs checkpoint to disk
+
+        :param keys: Keys of finished lookups
+        """
+        keys = [str(key) for key in keys]
+        if not keys:
+            return
+        if self.__file is None:
+            self.__file = open(self.path, 'a', encoding='utf-8')
+        self.__file.write(''.join(f'{key}\n' for key in keys))
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__done.update(keys)
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+@dataclass
+class CrawlSummary:
+    """
+    Result of :func:`crawl`. It contains fields:
+
+    done :class:`int` - Number of keys looked up successfully.
+
+    skipped :class:`int` - Number of keys finished in previous runs.
+
+    missing :class:`int` - Number of players or battalions that do not exist or have closed statistics.
+
+    failed :class:`List[Tuple[str, Exception]]` - Keys which lookups failed, they are retried on the next run.
+
+    versionadded:: 2.1
+    """
+    done: int = 0
+    skipped: int = 0
+    missing: int = 0
+    failed: List[Tuple[str, Exception]] = field(default_factory=list)
+
+
+def read_keys(path: str, kind: str) -> List[Union[str, int]]:
+    """
+    Reads keys to crawl, one per line. Empty lines and lines starting with "#" are skipped, duplicates are removed
+
+    versionadded:: 2.1
+
+    :param path: Path to input file, "-" reads standard input
+    :param kind: One of "nicknames", "player-ids" or "battalions"
+    :return: Nicknames or IDs in the order of the file
+    """
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, encoding='utf-8') as file:
+            lines = file.read().splitlines()
+
+    keys = {}
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if kind == 'nicknames':
+            keys[line] = None
+            continue
+        try:
+            keys[int(line)] = None
+        except ValueError:
+            raise ValueError(f'Line {number} of {path} is not a number: {line!r}') from None
+    return list(keys)
+
+
+async def crawl(client: AIOClient, keys: Iterable[Union[str, int]], kind: str, writer: ExportWriter,
+                checkpoint: Checkpoint, mode: Union[int, GameMode] = GameMode.PVP, concurrency: int = 5,
+                batch_size: int = 500, progress=None) -> CrawlSummary:
+    """
+    Looks up every key that is not in checkpoint yet, running at most ``concurrency`` lookups at the same time.
+    Every ``batch_size`` finished keys the results are written to ``writer`` and then the keys are added to
+    ``checkpoint``. Results collected so far are saved when crawl is interrupted as well.
+
+    :exc:`NotAuthException` aborts the crawl, as every next lookup would fail the same way.
+
+    versionadded:: 2.1
+
+    :param client: Client to perform lookups with
+    :param keys: Nicknames, player IDs or battalion IDs
+    :param kind: One of "nicknames", "player-ids" or "battalions"
+    :param writer: Writer of :class:`PlayerStatistics` or :class:`BattalionMemberEntry`
+    :param checkpoint: Keys finished in previous runs
+    :param mode: Game mode of player statistics
+    :param concurrency: Maximum number of lookups performed at the same time
+    :param batch_size: Number of finished keys written at once
+    :param progress: Function called with :class:`CrawlSummary` after every written batch
+    :return: :class:`CrawlSummary`
+    """
+    if kind not in KINDS:
+        raise ValueError(f'Unknown kind "{kind}", use one of {", ".join(KINDS)}')
+
+    summary = CrawlSummary()
+    pending_keys: List[Union[str, int]] = []
+    pending_items: List[Any] = []
+    loop = asyncio.get_running_loop()
+
+    def remaining_keys():
+        for key in keys:
+            if key in checkpoint:
+                summary.skipped += 1
+            else:
+                yield key
+
+    async def lookup(key: Union[str, int]) -> Union[List[Any], Exception]:
+        try:
+            if kind == 'battalions':
+                return await client.get_battalion_players(key)
+            if kind == 'player-ids':
+                return [await client.get_statistic_by_nickname('', mode, player_id=key)]
+            return [await client.get_statistic_by_nickname(key, mode)]
+        except NotAuthException:
+            raise
+        except (BaseAWStatsException, aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            return exc
+
+    def save(keys_to_save: List[Union[str, int]], items: List[Any]):
+        writer.write_many(items)
+        # Keys are marked as done only after their results are on disk
+        writer.sync()
+        checkpoint.add_many(keys_to_save)
+
+    async def save_pending():
+        nonlocal pending_keys, pending_items
+        if not pending_keys:
+            return
+        keys_to_save, items = pending_keys, pending_items
+        pending_keys, pending_items = [], []
+        # Writes are synced to disk, so they are performed outside of event loop
+        await loop.run_in_executor(None, save, keys_to_save, items)
+        if progress is not None:
+            progress(summary)
+
+    try:
+        async for key, result in as_completed_bounded(lookup, remaining_keys(), concurrency):
+            if isinstance(result, _FINAL_EXCEPTIONS):
+                summary.missing += 1
+            elif isinstance(result, Exception):
+                logger.warning('Lookup of {0} failed: {1!r}'.format(key, result))
+                summary.failed.append((str(key), result))
+                continue
+            else:
+                summary.done += 1
+                pending_items.extend(result)
+            pending_keys.append(key)
+            if len(pending_keys) >= batch_size:
+                await save_pending()
+    finally:
+        await save_pending()
+    return summary
+
+
+def _load_cookies(paths: List[str]) -> List:
+    raw_cookies = []
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            raw_cookies.append(json.load(file))
+    return raw_cookies
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='aw-api',
+        description='Crawls statistics of players or rosters of battalions listed in a file. '
+                    'Progress is checkpointed, so interrupted crawl continues where it stopped when run again.')
+    parser.add_argument('kind', choices=KINDS, help='What input file lists')
+    parser.add_argument('input', help='File with one nickname or ID per line, "-" reads standard input')
+    parser.add_argument('-o', '--output', required=True, help='Output file, .ndjson, .jsonl or .csv')
+    parser.add_argument('--format', choices=['ndjson', 'csv'], help='Output format, guessed by extension by default')
+    parser.add_argument('--cookies', action='append', default=[], metavar='PATH',
+                        help='Cookies exported with "EditThisCookie" as JSON. Repeat to spread requests across accounts')
+    parser.add_argument('--mode', choices=[mode.name.lower() for mode in GameMode], default='pvp',
+                        help='Game mode of player statistics')
+    parser.add_argument('--concurrency', type=int, default=5, help='Lookups performed at the same time')
+    parser.add_argument('--rate', type=float, default=2.0, help='Requests per second, per account with --cookies')
+    parser.add_argument('--burst', type=int, default=5, help='Requests performed at once after being idle')
+    parser.add_argument('--retries', type=int, default=3, help='Retries of failed requests')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Request timeout in seconds')
+    parser.add_argument('--batch-size', type=int, default=500, help='Finished lookups written to disk at once')
+    parser.add_argument('--checkpoint', help='Checkpoint file, OUTPUT.checkpoint by default')
+    parser.add_argument('--restart', action='store_true', help='Ignore checkpoint and overwrite output')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not report progress')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of ``aw-api`` command
+
+    versionadded:: 2.1
+
+    :param argv: Command line arguments, ``sys.argv[1:]`` if None
+    :return: Exit code, 1 if some lookups failed and should be retried by running the same command again
+    """
+    arguments = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if arguments.verbose else logging.ERROR,
+                        format='%(asctime)s %(levelname)s %(message)s')
+
+    checkpoint_path = arguments.checkpoint or f'{arguments.output}.checkpoint'
+    if arguments.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+    resuming = len(checkpoint) > 0
+    try:
+        writer = open_writer(arguments.output, arguments.format, append=resuming)
+        if not writer.resumable:
+            # Keys are checkpointed after their rows are synced, which such file can not do before it is closed
+            raise ValueError(f'Rows of {arguments.output} are not readable until the file is closed, '
+                             f'so crawl can not be checkpointed. Export to ndjson or csv instead')
+    except (ValueError, ImportError) as exc:
+        if resuming:
+            exc = f'{exc}. Use --restart to crawl again from the beginning'
+        print(f'aw-api: error: {exc}', file=sys.stderr)
+        return 2
+    keys = read_keys(arguments.input, arguments.kind)
+
+    def progress(summary: CrawlSummary):
+        if not arguments.quiet:
+            finished = summary.done + summary.missing + len(summary.failed) + summary.skipped
+            print(f'{finished}/{len(keys)} finished, {summary.missing} missing, {len(summary.failed)} failed',
+                  file=sys.stderr)
+
+    async def run() -> CrawlSummary:
+        raw_cookies = _load_cookies(arguments.cookies)
+        client_settings = {'timeout': arguments.timeout, 'retry_policy': RetryPolicy(retries=arguments.retries),
+                           'connection_limit': arguments.concurrency}
+        if len(raw_cookies) > 1:
+            client_settings['account_pool'] = AccountPool(raw_cookies, rate=arguments.rate, burst=arguments.burst)
+        else:
+            client_settings['raw_cookie'] = raw_cookies[0] if raw_cookies else None
+            client_settings['rate_limiter'] = TokenBucket(arguments.rate, arguments.burst)
+        async with AIOClient(**client_settings) as client:
+            return await crawl(client, keys, arguments.kind, writer, checkpoint, GameMode[arguments.mode.upper()],
+                               arguments.concurrency, arguments.batch_size, progress)
+
+    try:
+        summary = asyncio.run(run())
+    except KeyboardInterrupt:
+        print('aw-api: interrupted, run the same command to continue', file=sys.stderr)
+        return 130
+    except NotAuthException as exc:
+        print(f'aw-api: error: {exc}, check cookies and run the same command to continue', file=sys.stderr)
+        return 1
+    finally:
+        writer.close()
+        checkpoint.close()
+
+    for key, exc in summary.failed:
+        print(f'aw-api: {key}: {exc!r}', file=sys.stderr)
+    if not arguments.quiet:
+        print(f'Looked up {summary.done}, missing {summary.missing}, failed {len(summary.failed)}, '
+              f'finished before {summary.skipped}. Results are in {arguments.output}', file=sys.stderr)
+    return 1 if summary.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,19 +26,40 @@ SOFTWARE.
 import requests
 import logging
 import warnings
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
 
-from .exceptions import BadHTTPStatusCode, BattalionSearchTooShortQuery, BattalionSearchBattalionNotFound
+from .exceptions import BadHTTPStatusCode, BattalionSearchBattalionNotFound, \
+    UserNotFoundException, UserHasClosedStatisticsException, BattalionNotFound, NotAuthException
 
 from .dataobjects import PlayerStatistics, BattalionMemberEntry, BattalionSearchResultEntry
 from .parser import Parser
-from .enums import GameMode
+from .cache import ResultCache
+from .store import PageStore
+from .instrumentation import Instrumentation
+from .search_index import BattalionSearchIndex
+from .accounts import Account, AccountPool
+from .ratelimit import TokenBucket, RetryPolicy
+from .enums import GameMode, VehicleType
+from .utils import as_completed_threaded
 
-from typing import Union, Dict, List, Optional
+from typing import Union, Dict, List, Optional, Callable, TypeVar, Iterable, Iterator, Tuple
 
 logger = logging.getLogger(__name__)
 
 __all__ = ['Client', 'API', 'AW']
 
+T = TypeVar('T')
+
+
+class _RejectCookiesPolicy(DefaultCookiePolicy):
+    # Keeps session cookie jar empty, cookies of account pool accounts are sent with every request instead
+    def set_ok(self, cookie, request):
+        return False
+
 
 class Client:
     """
@@ -47,23 +68,75 @@ class Client:
     Use AIOClient instead
 
     """
-    def __init__(self, raw_cookie: Optional[List[Dict]] = None):
+    def __init__(self, raw_cookie: Optional[List[Dict]] = None, parser_backend: str = 'auto',
+                 cache: Optional[ResultCache] = None, rate_limiter: Optional[TokenBucket] = None,
+                 retry_policy: Optional[RetryPolicy] = None, page_store: Optional[PageStore] = None,
+                 instrumentation: Optional[Instrumentation] = None, max_workers: int = 8,
+                 search_cache: Optional[ResultCache] = None, search_index: Optional[BattalionSearchIndex] = None,
+                 account_pool: Optional[AccountPool] = None):
         """
         :param raw_cookie :class:`Optional[Dict, List]`
          containing exported with "EditThisCookie" Chrome extension cookie from aw.mail.ru
+        :param parser_backend :class:`str` HTML backend used for parsing statistics pages,
+         one of "auto", "selectolax", "lxml" or "bs4"
+        :param cache :class:`Optional[ResultCache]` cache for player statistics lookups, disabled if None
+        :param rate_limiter :class:`Optional[TokenBucket]` limiter shared by all requests of the client
+        :param retry_policy :class:`Optional[RetryPolicy]` how to retry failed requests, requests are not retried if None
+        :param page_store :class:`Optional[PageStore]` persistent store of fetched pages, unchanged pages are
+         revalidated with conditional requests and are not parsed again. Disabled if None
+        :param instrumentation :class:`Optional[Instrumentation]` hooks called with timings of every request,
+         parse and cache lookup
+        :param max_workers :class:`int` number of threads used by bulk methods like :meth:`get_statistics_many`,
+         connection pool keeps the same number of connections per host
+        :param search_cache :class:`Optional[ResultCache]` cache for battalion search responses, disabled if None.
+         Pass ``ResultCache(negative_exceptions=(BattalionSearchBattalionNotFound,))`` to cache empty results as well
+        :param search_index :class:`Optional[BattalionSearchIndex]` index of found battalions used by
+         :meth:`autocomplete_battalion`, new empty index is created if None
+        :param account_pool :class:`Optional[AccountPool]` several accounts to spread requests across,
+         can not be used together with ``raw_cookie``
+
+        Client is thread-safe, one instance can be used from several threads.
+        Call :meth:`close` or use client as ``with Client(...) as client:`` when you are done.
         """
         warnings.warn('Synchronous client is deprecated and could be removed any time soon. Please Use AIOClient',
                       DeprecationWarning)
 
-        self.__parser: Parser = Parser()
+        if raw_cookie and account_pool is not None:
+            raise ValueError('Either raw_cookie or account_pool can be given, not both')
+        if max_workers < 1:
+            raise ValueError(f'Number of workers must be positive, {max_workers} was given')
+
+        # Parser backends keep reusable parser objects, so every thread gets own parser
+        self.__parser_backend = parser_backend
+        self.__local = threading.local()
+        self.__local.parser = Parser(parser_backend)
+        self.__cache: Optional[ResultCache] = cache
+        self.__rate_limiter: Optional[TokenBucket] = rate_limiter
+        self.__retry_policy: RetryPolicy = retry_policy if retry_policy is not None else RetryPolicy(retries=0)
+        self.__page_store: Optional[PageStore] = page_store
+        self.__instrumentation: Optional[Instrumentation] = instrumentation
+        self.__search_cache: Optional[ResultCache] = search_cache
+        self.__search_index: BattalionSearchIndex = search_index if search_index is not None \
+            else BattalionSearchIndex()
 
         # Base URL for player statistics
         self.__user_stats_url = 'https://arwar.ru/dynamic/user/?a=stats'
         # Base URL for battalion page
         self.__battalion_stats_url = 'https://arwar.ru/dynamic/aliance/index.php?a=index'
 
-        # Session that will contain cookies
+        # Session that will contain cookies, shared by all threads
         self.__session: requests.Session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_workers)
+        self.__session.mount('https://', adapter)
+        self.__session.mount('http://', adapter)
+        self.__account_pool: Optional[AccountPool] = account_pool
+        if account_pool is not None:
+            self.__session.cookies.set_policy(_RejectCookiesPolicy())
+
+        # Thread pool for bulk methods, created on first use
+        self.__max_workers = max_workers
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__executor_lock = threading.Lock()
         # Dict with cookies
         self.__cookie: Union[Dict, List, None] = None
 
@@ -72,6 +145,38 @@ class Client:
 
         logger.info(f'Initialized Client. Is with cookies: {raw_cookie is not None}')
 
+    @property
+    def __parser(self) -> Parser:
+        parser = getattr(self.__local, 'parser', None)
+        if parser is None:
+            parser = self.__local.parser = Parser(self.__parser_backend)
+        return parser
+
+    def __get_executor(self) -> ThreadPoolExecutor:
+        with self.__executor_lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.__max_workers,
+                                                     thread_name_prefix='aw_api-client')
+            return self.__executor
+
+    def close(self):
+        """
+        Shuts down thread pool and closes connections
+
+        versionadded:: 2.1
+        """
+        with self.__executor_lock:
+            if self.__executor is not None:
+                self.__executor.shutdown(wait=True)
+                self.__executor = None
+        self.__session.close()
+
+    def __enter__(self) -> 'Client':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     @staticmethod
     def __prepare_cookie(raw_cookie: Union[Dict, List]) -> Dict:
         """
@@ -85,23 +190,152 @@ class Client:
             new_cookie_dict[item['name']] = item['value']
         return new_cookie_dict
 
-    def __get_page(self, url: str) -> str:
+    def __request(self, method: str, url: str, account: Optional[Account] = None, **kwargs) -> requests.Response:
         """
-        :param url :class:`str` URL to retrieve.
+        Performs request respecting rate limiter and retrying it according to retry policy
+
+        versionadded:: 2.1
+
+        :raises :exc:`BadHTTPStatusCode` if request did not succeed after all retries
 
-        :return: :class:`str` That contains decoded HTML page
+        :param method: HTTP method
+        :param url: URL to request
+        :param account: Account of account pool to perform request on behalf of
+        :return: :class:`requests.Response` with 200 status code,
+         or 304 status code if conditional headers were given
         """
-        logger.info('Performing request to {0}'.format(url))
+        headers = kwargs.get('headers')
+        success_statuses = (200, 304) if headers else (200,)
+        attempt = 0
+        while True:
+            if self.__rate_limiter is not None:
+                self.__rate_limiter.wait()
+            if account is not None:
+                account.rate_limiter.wait()
+
+            logger.info('Performing request to {0}'.format(url))
+            recorder = self.__instrumentation.record_fetch(url, attempt, method) \
+                if self.__instrumentation is not None else None
+            try:
+                cookies = account.cookies if account is not None else self.__cookie
+                request = self.__session.request(method, url, cookies=cookies, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if recorder is not None:
+                    recorder.finish(exception=exc)
+                if not self.__retry_policy.can_retry(attempt):
+                    raise
+                delay = self.__retry_policy.delay(attempt)
+                logger.warning('Request to {0} failed: {1!r}. Retrying in {2:.2f}s'.format(url, exc, delay))
+            else:
+                if recorder is not None:
+                    # Body is already downloaded here, requests measures time until headers were parsed
+                    recorder.first_byte(request.status_code, request.elapsed.total_seconds())
+                if request.status_code in success_statuses:
+                    if self.__rate_limiter is not None:
+                        self.__rate_limiter.reward()
+                    if recorder is not None:
+                        recorder.finish(len(request.content))
+                    return request
+
+                if request.status_code == 429 and self.__rate_limiter is not None:
+                    self.__rate_limiter.penalize()
+                if request.status_code not in self.__retry_policy.retry_statuses or \
+                        not self.__retry_policy.can_retry(attempt):
+                    logger.error('Got non 200 status code on request to {0}. Status code: {1}'.format(
+                        url, request.status_code))
+                    exc = BadHTTPStatusCode(f'Got non 200 status code: {request.status_code}',
+                                            status_code=request.status_code)
+                    if recorder is not None:
+                        recorder.finish(exception=exc)
+                    raise exc
+                if recorder is not None:
+                    recorder.finish()
+                delay = self.__retry_policy.delay(attempt, request.headers.get('Retry-After'))
+                logger.warning('Got {0} status code on request to {1}. Retrying in {2:.2f}s'.format(
+                    request.status_code, url, delay))
+
+            time.sleep(delay)
+            attempt += 1
+
+    def __get_parsed(self, url: str, parse: Callable[..., T], *args) -> T:
+        """
+        Fetches page and parses it with ``parse(page, *args)``, reusing result stored in page store
+        if the page was not modified since it was parsed last time
+
+        versionadded:: 2.1
 
-        request = self.__session.get(url, cookies=self.__cookie)
-        if request.status_code == 200:
-            page = request.content.decode('utf-8')
-            return page
-        logger.error('Got non 200 status code on request to {0}. Status code: {1}'.format(url, request.status_code))
-        raise BadHTTPStatusCode(f'Got non 200 status code: {request.status_code}', status_code=request.status_code)
+        :param url: URL to retrieve
+        :param parse: Function that turns page into result
+        :return: Result of ``parse``
+        """
+        return self.__with_account(self.__get_parsed_as, url, parse, *args)
 
-    def __get_player_statistic_page(self, nickname: str, mode: int, data: int, tank_id: int, day: int = 0,
-                                    ajax: int = 0, maintype: int = 0) -> str:
+    def __with_account(self, func: Callable[..., T], *args) -> T:
+        """
+        Calls ``func(account, *args)`` with account of account pool, or with None if there is no pool.
+        Account that turns out to be not authenticated is quarantined and call is repeated with the next one
+
+        :return: Result of ``func``
+        """
+        if self.__account_pool is None:
+            return func(None, *args)
+
+        # Every attempt either succeeds or quarantines one more account, so there are at most that many attempts
+        for _ in range(len(self.__account_pool)):
+            account = self.__account_pool.acquire()
+            try:
+                return func(account, *args)
+            except NotAuthException:
+                self.__account_pool.quarantine(account)
+        raise NotAuthException('Every account in the pool is not authenticated on aw.mail.ru')
+
+    def __get_parsed_as(self, account: Optional[Account], url: str, parse: Callable[..., T], *args) -> T:
+        if self.__page_store is None:
+            return self.__parse(url, self.__request('GET', url, account).content, parse, *args)
+
+        parse_key = self.__page_store.parse_key(parse)
+        entry = self.__page_store.get(url)
+        if entry is not None and entry.parse_key != parse_key:
+            entry = None
+
+        request = self.__request('GET', url, account, headers=self.__page_store.conditional_headers(entry))
+        etag, last_modified = request.headers.get('ETag'), request.headers.get('Last-Modified')
+        if entry is not None and (request.status_code == 304 or
+                                  self.__page_store.hash_page(request.content) == entry.content_hash):
+            logger.info('Page {0} was not modified, using stored result'.format(url))
+            self.__page_store.touch(url, etag, last_modified)
+            return self.__page_store.load(entry)
+
+        parsed = self.__parse(url, request.content, parse, *args)
+        self.__page_store.put(url, request.content, etag, last_modified, parse_key, parsed)
+        return parsed
+
+    def __parse(self, url: str, page: bytes, parse: Callable[..., T], *args) -> T:
+        recorder = self.__instrumentation.record_parse(url, parse, in_event_loop=False) \
+            if self.__instrumentation is not None else None
+        if recorder is None:
+            return parse(page, *args)
+        try:
+            result = parse(page, *args)
+        except Exception as exc:
+            recorder.finish(exc)
+            raise
+        recorder.finish()
+        return result
+
+    def __get_cached(self, cache_key) -> Optional[PlayerStatistics]:
+        if self.__instrumentation is None:
+            return self.__cache.get(cache_key)
+        try:
+            cached = self.__cache.get(cache_key)
+        except Exception:
+            self.__instrumentation.record_cache(cache_key, 'negative_hit')
+            raise
+        self.__instrumentation.record_cache(cache_key, 'hit' if cached is not None else 'miss')
+        return cached
+
+    def __player_statistic_url(self, nickname: str, mode: int, data: int, tank_id: int, day: int = 0,
+                               ajax: int = 0, maintype: int = 0) -> str:
         """
         :param nickname: Nickname of user to find.
         :param mode: Game mode Number from 0 to 4 {pvp, pve, low, glops, ranked}.
@@ -111,13 +345,11 @@ class Client:
         :param ajax: Is data should be returned like in ajax request (DONT CHANGE IT OR WILL BROKE).
         :param maintype: In-game type of vehicle(0 all types, 1 - MBT, 2 - LT, 3 - TD, 4 - AFV)
 
-        :return: string with decoded HTML page
+        :return: URL of player statistics page
 
         """
 
-        url = f'{self.__user_stats_url}&name={nickname}&mode={mode}&data={data}&type={tank_id}&maintype={maintype}&day={day}&ajax={ajax}'
-        page = self.__get_page(url)
-        return page
+        return f'{self.__user_stats_url}&name={nickname}&mode={mode}&data={data}&type={tank_id}&maintype={maintype}&day={day}&ajax={ajax}'
 
     def get_battalion_players(self, battalion_id: int) -> List[BattalionMemberEntry]:
         """
@@ -127,24 +359,14 @@ class Client:
         :return: list of players in this battalion
         """
 
-        # TODO: Optimize that algorithm, so we would need to iterate over list two times here and in page parser method
-
-        page = self.__get_page(f'{self.__battalion_stats_url}&data={battalion_id}')
-        __temp_battalion_players = self.__parser.parse_battalion_players(page)
+        url = f'{self.__battalion_stats_url}&data={battalion_id}'
+        return self.__get_parsed(url, self.__parse_battalion_players, battalion_id)
 
-        battalion_players: List[BattalionMemberEntry] = []
-        for internal_dict_entry in __temp_battalion_players:
-            battalion_players.append(
-                BattalionMemberEntry(nickname=internal_dict_entry['nickname'],
-                                     id=internal_dict_entry['id'],
-                                     role=internal_dict_entry['role'],
-                                     battalion_id=battalion_id)
-            )
-
-        return battalion_players
+    def __parse_battalion_players(self, page: bytes, battalion_id: int) -> List[BattalionMemberEntry]:
+        return list(self.__parser.parse_battalion_players(page, battalion_id))
 
     def get_statistic_by_nickname(self, nickname, mode: Union[int, GameMode] = 0, player_id: int = 0, tank_id: int = 0,
-                                  day: int = 0) -> PlayerStatistics:
+                                  day: int = 0, vehicle_type: Union[int, VehicleType] = 0) -> PlayerStatistics:
         """
         Retrieves player statistics in mode on specified tank by given nickname or playerID
 
@@ -155,6 +377,9 @@ class Client:
         :param player_id: CSA ID of player to find(overwrites user nickname if not 0)
         :param tank_id: staticID of tank to find for(0 means overall stat for mode)
         :param day: Filter stats by some date/battle count
+        :param vehicle_type: Class of vehicles to find for, number from 0 to 4 {all, mbt, lt, td, afv}
+
+        versionchanged:: 2.1 Added vehicle_type argument
 
         :return: :class:`PlayerStatistics`
         """
@@ -162,13 +387,88 @@ class Client:
         # If GameMode instance was passed as a mode, than assign number from GameMode.value to mode variable
         if isinstance(mode, GameMode):
             mode = mode.value
-
-        # Get page
-        page = self.__get_player_statistic_page(nickname, mode, player_id, tank_id, day)
-        # Parse the page
-        parsed_data = self.__parser.parse_player_statistics(page, nickname)
+        if isinstance(vehicle_type, VehicleType):
+            vehicle_type = vehicle_type.value
+
+        cache_key = None
+        if self.__cache is not None:
+            cache_key = self.__cache.statistics_key(nickname, mode, player_id, tank_id, day, vehicle_type)
+            cached = self.__get_cached(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            # Get page and parse it
+            url = self.__player_statistic_url(nickname, mode, player_id, tank_id, day, maintype=vehicle_type)
+            parsed_data = self.__get_parsed(url, self.__parser.parse_player_statistics, nickname)
+        except Exception as exc:
+            if cache_key is not None:
+                self.__cache.set_exception(cache_key, exc)
+            raise
+
+        if cache_key is not None:
+            self.__cache.set(cache_key, parsed_data)
         return parsed_data
 
+    def get_statistics_many(self, nicknames: Iterable[str], mode: Union[int, GameMode] = 0, tank_id: int = 0,
+                            day: int = 0) -> Iterator[Tuple[str, Union[PlayerStatistics, Exception]]]:
+        """
+        Retrieves statistics of many players in ``max_workers`` threads.
+        Results are yielded as soon as each lookup finishes, so they may come in a different order than nicknames.
+
+        :exc:`UserNotFoundException` and :exc:`UserHasClosedStatisticsException` are yielded as values
+        instead of being raised, any other exception aborts the whole batch.
+
+        versionadded:: 2.1
+
+        :param nicknames: Nicknames of players to find
+        :param mode: Game mode Number from 0 to 4 {pvp, pve, low, glops, ranked}
+        :param tank_id: staticID of tank to find for(0 means overall stat for mode)
+        :param day: Filter stats by some date/battle count
+
+        :return: Iterator of ``(nickname, PlayerStatistics or exception)`` tuples
+        """
+
+        def lookup(nickname: str) -> Union[PlayerStatistics, Exception]:
+            try:
+                return self.get_statistic_by_nickname(nickname, mode, tank_id=tank_id, day=day)
+            except (UserNotFoundException, UserHasClosedStatisticsException) as exc:
+                return exc
+
+        yield from as_completed_threaded(lookup, nicknames, self.__get_executor(), self.__max_workers)
+
+    def get_battalions_many(self, battalion_ids: Iterable[int]
+                            ) -> Iterator[Tuple[int, Union[List[BattalionMemberEntry], Exception]]]:
+        """
+        Retrieves players of many battalions in ``max_workers`` threads.
+        Results are yielded as soon as each battalion is retrieved, so they may come in a different order.
+
+        :exc:`BattalionNotFound` is yielded as a value instead of being raised,
+        any other exception aborts the whole batch.
+
+        versionadded:: 2.1
+
+        :param battalion_ids: IDs of battalions
+        :return: Iterator of ``(battalion ID, list of players or exception)`` tuples
+        """
+
+        def lookup(battalion_id: int) -> Union[List[BattalionMemberEntry], Exception]:
+            try:
+                return self.get_battalion_players(battalion_id)
+            except BattalionNotFound as exc:
+                return exc
+
+        yield from as_completed_threaded(lookup, battalion_ids, self.__get_executor(), self.__max_workers)
+
+    @property
+    def cache(self) -> Optional[ResultCache]:
+        """
+        versionadded:: 2.1
+
+        :return: :class:`ResultCache` used by client or None if caching is disabled
+        """
+        return self.__cache
+
     def search_battalion(self, battalion_name: str) -> List[BattalionSearchResultEntry]:
         """
         Searches for battalion by given name
@@ -180,34 +480,69 @@ class Client:
         versionadded:: 1.1
 
 
+        versionchanged:: 2.1 Responses are cached in ``search_cache`` and found battalions are added to ``search_index``
+
         :param battalion_name:
         :return: :class:`List[BattalionSearchResultEntry]`
         List of BattalionSearchResultEntry dataclass instances
 
         """
-        import json
+        cache_key = None
+        if self.__search_cache is not None:
+            cache_key = self.__search_cache.search_key(battalion_name)
+            cached = self.__search_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+        try:
+            search_result = self.__with_account(self.__search_battalion_request, battalion_name)
+        except BattalionSearchBattalionNotFound as exc:
+            # Nothing starts with this name, so longer queries do not need the site either
+            self.__search_index.add((), query=battalion_name)
+            if cache_key is not None:
+                self.__search_cache.set_exception(cache_key, exc)
+            raise
+
+        self.__search_index.add(search_result, query=battalion_name)
+        if cache_key is not None:
+            self.__search_cache.set(cache_key, search_result)
+        return list(search_result)
+
+    def autocomplete_battalion(self, prefix: str, limit: Optional[int] = 10) -> List[BattalionSearchResultEntry]:
+        """
+        Finds battalions which names start with given prefix, case-insensitive.
+        Prefixes that were already searched for (or which beginning was) are answered from ``search_index``
+        without requests, prefixes shorter than 4 symbols are answered only from battalions found before
+
+        versionadded:: 2.1
+
+        :param prefix: Beginning of battalion name
+        :param limit: Maximum number of returned battalions, all of them if None
+        :return: :class:`List[BattalionSearchResultEntry]` sorted by name
+        """
+        if len(prefix) >= BattalionSearchIndex.MIN_QUERY_LENGTH and not self.__search_index.is_covered(prefix):
+            try:
+                self.search_battalion(prefix)
+            except BattalionSearchBattalionNotFound:
+                return []
+        return self.__search_index.search(prefix, limit)
+
+    @property
+    def search_index(self) -> BattalionSearchIndex:
+        """
+        versionadded:: 2.1
+
+        :return: :class:`BattalionSearchIndex` with every battalion found by client
+        """
+        return self.__search_index
 
-        r = self.__session.post(f'https://armata.my.games/dynamic/gamecenter/?a=clan_search',
-                                data={'name': battalion_name})
+    def __search_battalion_request(self, account: Optional[Account], battalion_name: str
+                                   ) -> List[BattalionSearchResultEntry]:
+        r = self.__request('POST', f'https://armata.my.games/dynamic/gamecenter/?a=clan_search', account,
+                           data={'name': battalion_name})
 
         if r.status_code == 200:
-            __dirty_content = json.loads(r.content.decode('utf-8'))
-            if __dirty_content['error'] == 0:
-                __battalions_search_result_data = __dirty_content['data']
-
-                search_result = []
-                for key in __battalions_search_result_data.keys():
-                    search_result.append(BattalionSearchResultEntry(__battalions_search_result_data[key], int(key)))
-                return search_result
-
-            if __dirty_content['error'] == 1:
-                raise BattalionSearchTooShortQuery(
-                    f'Given battalion name is too short for process.'
-                    f' 4 symbols required, {len(battalion_name)} were given',
-                    len(battalion_name))
-            if __dirty_content['error'] == 2:
-                raise BattalionSearchBattalionNotFound(f'Battalion with name "{battalion_name}"'
-                                                       f' was not found.', battalion_name)
+            return self.__parse(r.url, r.content, self.__parser.parse_battalion_search, battalion_name)
 
         raise BadHTTPStatusCode(f'Received not 200 status code', r.status_code)
 
@@ -1,2 +1,3 @@
 from .player import *
 from .battalion import *
+from .batch import *
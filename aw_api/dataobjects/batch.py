@@ -0,0 +1,265 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .player import PlayerStatistics, CompactPlayerStatistics
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ['PlayerStatisticsBatch']
+
+
+class PlayerStatisticsBatch:
+    """
+    Columnar container for a large number of :class:`PlayerStatistics`.
+
+    Every field is stored as a separate typed array (NumPy array if NumPy is installed,
+    :class:`array.array` otherwise), strings are kept in lists. Missing ``average_level`` is stored as NaN.
+    Aggregates are computed over whole columns without creating per-player objects.
+
+    versionadded:: 2.1
+    """
+    FLOAT_FIELDS = ('winrate', 'damage', 'average_spotting', 'average_kills', 'average_level')
+    INT_FIELDS = ('battles',)
+    STRING_FIELDS = ('clantag', 'battalion_full', 'nickname')
+
+    def __init__(self, columns: Dict[str, Sequence], use_numpy: Optional[bool] = None):
+        """
+        :param columns: Mapping of field name to sequence of values, all sequences must have the same length
+        :param use_numpy: Store columns in NumPy arrays. By default NumPy is used if it is installed
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if use_numpy and numpy is None:
+            raise ImportError('NumPy is not installed')
+        self.__use_numpy = use_numpy
+
+        lengths = {len(columns[field]) for field in self.FLOAT_FIELDS + self.INT_FIELDS + self.STRING_FIELDS}
+        if len(lengths) > 1:
+            raise ValueError('All columns must have the same length')
+
+        self.__columns = {}
+        for field in self.FLOAT_FIELDS:
+            values = [math.nan if value is None else value for value in columns[field]]
+            self.__columns[field] = numpy.array(values, dtype=numpy.float64) if use_numpy else array('d', values)
+        for field in self.INT_FIELDS:
+            values = columns[field]
+            self.__columns[field] = numpy.array(values, dtype=numpy.int64) if use_numpy else array('q', values)
+        for field in self.STRING_FIELDS:
+            self.__columns[field] = list(columns[field])
+
+    @classmethod
+    def from_statistics(cls, statistics: Iterable[PlayerStatistics],
+                        use_numpy: Optional[bool] = None) -> 'PlayerStatisticsBatch':
+        """
+        :param statistics: :class:`PlayerStatistics` or :class:`CompactPlayerStatistics` instances
+        :param use_numpy: Store columns in NumPy arrays. By default NumPy is used if it is installed
+        :return: :class:`PlayerStatisticsBatch` with given statistics
+        """
+        columns = {field: [] for field in cls.FLOAT_FIELDS + cls.INT_FIELDS + cls.STRING_FIELDS}
+        appenders = [(column.append, field) for field, column in columns.items()]
+        for item in statistics:
+            for append, field in appenders:
+                append(getattr(item, field))
+        return cls(columns, use_numpy)
+
+    def __len__(self):
+        return len(self.__columns['battles'])
+
+    def __getitem__(self, index: int) -> PlayerStatistics:
+        values = {field: column[index] for field, column in self.__columns.items()}
+        return self.__make_statistics(values)
+
+    def __iter__(self) -> Iterator[PlayerStatistics]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __make_statistics(self, values: Dict) -> PlayerStatistics:
+        for field in self.FLOAT_FIELDS:
+            values[field] = float(values[field])
+        values['battles'] = int(values['battles'])
+        if math.isnan(values['average_level']):
+            values['average_level'] = None
+        return PlayerStatistics(**values)
+
+    def to_statistics(self) -> List[PlayerStatistics]:
+        """
+        :return: List of :class:`PlayerStatistics`, one per player in the batch
+        """
+        return list(self)
+
+    def to_compact_statistics(self) -> List[CompactPlayerStatistics]:
+        """
+        :return: List of :class:`CompactPlayerStatistics`, one per player in the batch
+        """
+        return [CompactPlayerStatistics.from_statistics(statistics) for statistics in self]
+
+    def column(self, field: str) -> Sequence:
+        """
+        :param field: Name of :class:`PlayerStatistics` field
+        :return: Column with values of given field. Do not modify it
+        """
+        return self.__columns[field]
+
+    def played(self, min_battles: int = 1) -> 'PlayerStatisticsBatch':
+        """
+        :param min_battles: Minimal number of battles
+        :return: New batch with players that have at least ``min_battles`` battles
+        """
+        battles = self.__columns['battles']
+        if self.__use_numpy:
+            mask = battles >= min_battles
+            columns = {field: column[mask] if field not in self.STRING_FIELDS
+                       else [value for value, keep in zip(column, mask) if keep]
+                       for field, column in self.__columns.items()}
+        else:
+            indexes = [index for index, value in enumerate(battles) if value >= min_battles]
+            columns = {field: [column[index] for index in indexes] for field, column in self.__columns.items()}
+        return PlayerStatisticsBatch(columns, self.__use_numpy)
+
+    def mean(self, field: str) -> float:
+        """
+        :param field: Name of numeric field
+        :return: Mean of the field over players that have a value, NaN if there are no such players
+        """
+        values = self.__numeric_values(field)
+        if not len(values):
+            return math.nan
+        if self.__use_numpy:
+            return float(values.mean())
+        return math.fsum(values) / len(values)
+
+    def percentile(self, field: str, q: float) -> float:
+        """
+        Computes percentile with linear interpolation, the same way :func:`numpy.percentile` does by default
+
+        :param field: Name of numeric field
+        :param q: Percentile to compute, from 0 to 100
+        :return: Percentile of the field over players that have a value, NaN if there are no such players
+        """
+        if not 0 <= q <= 100:
+            raise ValueError(f'Percentile must be in range from 0 to 100, {q} was given')
+        values = self.__numeric_values(field)
+        if not len(values):
+            return math.nan
+        if self.__use_numpy:
+            return float(numpy.percentile(values, q))
+
+        values = sorted(values)
+        position = (len(values) - 1) * q / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+    def weighted_mean(self, field: str) -> float:
+        """
+        :param field: Name of numeric field
+        :return: Mean of the field weighted by number of battles, NaN if nobody has played
+        """
+        values = self.__columns[field]
+        battles = self.__columns['battles']
+        if self.__use_numpy:
+            known = ~numpy.isnan(values) if field in self.FLOAT_FIELDS else numpy.ones(len(values), dtype=bool)
+            total_battles = battles[known].sum()
+            return float((values[known] * battles[known]).sum() / total_battles) if total_battles else math.nan
+
+        pairs = [(value, weight) for value, weight in zip(values, battles) if not math.isnan(value)]
+        total_battles = sum(weight for _, weight in pairs)
+        return math.fsum(value * weight for value, weight in pairs) / total_battles if total_battles else math.nan
+
+    def __numeric_values(self, field: str):
+        if field in self.STRING_FIELDS:
+            raise ValueError(f'Field "{field}" is not numeric')
+        values = self.__columns[field]
+        if field not in self.FLOAT_FIELDS:
+            return values
+        if self.__use_numpy:
+            return values[~numpy.isnan(values)]
+        return [value for value in values if not math.isnan(value)]
+
+    @property
+    def total_battles(self) -> int:
+        """
+        :return: Sum of battles of all players
+        """
+        battles = self.__columns['battles']
+        return int(battles.sum() if self.__use_numpy else sum(battles))
+
+    def mean_winrate(self) -> float:
+        """
+        :return: Mean ``winrate``, see :meth:`mean`
+        """
+        return self.mean('winrate')
+
+    def percentile_winrate(self, q: float) -> float:
+        """
+        :param q: Percentile to compute, from 0 to 100
+        :return: Percentile of ``winrate``, see :meth:`percentile`
+        """
+        return self.percentile('winrate', q)
+
+    def mean_damage(self) -> float:
+        """
+        :return: Mean ``damage``, see :meth:`mean`
+        """
+        return self.mean('damage')
+
+    def percentile_damage(self, q: float) -> float:
+        """
+        :param q: Percentile to compute, from 0 to 100
+        :return: Percentile of ``damage``, see :meth:`percentile`
+        """
+        return self.percentile('damage', q)
+
+    def mean_spotting(self) -> float:
+        """
+        :return: Mean ``average_spotting``, see :meth:`mean`
+        """
+        return self.mean('average_spotting')
+
+    def percentile_spotting(self, q: float) -> float:
+        """
+        :param q: Percentile to compute, from 0 to 100
+        :return: Percentile of ``average_spotting``, see :meth:`percentile`
+        """
+        return self.percentile('average_spotting', q)
+
+    def mean_level(self) -> float:
+        """
+        :return: Mean ``average_level``, see :meth:`mean`
+        """
+        return self.mean('average_level')
+
+    def percentile_level(self, q: float) -> float:
+        """
+        :param q: Percentile to compute, from 0 to 100
+        :return: Percentile of ``average_level``, see :meth:`percentile`
+        """
+        return self.percentile('average_level', q)
@@ -24,7 +24,11 @@ SOFTWARE.
 """
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..enums import GameMode
+from .player import PlayerStatistics
+from .batch import PlayerStatisticsBatch
 
 
 @dataclass
@@ -101,3 +105,64 @@ class BattalionSearchResultEntry:
 
         """
         return isinstance(other, self.__class__) and self.id == other.id and self.full_name == other.full_name
+
+
+@dataclass
+class BattalionStatistics:
+    """
+
+    Dataclass with statistics of every battalion member. It contains four fields:
+
+    battalion_id :class:`int` - Unique ID of battalion.
+
+    members :class:`List[BattalionMemberEntry]` - Battalion members in roster order.
+
+    statistics :class:`Dict[Tuple[int, GameMode], PlayerStatistics]` - Statistics indexed by ``(member ID, mode)``.
+
+    errors :class:`Dict[Tuple[int, GameMode], Exception]` - :exc:`UserNotFoundException` or
+    :exc:`UserHasClosedStatisticsException` for lookups that failed, indexed the same way.
+
+    Statistics can be accessed like ``battalion_statistics[member.id, GameMode.PVP]``,
+    aggregates over the whole battalion are available through :meth:`batch`.
+
+    versionadded:: 2.1
+
+    """
+    battalion_id: int
+    members: List[BattalionMemberEntry]
+    statistics: Dict[Tuple[int, GameMode], PlayerStatistics]
+    errors: Dict[Tuple[int, GameMode], Exception]
+
+    def __getitem__(self, key: Tuple[int, Union[GameMode, int]]) -> PlayerStatistics:
+        member_id, mode = key
+        return self.statistics[member_id, GameMode(mode)]
+
+    def __len__(self):
+        return len(self.members)
+
+    @property
+    def modes(self) -> List[GameMode]:
+        """
+        :return: Game modes present in statistics
+        """
+        return list(dict.fromkeys(mode for _, mode in list(self.statistics) + list(self.errors)))
+
+    def member_statistics(self, member_id: int) -> Dict[GameMode, PlayerStatistics]:
+        """
+        :param member_id: ID of battalion member
+        :return: Statistics of the member by game mode
+        """
+        return {mode: statistics for (key, mode), statistics in self.statistics.items() if key == member_id}
+
+    def batch(self, mode: Union[GameMode, int] = GameMode.PVP, use_numpy: Optional[bool] = None
+              ) -> PlayerStatisticsBatch:
+        """
+        :param mode: Game mode to aggregate
+        :param use_numpy: Store columns in NumPy arrays. By default NumPy is used if it is installed
+        :return: :class:`PlayerStatisticsBatch` with statistics of members in given mode,
+         e.g. ``battalion_statistics.batch().played().mean_winrate()``
+        """
+        mode = GameMode(mode)
+        return PlayerStatisticsBatch.from_statistics(
+            (statistics for (_, key), statistics in self.statistics.items() if key is mode), use_numpy
+        )
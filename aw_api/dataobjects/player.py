@@ -23,7 +23,9 @@ SOFTWARE.
 
 """
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from ..enums import GameMode, VehicleType
 
 
 @dataclass
@@ -74,4 +76,220 @@ class PlayerStatistics:
                and other.nickname == self.nickname
 
 
+@dataclass(eq=False)
+class CompactPlayerStatistics:
+    """
+
+    Same as :class:`PlayerStatistics`, but stores fields in ``__slots__`` instead of per-instance ``__dict__``,
+    so one instance takes 144 bytes instead of 192, about 25% less memory.
+    Use it when you need to keep a lot of statistics in memory.
+
+    versionadded:: 2.1
+
+    """
+    __slots__ = ('winrate', 'battles', 'damage', 'clantag', 'battalion_full', 'average_spotting', 'average_kills',
+                 'average_level', 'nickname')
+
+    winrate: float
+    battles: int
+    damage: float
+    clantag: Optional[str]
+    battalion_full: Optional[str]
+    average_spotting: float
+    average_kills: float
+    average_level: Optional[float]
+    nickname: str
+
+    def __getitem__(self, item):
+        return getattr(self, item)
+
+    def __eq__(self, other):
+        return isinstance(other, CompactPlayerStatistics) and \
+               all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    @classmethod
+    def from_statistics(cls, statistics: PlayerStatistics) -> 'CompactPlayerStatistics':
+        """
+        :param statistics: :class:`PlayerStatistics` to convert
+        :return: :class:`CompactPlayerStatistics` with the same fields
+        """
+        return cls(*(getattr(statistics, field) for field in cls.__slots__))
+
+    def to_statistics(self) -> PlayerStatistics:
+        """
+        :return: :class:`PlayerStatistics` with the same fields
+        """
+        return PlayerStatistics(**{field: getattr(self, field) for field in self.__slots__})
+
+
+@dataclass
+class PlayerModesStatistics:
+    """
+
+    Dataclass with player statistics in every game mode. It contains two fields:
+
+    nickname :class:`str` - Proper spelling of player nickname.
+
+    modes :class:`Dict[GameMode, PlayerStatistics]` - Statistics of player in each game mode.
+    Modes player has never played are present as well and have zero battles.
+
+    Statistics can be accessed by game mode, ``snapshot[GameMode.PVE]`` is equal to ``snapshot[1]``
+
+    versionadded:: 2.1
+
+    """
+    nickname: str
+    modes: Dict[GameMode, PlayerStatistics]
+
+    def __getitem__(self, mode: Union[GameMode, int]) -> PlayerStatistics:
+        return self.modes[GameMode(mode)]
+
+    def __iter__(self) -> Iterator[GameMode]:
+        return iter(self.modes)
+
+    def __len__(self):
+        return len(self.modes)
+
+    @property
+    def played_modes(self) -> Dict[GameMode, PlayerStatistics]:
+        """
+        :return: Statistics only for modes with at least one battle
+        """
+        return {mode: statistics for mode, statistics in self.modes.items() if statistics.battles}
+
+    @property
+    def total_battles(self) -> int:
+        """
+        :return: Number of battles in all modes
+        """
+        return sum(statistics.battles for statistics in self.modes.values())
+
+
+@dataclass
+class VehicleStatisticsMatrix:
+    """
+
+    Dataclass with player statistics on several vehicles in several game modes. It contains two fields:
+
+    nickname :class:`str` - Proper spelling of player nickname.
+
+    statistics :class:`Dict[Tuple[Union[int, VehicleType], GameMode], PlayerStatistics]` - Statistics indexed by
+    ``(vehicle, mode)``, where vehicle is either tank staticID or :class:`VehicleType` for whole vehicle class.
+
+    Cells can be accessed like ``matrix[157, GameMode.PVP]`` or ``matrix[VehicleType.MBT, 0]``
+
+    versionadded:: 2.1
+
+    """
+    nickname: str
+    statistics: Dict[Tuple[Union[int, VehicleType], GameMode], PlayerStatistics]
+
+    def __getitem__(self, key: Tuple[Union[int, VehicleType], Union[GameMode, int]]) -> PlayerStatistics:
+        vehicle, mode = key
+        return self.statistics[vehicle, GameMode(mode)]
+
+    def __len__(self):
+        return len(self.statistics)
+
+    @property
+    def vehicles(self) -> List[Union[int, VehicleType]]:
+        """
+        :return: Tank IDs and vehicle classes present in the matrix
+        """
+        return list(dict.fromkeys(vehicle for vehicle, _ in self.statistics))
+
+    @property
+    def modes(self) -> List[GameMode]:
+        """
+        :return: Game modes present in the matrix
+        """
+        return list(dict.fromkeys(mode for _, mode in self.statistics))
+
+    def rows(self) -> Iterator[Tuple[Union[int, VehicleType], GameMode, PlayerStatistics]]:
+        """
+        :return: Iterator of ``(vehicle, mode, statistics)`` tuples
+        """
+        for (vehicle, mode), statistics in self.statistics.items():
+            yield vehicle, mode, statistics
+
+
+@dataclass
+class PlayerStatisticsDelta:
+    """
+
+    Dataclass with change of player statistics in one game mode between two refreshes. It contains fields:
+
+    nickname :class:`str` - Proper spelling of player nickname.
+
+    mode :class:`GameMode` - Game mode statistics belong to.
+
+    previous :class:`PlayerStatistics` - Statistics at the start of the interval.
+
+    current :class:`PlayerStatistics` - Statistics at the end of the interval.
+
+    interval :class:`float` - Seconds between refreshes.
+
+    Properties describe only battles played during the interval, e.g. ``winrate`` is a winrate over new battles.
+    They are None if no battles were played.
+
+    versionadded:: 2.1
+
+    """
+    nickname: str
+    mode: GameMode
+    previous: PlayerStatistics
+    current: PlayerStatistics
+    interval: float
+
+    @property
+    def new_battles(self) -> int:
+        """
+        :return: Number of battles played during the interval
+        """
+        return self.current.battles - self.previous.battles
+
+    def __interval_average(self, field: str) -> Optional[float]:
+        # Fields are averages over all battles, so totals are restored by multiplying them by number of battles
+        new_battles = self.new_battles
+        if new_battles <= 0:
+            return None
+        return (self.current[field] * self.current.battles - self.previous[field] * self.previous.battles) \
+            / new_battles
+
+    @property
+    def winrate(self) -> Optional[float]:
+        """
+        :return: Percent of battles won during the interval
+        """
+        return self.__interval_average('winrate')
+
+    @property
+    def damage(self) -> Optional[float]:
+        """
+        :return: Average damage in battles played during the interval
+        """
+        return self.__interval_average('damage')
+
+    @property
+    def average_spotting(self) -> Optional[float]:
+        """
+        :return: Average spotting damage in battles played during the interval
+        """
+        return self.__interval_average('average_spotting')
+
+    @property
+    def average_kills(self) -> Optional[float]:
+        """
+        :return: Average kills in battles played during the interval
+        """
+        return self.__interval_average('average_kills')
+
+    @property
+    def battles_per_day(self) -> float:
+        """
+        :return: Number of battles played during the interval, scaled to one day
+        """
+        return self.new_battles * 86400 / self.interval if self.interval > 0 else 0.0
+
+
 Player = PlayerStatistics
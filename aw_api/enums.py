@@ -33,3 +33,16 @@ class GameMode(Enum):
     GLOPS = 3
     RANKED = 4
     RB = RANKED
+
+
+class VehicleType(Enum):
+    """
+    In-game class of vehicle, used to filter player statistics by vehicle class
+
+    versionadded:: 2.1
+    """
+    ALL = 0
+    MBT = 1
+    LT = 2
+    TD = 3
+    AFV = 4
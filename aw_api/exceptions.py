@@ -57,6 +57,10 @@ class BattalionSearchTooShortQuery(BattalionSearchException):
         super().__init__(message)
         self.length = length_of_request
 
+    def __reduce__(self):
+        # Default pickling passes only the message to __init__, e.g. when raised in a process pool
+        return self.__class__, (*self.args, self.length)
+
 
 class BattalionSearchBattalionNotFound(BattalionSearchException):
     """
@@ -69,6 +73,9 @@ class BattalionSearchBattalionNotFound(BattalionSearchException):
         super().__init__(message)
         self.battalion_name = battalion_name
 
+    def __reduce__(self):
+        return self.__class__, (*self.args, self.battalion_name)
+
 
 class UserHasClosedStatisticsException(BaseAWStatsException):
     """Raises when requested user has closed stats"""
@@ -86,3 +93,6 @@ class BadHTTPStatusCode(BaseAWStatsException):
     def __init__(self, message, status_code):
         super().__init__(message)
         self.status_code = status_code
+
+    def __reduce__(self):
+        return self.__class__, (*self.args, self.status_code)
@@ -0,0 +1,379 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+import os
+import csv
+import json
+import asyncio
+import dataclasses
+import logging
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple, Type
+
+from .dataobjects import PlayerStatistics, CompactPlayerStatistics, BattalionMemberEntry, BattalionSearchResultEntry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+__all__ = ['ExportWriter', 'NDJSONWriter', 'CSVWriter', 'ParquetWriter', 'open_writer', 'export', 'export_async']
+
+logger = logging.getLogger()
+
+_EXPORTABLE = (PlayerStatistics, CompactPlayerStatistics, BattalionMemberEntry, BattalionSearchResultEntry)
+
+
+def _columns(cls: Type) -> List[dataclasses.Field]:
+    return list(dataclasses.fields(cls))
+
+
+class ExportWriter:
+    """
+    Writes stream of :class:`PlayerStatistics`, :class:`CompactPlayerStatistics`, :class:`BattalionMemberEntry`
+    or :class:`BattalionSearchResultEntry` to file in batches of at most ``batch_size`` items.
+    Only one batch is kept in memory, every full batch is written and flushed to disk,
+    so items exported before a crash are not lost.
+
+    Columns are fields of the first written item, all items must have the same type.
+
+    versionadded:: 2.1
+    """
+    extensions: Tuple[str, ...] = ()
+    # Whether written rows are readable before close and the file can be appended to, so export can be resumed
+    resumable = True
+
+    def __init__(self, path: str, batch_size: int = 1000, append: bool = False):
+        """
+        :param path: Path to output file
+        :param batch_size: Maximum number of items kept in memory before they are written
+        :param append: Append to existing file instead of overwriting it, e.g. to resume interrupted crawl
+        """
+        if batch_size < 1:
+            raise ValueError(f'Batch size must be positive, {batch_size} was given')
+        self.path = path
+        self.batch_size = batch_size
+        self.append = append
+        self.__item_type: Optional[Type] = None
+        self.__batch: List[Any] = []
+        self.__written = 0
+        self.__closed = False
+
+    @property
+    def written(self) -> int:
+        """
+        :return: Number of items written to disk
+        """
+        return self.__written
+
+    @property
+    def item_type(self) -> Optional[Type]:
+        """
+        :return: Type of exported items, None until the first item is written
+        """
+        return self.__item_type
+
+    def write(self, item: Any):
+        """
+        Adds item to current batch, batch is written when it is full
+
+        :param item: Item to export
+        """
+        if self.__closed:
+            raise ValueError('Writer is closed')
+        if self.__item_type is None:
+            if not isinstance(item, _EXPORTABLE):
+                raise TypeError(f'Objects of type {type(item).__name__} can not be exported')
+            self.__item_type = type(item)
+        elif type(item) is not self.__item_type:
+            raise TypeError(f'All exported objects must have the same type, {self.__item_type.__name__} '
+                            f'was expected, {type(item).__name__} was given')
+        self.__batch.append(item)
+        if len(self.__batch) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, items: Iterable[Any]) -> int:
+        """
+        :param items: Items to export
+        :return: Number of items given
+        """
+        count = 0
+        for item in items:
+            self.write(item)
+            count += 1
+        return count
+
+    async def write_async(self, items: AsyncIterable[Any]) -> int:
+        """
+        Exports items of async iterator. Full batches are written in default executor of the event loop,
+        so disk writes do not block other tasks
+
+        :param items: Async iterator of items to export
+        :return: Number of items given
+        """
+        loop = asyncio.get_running_loop()
+        count = 0
+        async for item in items:
+            if len(self.__batch) + 1 >= self.batch_size:
+                # The last item of the batch triggers write, perform it outside of event loop
+                await loop.run_in_executor(None, self.write, item)
+            else:
+                self.write(item)
+            count += 1
+        return count
+
+    def flush(self):
+        """
+        Writes current batch to disk
+        """
+        if not self.__batch:
+            return
+        batch, self.__batch = self.__batch, []
+        self._write_batch(batch)
+        self.__written += len(batch)
+        logger.debug('Exported {0} items to {1}'.format(self.__written, self.path))
+
+    def sync(self):
+        """
+        Writes current batch and makes sure written items reached the disk, not only OS buffers.
+        Call it before recording exported items as done somewhere else, e.g. in a checkpoint
+
+        :raises :exc:`ValueError` if writer is not :attr:`resumable`, so written items are not durable before close
+        """
+        if self.__closed:
+            raise ValueError('Writer is closed')
+        self.flush()
+        self._sync()
+
+    def close(self):
+        """
+        Writes the rest of items and closes file
+        """
+        if self.__closed:
+            return
+        self.flush()
+        self.__closed = True
+        self._close()
+
+    def __enter__(self) -> 'ExportWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_batch(self, batch: List[Any]):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def _sync(self):
+        pass
+
+
+class _TextWriter(ExportWriter):
+    """Base of writers of line-oriented text formats, file is opened on the first write"""
+
+    def __init__(self, path: str, batch_size: int = 1000, append: bool = False):
+        super().__init__(path, batch_size, append)
+        self._file = None
+
+    def _write_batch(self, batch: List[Any]):
+        if self._file is None:
+            existing = self.append and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+            self._file = open(self.path, 'a' if self.append else 'w', encoding='utf-8', newline='')
+            self._start(batch[0], existing)
+        self._write_rows(batch)
+        self._file.flush()
+
+    def _start(self, item: Any, existing: bool):
+        pass
+
+    def _write_rows(self, batch: List[Any]):
+        raise NotImplementedError
+
+    def _sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class NDJSONWriter(_TextWriter):
+    """
+    Writes one JSON object with fields of item per line. Uses orjson if it is installed
+
+    versionadded:: 2.1
+    """
+    extensions = ('.ndjson', '.jsonl')
+
+    def _write_rows(self, batch: List[Any]):
+        names = [column.name for column in _columns(type(batch[0]))]
+        if orjson is not None:
+            lines = [orjson.dumps({name: getattr(item, name) for name in names}).decode('utf-8') for item in batch]
+        else:
+            lines = [json.dumps({name: getattr(item, name) for name in names}, ensure_ascii=False) for item in batch]
+        lines.append('')
+        self._file.write('\n'.join(lines))
+
+
+class CSVWriter(_TextWriter):
+    """
+    Writes CSV with header row, None is written as empty cell.
+    When appending to non-empty file, header is not repeated
+
+    versionadded:: 2.1
+    """
+    extensions = ('.csv',)
+
+    def __init__(self, path: str, batch_size: int = 1000, append: bool = False):
+        super().__init__(path, batch_size, append)
+        self.__csv_writer = None
+        self.__names: List[str] = []
+
+    def _start(self, item: Any, existing: bool):
+        self.__names = [column.name for column in _columns(type(item))]
+        self.__csv_writer = csv.writer(self._file)
+        if not existing:
+            self.__csv_writer.writerow(self.__names)
+
+    def _write_rows(self, batch: List[Any]):
+        names = self.__names
+        self.__csv_writer.writerows([[getattr(item, name) for name in names] for item in batch])
+
+
+class ParquetWriter(ExportWriter):
+    """
+    Writes every batch as a row group of Parquet file, requires pyarrow.
+    Parquet file gets its footer on :meth:`close`, so file of interrupted export is not readable
+    and appending is not supported
+
+    versionadded:: 2.1
+    """
+    extensions = ('.parquet',)
+    resumable = False
+
+    def __init__(self, path: str, batch_size: int = 10000, append: bool = False):
+        if pyarrow is None:
+            raise ImportError('pyarrow is not installed')
+        if append:
+            raise ValueError('Parquet files can not be appended to')
+        super().__init__(path, batch_size, append)
+        self.__writer = None
+        self.__schema = None
+
+    @staticmethod
+    def __arrow_type(annotation) -> Any:
+        # Optional[X] is Union[X, None]
+        types = getattr(annotation, '__args__', (annotation,))
+        if float in types:
+            return pyarrow.float64()
+        if int in types:
+            return pyarrow.int64()
+        return pyarrow.string()
+
+    def _write_batch(self, batch: List[Any]):
+        columns = _columns(type(batch[0]))
+        if self.__writer is None:
+            self.__schema = pyarrow.schema([(column.name, self.__arrow_type(column.type)) for column in columns])
+            self.__writer = pyarrow.parquet.ParquetWriter(self.path, self.__schema)
+        table = pyarrow.Table.from_pydict(
+            {column.name: [getattr(item, column.name) for item in batch] for column in columns}, schema=self.__schema)
+        self.__writer.write_table(table)
+
+    def _sync(self):
+        raise ValueError('Parquet file is not readable until it is closed, written rows can not be synced')
+
+    def _close(self):
+        if self.__writer is not None:
+            self.__writer.close()
+
+
+_WRITERS: Dict[str, Type[ExportWriter]] = {'ndjson': NDJSONWriter, 'csv': CSVWriter, 'parquet': ParquetWriter}
+
+
+def open_writer(path: str, format: Optional[str] = None, batch_size: Optional[int] = None,
+                append: bool = False) -> ExportWriter:
+    """
+    versionadded:: 2.1
+
+    :param path: Path to output file
+    :param format: One of "ndjson", "csv" or "parquet", guessed by file extension if None
+    :param batch_size: Maximum number of items kept in memory, default of the writer if None
+    :param append: Append to existing file instead of overwriting it
+    :return: :class:`ExportWriter` for given format
+    """
+    if format is None:
+        extension = os.path.splitext(path)[1].lower()
+        format = next((name for name, writer in _WRITERS.items() if extension in writer.extensions), None)
+        if format is None:
+            raise ValueError(f'Can not guess export format by extension "{extension}", give format explicitly')
+    if format not in _WRITERS:
+        raise ValueError(f'Unknown export format "{format}", use one of {", ".join(_WRITERS)}')
+
+    kwargs = {'append': append}
+    if batch_size is not None:
+        kwargs['batch_size'] = batch_size
+    return _WRITERS[format](path, **kwargs)
+
+
+def export(items: Iterable[Any], path: str, format: Optional[str] = None, batch_size: Optional[int] = None,
+           append: bool = False) -> int:
+    """
+    Writes items to file in bounded-size batches, see :func:`open_writer` for parameters
+
+    versionadded:: 2.1
+
+    :param items: :class:`PlayerStatistics`, :class:`BattalionMemberEntry` or other exportable items
+    :return: Number of exported items
+    """
+    with open_writer(path, format, batch_size, append) as writer:
+        return writer.write_many(items)
+
+
+async def export_async(items: AsyncIterable[Any], path: str, format: Optional[str] = None,
+                       batch_size: Optional[int] = None, append: bool = False) -> int:
+    """
+    Writes items of async iterator to file in bounded-size batches, see :func:`open_writer` for parameters.
+    E.g. ``await export_async(client.iter_battalion_players(1305), 'roster.csv')``
+
+    versionadded:: 2.1
+
+    :param items: Async iterator of :class:`PlayerStatistics`, :class:`BattalionMemberEntry`
+     or other exportable items
+    :return: Number of exported items
+    """
+    writer = open_writer(path, format, batch_size, append)
+    try:
+        return await writer.write_async(items)
+    finally:
+        # The last partial batch is small, it is fine to write it in the event loop
+        writer.close()
@@ -0,0 +1,263 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['Instrumentation', 'FetchEvent', 'ParseEvent', 'CacheEvent']
+
+
+@dataclass
+class FetchEvent:
+    """
+
+    Dataclass describing one HTTP request attempt. It contains fields:
+
+    url :class:`str` - Requested URL.
+
+    method :class:`str` - HTTP method.
+
+    attempt :class:`int` - Number of retries performed before this attempt.
+
+    status :class:`Optional[int]` - HTTP status code, None if no response was received.
+
+    bytes_received :class:`int` - Size of received body, 0 if body was not read completely.
+
+    time_to_first_byte :class:`Optional[float]` - Seconds until response headers were received.
+
+    elapsed :class:`float` - Seconds the whole attempt took, including reading the body.
+
+    exception :class:`Optional[BaseException]` - Exception the attempt ended with, None if it succeeded.
+
+    versionadded:: 2.1
+
+    """
+    url: str
+    method: str
+    attempt: int
+    status: Optional[int]
+    bytes_received: int
+    time_to_first_byte: Optional[float]
+    elapsed: float
+    exception: Optional[BaseException]
+
+
+@dataclass
+class ParseEvent:
+    """
+
+    Dataclass describing parsing of one page. It contains fields:
+
+    url :class:`str` - URL of the page.
+
+    parser :class:`str` - Name of function that parsed the page.
+
+    elapsed :class:`float` - Seconds parsing took.
+
+    in_event_loop :class:`bool` - True if page was parsed right in the event loop, blocking it.
+
+    exception :class:`Optional[BaseException]` - Exception parser raised, e.g. :exc:`UserNotFoundException`.
+
+    versionadded:: 2.1
+
+    """
+    url: str
+    parser: str
+    elapsed: float
+    in_event_loop: bool
+    exception: Optional[BaseException]
+
+
+@dataclass
+class CacheEvent:
+    """
+
+    Dataclass describing one :class:`ResultCache` lookup. It contains fields:
+
+    key :class:`Hashable` - Cache key.
+
+    result :class:`str` - One of "hit", "negative_hit" (cached exception was raised) or "miss".
+
+    versionadded:: 2.1
+
+    """
+    key: Hashable
+    result: str
+
+
+class _FetchRecorder:
+    __slots__ = ('instrumentation', 'url', 'method', 'attempt', 'started_at', 'status', 'time_to_first_byte')
+
+    def __init__(self, instrumentation: 'Instrumentation', url: str, method: str, attempt: int):
+        self.instrumentation = instrumentation
+        self.url = url
+        self.method = method
+        self.attempt = attempt
+        self.started_at = time.perf_counter()
+        self.status: Optional[int] = None
+        self.time_to_first_byte: Optional[float] = None
+
+    def first_byte(self, status: int, time_to_first_byte: Optional[float] = None):
+        self.status = status
+        self.time_to_first_byte = time_to_first_byte if time_to_first_byte is not None \
+            else time.perf_counter() - self.started_at
+
+    def finish(self, bytes_received: int = 0, exception: Optional[BaseException] = None):
+        event = FetchEvent(self.url, self.method, self.attempt, self.status, bytes_received, self.time_to_first_byte,
+                           time.perf_counter() - self.started_at, exception)
+        self.instrumentation._emit(self.instrumentation.fetch_hooks, event)
+
+
+class _ParseRecorder:
+    __slots__ = ('instrumentation', 'url', 'parser', 'in_event_loop', 'started_at')
+
+    def __init__(self, instrumentation: 'Instrumentation', url: str, parse: Callable, in_event_loop: bool):
+        self.instrumentation = instrumentation
+        self.url = url
+        self.parser = getattr(parse, '__qualname__', repr(parse))
+        self.in_event_loop = in_event_loop
+        self.started_at = time.perf_counter()
+
+    def finish(self, exception: Optional[BaseException] = None):
+        instrumentation = self.instrumentation
+        event = ParseEvent(self.url, self.parser, time.perf_counter() - self.started_at, self.in_event_loop, exception)
+        instrumentation._emit(instrumentation.parse_hooks, event)
+        if self.in_event_loop and event.elapsed > instrumentation.slow_parse_threshold:
+            instrumentation._emit(instrumentation.slow_parse_hooks, event)
+
+
+class Instrumentation:
+    """
+    Collects hooks that are called on every request, parse and cache lookup performed by clients.
+
+    Hooks are plain functions receiving :class:`FetchEvent`, :class:`ParseEvent` or :class:`CacheEvent`.
+    They are called synchronously, so they should be fast, exceptions raised by hooks are logged and ignored.
+    Nothing is measured for kinds of events that have no hooks, so unused instrumentation costs next to nothing.
+
+    Example::
+
+        instrumentation = Instrumentation(slow_parse_threshold=0.02)
+
+        @instrumentation.add_slow_parse_hook
+        def report(event):
+            print(f'{event.url} blocked event loop for {event.elapsed:.3f}s')
+
+        client = AIOClient(instrumentation=instrumentation)
+
+    versionadded:: 2.1
+    """
+
+    def __init__(self, slow_parse_threshold: float = 0.05):
+        """
+        :param slow_parse_threshold: Parses that block event loop for longer than that many seconds
+         are reported to slow parse hooks
+        """
+        self.slow_parse_threshold = slow_parse_threshold
+        self.fetch_hooks: List[Callable[[FetchEvent], Any]] = []
+        self.parse_hooks: List[Callable[[ParseEvent], Any]] = []
+        self.slow_parse_hooks: List[Callable[[ParseEvent], Any]] = []
+        self.cache_hooks: List[Callable[[CacheEvent], Any]] = []
+
+    def add_fetch_hook(self, hook: Callable[[FetchEvent], Any]) -> Callable[[FetchEvent], Any]:
+        """
+        :param hook: Function called after every request attempt
+        :return: The same hook, so method can be used as decorator
+        """
+        self.fetch_hooks.append(hook)
+        return hook
+
+    def add_parse_hook(self, hook: Callable[[ParseEvent], Any]) -> Callable[[ParseEvent], Any]:
+        """
+        :param hook: Function called after every parse
+        :return: The same hook, so method can be used as decorator
+        """
+        self.parse_hooks.append(hook)
+        return hook
+
+    def add_slow_parse_hook(self, hook: Callable[[ParseEvent], Any]) -> Callable[[ParseEvent], Any]:
+        """
+        :param hook: Function called after parse blocked event loop for longer than ``slow_parse_threshold``
+        :return: The same hook, so method can be used as decorator
+        """
+        self.slow_parse_hooks.append(hook)
+        return hook
+
+    def add_cache_hook(self, hook: Callable[[CacheEvent], Any]) -> Callable[[CacheEvent], Any]:
+        """
+        :param hook: Function called after every cache lookup
+        :return: The same hook, so method can be used as decorator
+        """
+        self.cache_hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook: Callable):
+        """
+        :param hook: Previously added hook of any kind
+        """
+        for hooks in (self.fetch_hooks, self.parse_hooks, self.slow_parse_hooks, self.cache_hooks):
+            if hook in hooks:
+                hooks.remove(hook)
+
+    def record_fetch(self, url: str, attempt: int = 0, method: str = 'GET') -> Optional[_FetchRecorder]:
+        """
+        Starts measuring request attempt
+
+        :return: Recorder that emits :class:`FetchEvent` when finished, None if there are no fetch hooks
+        """
+        if not self.fetch_hooks:
+            return None
+        return _FetchRecorder(self, url, method, attempt)
+
+    def record_parse(self, url: str, parse: Callable, in_event_loop: bool) -> Optional[_ParseRecorder]:
+        """
+        Starts measuring parse
+
+        :return: Recorder that emits :class:`ParseEvent` when finished, None if there are no hooks interested in it
+        """
+        if not self.parse_hooks and not (in_event_loop and self.slow_parse_hooks):
+            return None
+        return _ParseRecorder(self, url, parse, in_event_loop)
+
+    def record_cache(self, key: Hashable, result: str):
+        """
+        Emits :class:`CacheEvent`
+
+        :param key: Cache key
+        :param result: One of "hit", "negative_hit" or "miss"
+        """
+        if self.cache_hooks:
+            self._emit(self.cache_hooks, CacheEvent(key, result))
+
+    @staticmethod
+    def _emit(hooks: List[Callable], event: Any):
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception:
+                logger.exception('Instrumentation hook {0!r} failed'.format(hook))
@@ -24,12 +24,21 @@ SOFTWARE.
 """
 
 from .dataobjects.player import PlayerStatistics
-from .exceptions import NotAuthException, UserNotFoundException, UserHasClosedStatisticsException, BattalionNotFound
+from .dataobjects.battalion import BattalionMemberEntry, BattalionSearchResultEntry
+from .exceptions import NotAuthException, UserNotFoundException, UserHasClosedStatisticsException, BattalionNotFound, \
+    BattalionSearchException, BattalionSearchTooShortQuery, BattalionSearchBattalionNotFound
+from .backends import HTMLBackend, get_backend
 
 import re
+import html
+import json
 import logging
-from bs4 import BeautifulSoup, Tag
-from typing import List
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 __all__ = ['Parser']
 
@@ -44,11 +53,11 @@ class Helper:
         return cleantext
 
     @classmethod
-    def extract_battles_per_level(cls, level_stats: List[Tag]) -> List[int]:
+    def extract_battles_per_level(cls, level_stats: List[Any], backend: HTMLBackend) -> List[int]:
         battles = []
         for item in level_stats:
-            children = list(item.children)
-            battles.append(int(cls.clean_html(str(children[-2]))))
+            children = backend.contents(item)
+            battles.append(int(backend.text(children[-2])))
         return battles
 
     @staticmethod
@@ -65,49 +74,122 @@ class Parser:
         '<p>Для просмотра данной страницы вам необходимо авторизоваться или <a href="/user/register/">зарегистрироваться</a> на сайте.</p>',
         '<p>Для просмотра данной страницы вам необходимо авторизоваться или <a href="" onclick="__GEM.showSignup();return false;" target="_blank">зарегистрироваться</a> на сайте.</p>'
     ]
-    __NOT_AUTH_CHECK_BATTALION = '<div class="node_notice warn border">Необходимо авторизоваться.</div>'
+    # Container of player statistics, pages that have it are not error pages
+    __PROFILE_MARK = 'id="profile_main_cont"'
+    # Precompiled patterns for battalion roster, roster page is read without building DOM
+    __P_TAG = re.compile(r'<p(?=[\s/>])', re.IGNORECASE)
+    __DIV_TAG = re.compile(r'<(/?)div(?=[\s/>])([^>]*)>', re.IGNORECASE)
+    __CONT_CLASS = re.compile(r'''\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+    __NOT_AUTH_DIV = re.compile(r'''<div\s+class\s*=\s*(["'])node_notice warn border\1\s*>Необходимо авторизоваться\.</div>''')
+    __ROSTER_ENTRY = re.compile(
+        r'<div>\s*<a\s+(?:[^>]*?\s)?href\s*=\s*"/user/stats\?data=(\d+)"[^>]*>(.*?)</a>'
+        r'\s*<br\s*/?>\s*<span>(.*?)</span>\s*</div>',
+        re.DOTALL
+    )
     # Div with text shows that user closed his statistics
     __CLOSED_STAT = '<div class="node_notice warn border">Пользователь закрыл доступ!</div>'
     # Div with text shows that player with given nickname does not exist
     __PLAYER_NOT_EXISTS = '<div class="node_notice warn border">Пользователь не найден!</div>'
     __HELPER = Helper()
 
-    def parse_player_statistics(self, page: str, nickname=None) -> PlayerStatistics:
+    def __init__(self, backend: str = 'auto'):
+        """
+        :param backend: HTML backend used for player statistics pages.
+         One of "auto", "selectolax", "lxml" or "bs4". "auto" picks the fastest installed one,
+         every backend returns identical results.
+
+        versionchanged:: 2.1 Added backend argument
+        """
+        self.__backend: HTMLBackend = get_backend(backend)
+
+    @property
+    def backend(self) -> str:
+        """
+        versionadded:: 2.1
+
+        :return: Name of HTML backend used by this parser
+        """
+        return self.__backend.name
+
+    def __reduce__(self):
+        # Backends hold compiled queries that can not be pickled, so parser is recreated by backend name
+        return self.__class__, (self.backend,)
+
+    def check_player_statistics_head(self, head: str, nickname=None) -> bool:
         """
-        :param page: string with HTML document
+        Looks for error notices in the beginning of player statistics page, so page download can be aborted early.
+        Uses the same checks as :meth:`parse_player_statistics`
+
+        versionadded:: 2.1
+
+        :raises :exc:`UserHasClosedStatisticsException`, :exc:`NotAuthException`,:exc:`UserNotFoundException`
+
+        :param head: Beginning of HTML document
+        :return: True if head is enough to tell that page is not an error page,
+         False if more of the page is needed to decide. Either way page still has to be parsed
+        """
+        paragraph = self.__P_TAG.search(head)
+        if paragraph is None:
+            # Without paragraphs, the first div is checked for "not found" and "closed" notices
+            first_div = self.__nth_div_start(head, 1)
+            if first_div is None:
+                return False
+            if head.startswith(self.__PLAYER_NOT_EXISTS, first_div):
+                logger.warning('Player {} was not found'.format(nickname))
+                raise UserNotFoundException(f'User {nickname} nickname was not found', nickname=nickname)
+            if head.startswith(self.__CLOSED_STAT, first_div):
+                logger.warning('Player {} has closed his statistics'.format(nickname))
+                raise UserHasClosedStatisticsException(f'{nickname} closed his stats', nickname=nickname)
+            # Not authenticated notice is a paragraph that may come later, unless statistics themselves have started
+            return self.__PROFILE_MARK in head
+
+        paragraph_end = head.find('</p>', paragraph.start())
+        if paragraph_end == -1:
+            return self.__PROFILE_MARK in head
+        if head[paragraph.start():paragraph_end + 4] in self.__NOT_AUTH_CHECK:
+            logger.error('Error on parsing page: Client is not authenticated')
+            raise NotAuthException('I am not authenticated on aw.mail.ru')
+        return True
+
+    def parse_player_statistics(self, page: Union[str, bytes], nickname=None) -> PlayerStatistics:
+        """
+        :param page: string or UTF-8 encoded bytes with HTML document
+
+        versionchanged:: 2.1 Accepts bytes
 
         :return: `PlayerStatistics` instance
         """
+        backend = self.__backend
 
         # Let's parse the page
-        page_parser = BeautifulSoup(page, "html.parser")
+        page_parser = backend.parse(page)
 
         # Get page "notifications" and look for error messages
-        notifications = list(page_parser.find_all('p'))
+        notifications = backend.find_all(page_parser, 'p')
 
         if not notifications:
-            notifications = page_parser.find_all('div')
-        notifications = list(notifications)
+            notifications = backend.find_all(page_parser, 'div')
+        first_notification = backend.outer_html(notifications[0])
 
         # Check if we authenticated (if not, then notifications[0] will be equal to one of items in NOT_AUTH_CHECK )
-        if str(notifications[0]) in self.__NOT_AUTH_CHECK:
+        if first_notification in self.__NOT_AUTH_CHECK:
             logger.error('Error on parsing page: Client is not authenticated')
             raise NotAuthException('I am not authenticated on aw.mail.ru')
 
         # Check if user exists( if user does not exist, then notifications[0] will be equal to PLAYER_NOT_EXISTS )
-        if self.__PLAYER_NOT_EXISTS == str(notifications[0]):
+        if self.__PLAYER_NOT_EXISTS == first_notification:
             logger.warning('Player {} was not found'.format(nickname))
             raise UserNotFoundException(f'User {nickname} nickname was not found', nickname=nickname)
 
         # Check did user closed stats
-        if '<div class="node_notice warn border">Пользователь закрыл доступ!</div>' == str(notifications[0]):
+        if self.__CLOSED_STAT == first_notification:
             logger.warning('Player {} has closed his statistics'.format(nickname))
             raise UserHasClosedStatisticsException(f'{nickname} closed his stats', nickname=nickname)
 
         # There is no errors, so go ahead and parse page for information
-        nickname = self.__HELPER.clean_html(str(page_parser.find("div", {"class": "name"}))).split('\n')[1]
-        __battalion_info_dirty = page_parser.find('div', {'class': 'clan'})
-        __battalion_tag_and_fullname_dirty = str(__battalion_info_dirty.contents[3]).split()
+        nickname = backend.text(backend.find(page_parser, 'div', 'name')).split('\n')[1]
+        __battalion_info_dirty = backend.find(page_parser, 'div', 'clan')
+        __battalion_tag_and_fullname_dirty = backend.outer_html(backend.contents(__battalion_info_dirty)[3]).split()
         battalion_tag = __battalion_tag_and_fullname_dirty[0].replace('<span>', '').replace('[', '').replace(']', '')
         battalion_full_name = __battalion_tag_and_fullname_dirty[1].replace('</span>', '').replace('[', '').replace(']',
                                                                                                                     '')
@@ -116,12 +198,12 @@ class Parser:
             battalion_tag = None
             battalion_full_name = None
 
-        __battles_played_dirty = str(page_parser.find("div", {"class": "total"}))
-        __battles_played_dirty = self.__HELPER.clean_html(__battles_played_dirty).split()[-1].replace('сыграно', '')
+        __battles_played_dirty = backend.text(backend.find(page_parser, 'div', 'total'))
+        __battles_played_dirty = __battles_played_dirty.split()[-1].replace('сыграно', '')
         battles_played: int = int(__battles_played_dirty) if __battles_played_dirty else 0
 
-        __average_damage_data = page_parser.findAll("div", {"class": "list_pad"})
-        __clean_html = self.__HELPER.clean_html(str(__average_damage_data[3]))
+        __average_damage_data = backend.find_all(page_parser, 'div', 'list_pad')
+        __clean_html = backend.text(__average_damage_data[3])
         __parsed_data = __clean_html.split('\n')
 
         average_damage = __parsed_data[4]
@@ -130,20 +212,19 @@ class Parser:
         overall_spotting_damage = __parsed_data[6].split()[2].replace('разведданным', '')
         overall_spotting_damage = float(overall_spotting_damage) if overall_spotting_damage else 0.0
 
-        __kills_info_dirty = page_parser.find('div', {'id': 'profile_main_cont'}).find('div', {'class': 'game_stats2'})
-        __average_kills_info_dirty = __kills_info_dirty.find('div', {'class': 'list_pad'}).find_all('div')
-        __clean_average_kills_info = self.__HELPER.clean_html(str(__average_kills_info_dirty[2]))
+        __kills_info_dirty = backend.find(backend.find(page_parser, 'div', id_='profile_main_cont'), 'div', 'game_stats2')
+        __average_kills_info_dirty = backend.find_all(backend.find(__kills_info_dirty, 'div', 'list_pad'), 'div')
+        __clean_average_kills_info = backend.text(__average_kills_info_dirty[2])
         average_kills = __clean_average_kills_info.split()[-1][3::]
         average_kills = float(average_kills) if average_kills else 0.0
 
-        winrate = str(page_parser.find("span", {"class": "yellow"}))
-        winrate = self.__HELPER.clean_html(winrate)
+        winrate = backend.text(backend.find(page_parser, 'span', 'yellow'))
 
-        levels_data = page_parser.find('div', {'class': 'game_stats3'})
-        if levels_data:
-            __level_data_dirty = list(levels_data.find('div', {'class': 'diag_pad'}).children)
-            __levels_data_dirty_tags: List[Tag] = [item for item in __level_data_dirty if item != '\n']
-            levels = self.__HELPER.extract_battles_per_level(__levels_data_dirty_tags)
+        levels_data = backend.find(page_parser, 'div', 'game_stats3')
+        if levels_data is not None:
+            __level_data_dirty = backend.contents(backend.find(levels_data, 'div', 'diag_pad'))
+            __levels_data_dirty_tags = [item for item in __level_data_dirty if item != '\n']
+            levels = self.__HELPER.extract_battles_per_level(__levels_data_dirty_tags, backend)
             average_level = self.__HELPER.calculate_level_sum(levels) / battles_played if battles_played else None
         else:
             average_level = None
@@ -156,15 +237,22 @@ class Parser:
                                    'average_level': average_level,
                                    'nickname': nickname})
 
-    def parse_battalion_players(self, page: str):
-        # TODO Complete doc-string
+    def parse_battalion_players(self, page: Union[str, bytes], battalion_id: int = 0
+                                ) -> Iterator[BattalionMemberEntry]:
         """
-        This is fucking hell, get outta here if you dont want to burn your eyes
-        I warned you
-        :param page:
-        :return:
+        Reads battalion roster straight from the page text with precompiled patterns, without building DOM.
+        Players are yielded one by one while the roster is being read,
+        so errors are raised on the first iteration.
+
+        versionchanged:: 2.1 Yields :class:`BattalionMemberEntry` instead of returning list of dicts,
+        page is not parsed with BeautifulSoup anymore and HTML entities in nicknames are unescaped
+
+        :param page: string or UTF-8 encoded bytes with HTML document
+        :param battalion_id: ID of battalion, stored in every yielded entry
+        :return: Iterator of :class:`BattalionMemberEntry`
         """
-        soup = BeautifulSoup(page, 'html.parser')
+        if isinstance(page, bytes):
+            page = page.decode('utf-8')
 
         # So, if battalion with given id does not exist
         # then instead of HTML page we will receive JSON, telling browser to redirect on battalion rating page
@@ -172,46 +260,93 @@ class Parser:
             logger.warning('Battalion with given ID was not found')
             raise BattalionNotFound("Battalion with given ID was not found")
 
-        # Get page "notifications" and look for error messages
-        notifications = list(soup.find_all('p'))
-        if not notifications:
-            notifications = soup.find_all('div')
-        notifications = list(notifications)
+        # Page "notifications" are paragraphs, or divs if there are no paragraphs at all.
+        # If we are not authenticated, the second div is a notice telling us to log in
+        if not self.__P_TAG.search(page):
+            second_div = self.__nth_div_start(page, 2)
+            if second_div is not None and self.__NOT_AUTH_DIV.match(page, second_div):
+                logger.error('Error on parsing page: Client is not authenticated')
+                raise NotAuthException('I am not authenticated on aw.mail.ru')
+
+        # Players are listed in the first <div class="cont">, every player is a line like
+        # <div><a href="/user/stats?data=458829630">T57Heavy-Tank</a><br/><span>Рядовой</span></div>
+        start, end = self.__roster_bounds(page)
+        for match in self.__ROSTER_ENTRY.finditer(page, start, end):
+            player_id, nickname, battalion_role = match.groups()
+            yield BattalionMemberEntry(nickname=html.unescape(nickname), id=int(player_id),
+                                       role=html.unescape(battalion_role), battalion_id=battalion_id)
+
+    def parse_battalion_search(self, content: Union[str, bytes], battalion_name: str
+                               ) -> List[BattalionSearchResultEntry]:
+        """
+        Decodes JSON response of battalion search, with orjson if it is installed
 
-        # Check if we authenticated (if not, then notifications[1] will be equal to __NOT_AUTH_CHECK_BATTALION )
-        if self.__NOT_AUTH_CHECK_BATTALION == str(notifications[1]):
-            logger.error('Error on parsing page: Client is not authenticated')
-            raise NotAuthException('I am not authenticated on aw.mail.ru')
+        versionadded:: 2.1
+
+        :raises :exc:`BattalionSearchTooShortQuery` if less than 4 symbols were given for search
 
-        # Get all divs with cont class( Cont class is class for player information)
-        data = soup.find_all('div', {'class': 'cont'})
-        # This is the list where we gonna keep track of players
-        battalion_players = []
-
-        # YE I KNOW THIS IS HORRIBLE AS FUCK
-        # SO, in here we are iterating over sub-tags in <div class='cont'>
-        for item in str(data[0]).split('\n'):
-            # Item will be something like this:
-            # <div><a href="/user/stats?data=458829630">T57Heavy-Tank</a><br/><span>Рядовой</span></div>
-            # if item is a player line
-            if item.startswith('<div><a href="/user/stats'):
-                # Here we are getting rid of all HTML stuff like tags, hrefs, etc by replacing them with space-symbols
-                # We will get something like this:
-                # 485633946 RUBIN ><span>Командир</span></div>
-
-                # Imagine making  a list from that
-                # Then we will have something like this: ['', '485633946', 'RUBIN', '><span>Командир</span></div>']
-                # Only thing we need from that is ID and nickname, so lets extract them below
-                _, player_id, nickname, battalion_role = \
-                    item.replace('<div><a href="/user/stats?', '').replace('">', ' ').replace('</a><br/', ' ') \
-                        .replace('data=', ' ').split(' ')
-
-                # Clean tags in battalion_role
-                battalion_role = battalion_role.replace('><span>', '').replace('</span></div>', '')
-
-                # Create a dictionary with player ID and player nickname and add this to List of all players
-                player = {'id': int(player_id), 'nickname': nickname, 'role': battalion_role}
-                battalion_players.append(player)
-
-        # Eventually, return all battalion players
-        return battalion_players
+        :raises :exc:`BattalionSearchBattalionNotFound` if battalion with given name was not found
+
+        :param content: string or UTF-8 encoded bytes with JSON response
+        :param battalion_name: Name battalion was searched by
+        :return: :class:`List[BattalionSearchResultEntry]`
+        """
+        response = orjson.loads(content) if orjson is not None else json.loads(content)
+
+        error = response['error']
+        if error == 0:
+            return [BattalionSearchResultEntry(full_name, int(battalion_id))
+                    for battalion_id, full_name in response['data'].items()]
+        if error == 1:
+            raise BattalionSearchTooShortQuery(
+                f'Given battalion name is too short for process.'
+                f' 4 symbols required, {len(battalion_name)} were given',
+                len(battalion_name))
+        if error == 2:
+            raise BattalionSearchBattalionNotFound(f'Battalion with name "{battalion_name}"'
+                                                   f' was not found.', battalion_name)
+        raise BattalionSearchException(f'Battalion search failed with error {error}')
+
+    @classmethod
+    def __nth_div_start(cls, page: str, n: int) -> Optional[int]:
+        """
+        :return: Position of the n-th opening <div> tag or None if there are less divs
+        """
+        for match in cls.__DIV_TAG.finditer(page):
+            if not match.group(1):
+                n -= 1
+                if not n:
+                    return match.start()
+        return None
+
+    @classmethod
+    def __roster_bounds(cls, page: str) -> Tuple[int, int]:
+        """
+        Finds the first <div class="cont"> counting nested divs
+
+        :return: Start and end positions of the div content
+        """
+        depth = 0
+        start = None
+        for match in cls.__DIV_TAG.finditer(page):
+            closing, attributes = match.groups()
+            if start is None:
+                if closing:
+                    continue
+                class_match = cls.__CONT_CLASS.search(attributes)
+                if class_match and 'cont' in next(group for group in class_match.groups() if group is not None).split():
+                    start = match.end()
+                    depth = 1
+                continue
+            if closing:
+                depth -= 1
+                if not depth:
+                    return start, match.start()
+            elif not attributes.rstrip().endswith('/'):
+                depth += 1
+
+        if start is None:
+            logger.error('Error on parsing page: battalion roster was not found')
+            raise IndexError('Battalion roster was not found on the page')
+        # Unclosed roster, read till the end of the page like HTML parser would do
+        return start, len(page)
@@ -0,0 +1,180 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import time
+import random
+import asyncio
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+__all__ = ['TokenBucket', 'RetryPolicy', 'parse_retry_after']
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter, allows ``rate`` requests per second on average and bursts up to ``burst`` requests.
+
+    If ``adaptive`` is set, the rate is halved every time the site answers with "429 Too Many Requests"
+    and then slowly grows back to the configured rate on successful responses.
+    Limiter is thread-safe, so one instance can be shared by several clients, both sync and async.
+
+    versionadded:: 2.1
+    """
+
+    def __init__(self, rate: float, burst: int = 1, adaptive: bool = True, min_rate: Optional[float] = None):
+        """
+        :param rate: Maximum average number of requests per second
+        :param burst: Number of requests that can be performed at once after being idle
+        :param adaptive: Whether rate should be lowered on 429 responses
+        :param min_rate: Lowest rate adaptive limiter can go down to, ``rate / 16`` by default
+        """
+        if rate <= 0:
+            raise ValueError(f'Rate must be positive, {rate} was given')
+        if burst < 1:
+            raise ValueError(f'Burst must be at least 1, {burst} was given')
+
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.burst = burst
+        self.adaptive = adaptive
+
+        self.__rate = rate
+        self.__tokens = float(burst)
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """
+        :return: Current rate in requests per second
+        """
+        return self.__rate
+
+    def reserve(self) -> float:
+        """
+        Takes one token from the bucket, even if it is not there yet
+
+        :return: Seconds caller has to wait before performing request
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated_at) * self.__rate)
+            self.__updated_at = now
+            self.__tokens -= 1
+            if self.__tokens >= 0:
+                return 0.0
+            return -self.__tokens / self.__rate
+
+    def wait(self):
+        """Blocks current thread until request can be performed"""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire(self):
+        """Waits until request can be performed without blocking event loop"""
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def penalize(self):
+        """Lowers rate after the site asked us to slow down"""
+        if not self.adaptive:
+            return
+        with self.__lock:
+            self.__rate = max(self.min_rate, self.__rate / 2)
+
+    def reward(self):
+        """Raises rate back towards configured one after successful request"""
+        if not self.adaptive or self.__rate >= self.max_rate:
+            return
+        with self.__lock:
+            self.__rate = min(self.max_rate, self.__rate + self.max_rate / 20)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Describes how failed requests are retried.
+
+    Requests that got one of ``retry_statuses`` or failed because of connection error are repeated up to
+    ``retries`` times. Delay between attempts grows exponentially with full jitter,
+    ``Retry-After`` header is honored if the site sends it, but never waited for longer than ``max_retry_after``
+    seconds, which is ``backoff_max`` if None.
+
+    versionadded:: 2.1
+    """
+    retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    max_retry_after: Optional[float] = None
+
+    def can_retry(self, attempt: int) -> bool:
+        """
+        :param attempt: Number of already performed retries
+        :return: True if one more attempt is allowed
+        """
+        return attempt < self.retries
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        :param attempt: Number of already performed retries
+        :param retry_after: Value of ``Retry-After`` response header, if any
+        :return: Seconds to wait before next attempt
+        """
+        requested_delay = parse_retry_after(retry_after)
+        if requested_delay is not None:
+            max_retry_after = self.max_retry_after if self.max_retry_after is not None else self.backoff_max
+            return min(requested_delay, max_retry_after)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses ``Retry-After`` header that contains either number of seconds or HTTP date
+
+    versionadded:: 2.1
+
+    :param value: Header value
+    :return: Seconds to wait or None if header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
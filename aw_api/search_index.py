@@ -0,0 +1,136 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set
+
+from .dataobjects import BattalionSearchResultEntry
+
+__all__ = ['BattalionSearchIndex']
+
+
+class BattalionSearchIndex:
+    """
+    In-memory index of every battalion returned by battalion search, answers prefix queries without the network.
+
+    Names are kept in a sorted array of case-folded strings, so prefix lookup is a binary search.
+    Index also remembers which queries were sent to the site: search results for a query contain every battalion
+    matching any longer query starting with it, so such queries are answered from the index alone.
+    The index is thread-safe and can be shared between several clients.
+
+    versionadded:: 2.1
+    """
+    # Site refuses queries shorter than this
+    MIN_QUERY_LENGTH = 4
+
+    def __init__(self, entries: Iterable[BattalionSearchResultEntry] = ()):
+        """
+        :param entries: Entries to put into index
+        """
+        # Sorted case-folded names and battalion IDs in the same order
+        self.__names: List[str] = []
+        self.__ids: List[int] = []
+        self.__entries: Dict[int, BattalionSearchResultEntry] = {}
+        self.__queries: Set[str] = set()
+        self.__lock = threading.Lock()
+        self.add(entries)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, battalion_id: int) -> bool:
+        return battalion_id in self.__entries
+
+    def add(self, entries: Iterable[BattalionSearchResultEntry], query: Optional[str] = None):
+        """
+        Adds search results to index
+
+        :param entries: Battalions returned by search
+        :param query: Query that returned exactly these entries, so it and longer queries are answered locally
+        """
+        with self.__lock:
+            for entry in entries:
+                previous = self.__entries.get(entry.id)
+                if previous is not None:
+                    if previous.full_name == entry.full_name:
+                        continue
+                    # Battalion was renamed
+                    self.__remove(previous)
+                name = entry.full_name.casefold()
+                position = bisect_left(self.__names, name)
+                while position < len(self.__names) and self.__names[position] == name and \
+                        self.__ids[position] < entry.id:
+                    position += 1
+                self.__names.insert(position, name)
+                self.__ids.insert(position, entry.id)
+                self.__entries[entry.id] = entry
+            if query is not None:
+                self.__queries.add(query.casefold())
+
+    def __remove(self, entry: BattalionSearchResultEntry):
+        name = entry.full_name.casefold()
+        position = bisect_left(self.__names, name)
+        while self.__ids[position] != entry.id:
+            position += 1
+        del self.__names[position]
+        del self.__ids[position]
+        del self.__entries[entry.id]
+
+    def is_covered(self, prefix: str) -> bool:
+        """
+        :param prefix: Beginning of battalion name
+        :return: True if the site was already asked for this prefix or its beginning,
+         so :meth:`search` returns complete results
+        """
+        prefix = prefix.casefold()
+        with self.__lock:
+            return any(prefix[:length] in self.__queries
+                       for length in range(self.MIN_QUERY_LENGTH, len(prefix) + 1))
+
+    def search(self, prefix: str, limit: Optional[int] = None) -> List[BattalionSearchResultEntry]:
+        """
+        :param prefix: Beginning of battalion name, case-insensitive
+        :param limit: Maximum number of returned entries, all of them if None
+        :return: Known battalions which names start with prefix, sorted by name
+        """
+        prefix = prefix.casefold()
+        found = []
+        with self.__lock:
+            position = bisect_left(self.__names, prefix)
+            while position < len(self.__names) and self.__names[position].startswith(prefix):
+                if limit is not None and len(found) >= limit:
+                    break
+                found.append(self.__entries[self.__ids[position]])
+                position += 1
+        return found
+
+    def clear(self):
+        """Removes all entries and remembered queries"""
+        with self.__lock:
+            self.__names.clear()
+            self.__ids.clear()
+            self.__entries.clear()
+            self.__queries.clear()
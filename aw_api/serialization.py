@@ -0,0 +1,482 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+import json
+import math
+import struct
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+from .dataobjects import PlayerStatistics, CompactPlayerStatistics, BattalionMemberEntry, BattalionSearchResultEntry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = ['FORMAT_VERSION', 'encode', 'encode_many', 'decode', 'decode_many', 'to_json', 'to_json_many',
+           'from_json', 'from_json_many', 'dumps', 'loads']
+
+# Version of binary and JSON formats. When the layout changes, the version is increased and decoders of previous
+# released versions are kept, so data written by older versions of the library can still be read after upgrade.
+# Version 1 was never released, lengths of its strings were 2 bytes long, so 65535 bytes long string was read as None
+FORMAT_VERSION = 2
+
+Serializable = Union[PlayerStatistics, CompactPlayerStatistics, BattalionMemberEntry, BattalionSearchResultEntry]
+
+# Binary layout of one object: magic, format version, type code, list flag = 0, then the record with strings inline.
+# Lists: the same header with list flag = 1, number of records, string table and fixed-size records
+# that refer to strings by index, so repeated tags, battalion names and roles are stored once
+_MAGIC = b'AWD'
+_HEADER = struct.Struct('<3sBBB')
+_COUNT = struct.Struct('<I')
+# Length of string of single object, the largest value marks None
+_LENGTH = struct.Struct('<I')
+# Index of None in string table
+_NONE_INDEX = 0
+
+_PLAYER_STATISTICS = struct.Struct('<dqdddd')
+_MEMBER = struct.Struct('<qq')
+_SEARCH_RESULT = struct.Struct('<q')
+
+# Records of lists, fields are in the order of dataclass fields, strings are indexes in string table
+_PLAYER_STATISTICS_ROW = struct.Struct('<dqdIIdddI')
+_MEMBER_ROW = struct.Struct('<IqIq')
+_SEARCH_RESULT_ROW = struct.Struct('<Iq')
+
+
+def _none_length(length: struct.Struct) -> int:
+    return (1 << 8 * length.size) - 1
+
+
+def _pack_string(value) -> bytes:
+    if value is None:
+        return _LENGTH.pack(_none_length(_LENGTH))
+    raw = value.encode('utf-8')
+    if len(raw) >= _none_length(_LENGTH):
+        raise ValueError(f'String of {len(raw)} bytes is too long to be encoded')
+    return _LENGTH.pack(len(raw)) + raw
+
+
+def _unpack_string(data: bytes, offset: int) -> Tuple[Any, int]:
+    size, = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    if size == _none_length(_LENGTH):
+        return None, offset
+    return data[offset:offset + size].decode('utf-8'), offset + size
+
+
+def _pack_player_statistics(statistics) -> bytes:
+    average_level = statistics.average_level
+    return b''.join((
+        _PLAYER_STATISTICS.pack(statistics.winrate, statistics.battles, statistics.damage,
+                                statistics.average_spotting, statistics.average_kills,
+                                math.nan if average_level is None else average_level),
+        _pack_string(statistics.clantag), _pack_string(statistics.battalion_full), _pack_string(statistics.nickname)
+    ))
+
+
+def _unpack_player_statistics(data: bytes, offset: int) -> Tuple[PlayerStatistics, int]:
+    winrate, battles, damage, average_spotting, average_kills, average_level = \
+        _PLAYER_STATISTICS.unpack_from(data, offset)
+    offset += _PLAYER_STATISTICS.size
+    clantag, offset = _unpack_string(data, offset)
+    battalion_full, offset = _unpack_string(data, offset)
+    nickname, offset = _unpack_string(data, offset)
+    return PlayerStatistics(winrate=winrate, battles=battles, damage=damage, clantag=clantag,
+                            battalion_full=battalion_full, average_spotting=average_spotting,
+                            average_kills=average_kills,
+                            average_level=None if math.isnan(average_level) else average_level,
+                            nickname=nickname), offset
+
+
+def _pack_member(member: BattalionMemberEntry) -> bytes:
+    return b''.join((_MEMBER.pack(member.id, member.battalion_id),
+                     _pack_string(member.nickname), _pack_string(member.role)))
+
+
+def _unpack_member(data: bytes, offset: int) -> Tuple[BattalionMemberEntry, int]:
+    player_id, battalion_id = _MEMBER.unpack_from(data, offset)
+    offset += _MEMBER.size
+    nickname, offset = _unpack_string(data, offset)
+    role, offset = _unpack_string(data, offset)
+    return BattalionMemberEntry(nickname=nickname, id=player_id, role=role, battalion_id=battalion_id), offset
+
+
+def _pack_search_result(entry: BattalionSearchResultEntry) -> bytes:
+    return _SEARCH_RESULT.pack(entry.id) + _pack_string(entry.full_name)
+
+
+def _unpack_search_result(data: bytes, offset: int) -> Tuple[BattalionSearchResultEntry, int]:
+    battalion_id, = _SEARCH_RESULT.unpack_from(data, offset)
+    full_name, offset = _unpack_string(data, offset + _SEARCH_RESULT.size)
+    return BattalionSearchResultEntry(full_name=full_name, id=battalion_id), offset
+
+
+class _StringTable:
+    """
+    Strings of encoded list, every distinct string is stored once
+    """
+
+    def __init__(self):
+        self.__indexes: Dict[str, int] = {}
+
+    def index(self, value) -> int:
+        if value is None:
+            return _NONE_INDEX
+        index = self.__indexes.get(value)
+        if index is None:
+            index = self.__indexes[value] = len(self.__indexes) + 1
+        return index
+
+    def pack(self) -> bytes:
+        # Lengths are counted in characters, so the whole table is decoded at once and then sliced
+        strings = list(self.__indexes)
+        blob = ''.join(strings).encode('utf-8')
+        return b''.join((_COUNT.pack(len(strings)), struct.pack(f'<{len(strings)}I', *map(len, strings)),
+                         _COUNT.pack(len(blob)), blob))
+
+    @staticmethod
+    def unpack(data: bytes, offset: int) -> Tuple[List, int]:
+        count, = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        lengths = struct.unpack_from(f'<{count}I', data, offset)
+        offset += 4 * count
+        size, = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        text = data[offset:offset + size].decode('utf-8')
+
+        strings = [None]
+        append = strings.append
+        position = 0
+        for length in lengths:
+            append(text[position:position + length])
+            position += length
+        return strings, offset + size
+
+
+def _pack_player_statistics_rows(objs: List, strings: _StringTable) -> bytes:
+    pack, index = _PLAYER_STATISTICS_ROW.pack, strings.index
+    return b''.join([
+        pack(obj.winrate, obj.battles, obj.damage, index(obj.clantag), index(obj.battalion_full),
+             obj.average_spotting, obj.average_kills, math.nan if obj.average_level is None else obj.average_level,
+             index(obj.nickname))
+        for obj in objs
+    ])
+
+
+def _unpack_player_statistics_rows(rows: bytes, strings: List) -> List[PlayerStatistics]:
+    # NaN is the only value not equal to itself, it marks missing average level
+    return [
+        PlayerStatistics(winrate, battles, damage, strings[clantag], strings[battalion_full], average_spotting,
+                         average_kills, None if average_level != average_level else average_level, strings[nickname])
+        for winrate, battles, damage, clantag, battalion_full, average_spotting, average_kills, average_level, nickname
+        in _PLAYER_STATISTICS_ROW.iter_unpack(rows)
+    ]
+
+
+def _pack_member_rows(objs: List, strings: _StringTable) -> bytes:
+    pack, index = _MEMBER_ROW.pack, strings.index
+    return b''.join([pack(index(obj.nickname), obj.id, index(obj.role), obj.battalion_id) for obj in objs])
+
+
+def _unpack_member_rows(rows: bytes, strings: List) -> List[BattalionMemberEntry]:
+    return [BattalionMemberEntry(strings[nickname], player_id, strings[role], battalion_id)
+            for nickname, player_id, role, battalion_id in _MEMBER_ROW.iter_unpack(rows)]
+
+
+def _pack_search_result_rows(objs: List, strings: _StringTable) -> bytes:
+    pack, index = _SEARCH_RESULT_ROW.pack, strings.index
+    return b''.join([pack(index(obj.full_name), obj.id) for obj in objs])
+
+
+def _unpack_search_result_rows(rows: bytes, strings: List) -> List[BattalionSearchResultEntry]:
+    return [BattalionSearchResultEntry(strings[full_name], battalion_id)
+            for full_name, battalion_id in _SEARCH_RESULT_ROW.iter_unpack(rows)]
+
+
+# Type code and name used in JSON of every serializable class
+_TYPES: Dict[type, Tuple[int, str]] = {
+    PlayerStatistics: (1, 'player_statistics'),
+    CompactPlayerStatistics: (1, 'player_statistics'),
+    BattalionMemberEntry: (2, 'battalion_member'),
+    BattalionSearchResultEntry: (3, 'battalion_search_result'),
+}
+# Packers and unpackers of single objects
+_PACKERS: Dict[int, Callable[[Any], bytes]] = {
+    1: _pack_player_statistics,
+    2: _pack_member,
+    3: _pack_search_result,
+}
+# (format version, type code) -> function reading one record at offset
+_UNPACKERS: Dict[Tuple[int, int], Callable[[bytes, int], Tuple[Any, int]]] = {
+    (2, 1): _unpack_player_statistics,
+    (2, 2): _unpack_member,
+    (2, 3): _unpack_search_result,
+}
+# Packers and unpackers of all records of lists
+_ROW_PACKERS: Dict[int, Callable[[List, _StringTable], bytes]] = {
+    1: _pack_player_statistics_rows,
+    2: _pack_member_rows,
+    3: _pack_search_result_rows,
+}
+_ROW_UNPACKERS: Dict[Tuple[int, int], Tuple[struct.Struct, Callable[[bytes, List], List]]] = {
+    (2, 1): (_PLAYER_STATISTICS_ROW, _unpack_player_statistics_rows),
+    (2, 2): (_MEMBER_ROW, _unpack_member_rows),
+    (2, 3): (_SEARCH_RESULT_ROW, _unpack_search_result_rows),
+}
+_JSON_CLASSES: Dict[str, type] = {
+    'player_statistics': PlayerStatistics,
+    'battalion_member': BattalionMemberEntry,
+    'battalion_search_result': BattalionSearchResultEntry,
+}
+# Type code of empty lists
+_EMPTY = 0
+
+
+def _type_of(obj) -> Tuple[int, str]:
+    try:
+        return _TYPES[type(obj)]
+    except KeyError:
+        raise TypeError(f'Objects of type {type(obj).__name__} can not be serialized') from None
+
+
+def _common_type(objs: List) -> Tuple[int, str]:
+    if not objs:
+        return _EMPTY, ''
+    types = {_type_of(obj) for obj in objs}
+    if len(types) > 1:
+        raise TypeError('All serialized objects must have the same type')
+    return types.pop()
+
+
+def encode(obj: Serializable) -> bytes:
+    """
+    Encodes one object into compact binary form
+
+    versionadded:: 2.1
+
+    :raises :exc:`ValueError` if one of strings is too long to be encoded
+
+    :param obj: :class:`PlayerStatistics`, :class:`CompactPlayerStatistics`, :class:`BattalionMemberEntry`
+     or :class:`BattalionSearchResultEntry`
+    :return: Encoded object
+    """
+    type_code, _ = _type_of(obj)
+    return _HEADER.pack(_MAGIC, FORMAT_VERSION, type_code, 0) + _PACKERS[type_code](obj)
+
+
+def encode_many(objs: Iterable[Serializable]) -> bytes:
+    """
+    Encodes list of objects of the same type into compact binary form in one call
+
+    versionadded:: 2.1
+
+    :param objs: Objects of one of the types supported by :func:`encode`
+    :return: Encoded list
+    """
+    objs = list(objs)
+    type_code, _ = _common_type(objs)
+    header = _HEADER.pack(_MAGIC, FORMAT_VERSION, type_code, 1) + _COUNT.pack(len(objs))
+    if not objs:
+        return header
+    strings = _StringTable()
+    # Rows are packed first, they fill the string table
+    rows = _ROW_PACKERS[type_code](objs, strings)
+    return b''.join((header, strings.pack(), rows))
+
+
+def _read_header(data: bytes) -> Tuple[int, int, bool]:
+    if len(data) < _HEADER.size:
+        raise ValueError('Data is too short to be encoded object')
+    magic, version, type_code, is_list = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError('Data was not encoded by aw_api.serialization')
+    if version > FORMAT_VERSION:
+        raise ValueError(f'Data was encoded with format version {version}, '
+                         f'only versions up to {FORMAT_VERSION} are supported')
+    if (version, type_code) not in _UNPACKERS and not (is_list and type_code == _EMPTY):
+        raise ValueError(f'Unknown type code {type_code} in format version {version}')
+    return version, type_code, bool(is_list)
+
+
+def decode(data: bytes) -> Serializable:
+    """
+    Decodes object encoded with :func:`encode`
+
+    versionadded:: 2.1
+
+    :raises :exc:`ValueError` if data is not encoded object or was encoded by newer version of the library
+
+    :param data: Encoded object
+    :return: Decoded object, :class:`CompactPlayerStatistics` are decoded into :class:`PlayerStatistics`
+    """
+    version, type_code, is_list = _read_header(data)
+    if is_list:
+        raise ValueError('Data is encoded list, use decode_many')
+    obj, _ = _UNPACKERS[version, type_code](data, _HEADER.size)
+    return obj
+
+
+def decode_many(data: bytes) -> List[Serializable]:
+    """
+    Decodes list encoded with :func:`encode_many`
+
+    versionadded:: 2.1
+
+    :raises :exc:`ValueError` if data is not encoded list or was encoded by newer version of the library
+
+    :param data: Encoded list
+    :return: List of decoded objects
+    """
+    version, type_code, is_list = _read_header(data)
+    if not is_list:
+        raise ValueError('Data is encoded object, use decode')
+    count, = _COUNT.unpack_from(data, _HEADER.size)
+    if not count:
+        return []
+    row, unpack_rows = _ROW_UNPACKERS[version, type_code]
+    strings, offset = _StringTable.unpack(data, _HEADER.size + _COUNT.size)
+    return unpack_rows(data[offset:offset + count * row.size], strings)
+
+
+def _fields(obj) -> Dict[str, Any]:
+    if isinstance(obj, CompactPlayerStatistics):
+        return {field: getattr(obj, field) for field in obj.__slots__}
+    return dict(vars(obj))
+
+
+def _json_dumps(document: Dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(document).decode('utf-8')
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+
+
+def _json_loads(data: Union[str, bytes]) -> Dict:
+    document = orjson.loads(data) if orjson is not None else json.loads(data)
+    version = document.get('version')
+    if not isinstance(version, int) or version > FORMAT_VERSION:
+        raise ValueError(f'Unsupported format version {version!r}, '
+                         f'only versions up to {FORMAT_VERSION} are supported')
+    return document
+
+
+def _json_class(type_name: str) -> type:
+    cls = _JSON_CLASSES.get(type_name)
+    if cls is None:
+        raise ValueError(f'Unknown type {type_name!r} in JSON document')
+    return cls
+
+
+def to_json(obj: Serializable) -> str:
+    """
+    Encodes one object into JSON like ``{"version": 2, "type": "player_statistics", "data": {...}}``,
+    where data holds fields of the object
+
+    versionadded:: 2.1
+
+    :param obj: Object of one of the types supported by :func:`encode`
+    :return: JSON document
+    """
+    _, type_name = _type_of(obj)
+    return _json_dumps({'version': FORMAT_VERSION, 'type': type_name, 'data': _fields(obj)})
+
+
+def to_json_many(objs: Iterable[Serializable]) -> str:
+    """
+    Encodes list of objects of the same type into JSON like
+    ``{"version": 2, "type": "battalion_member", "items": [{...}, ...]}``
+
+    versionadded:: 2.1
+
+    :param objs: Objects of one of the types supported by :func:`encode`
+    :return: JSON document
+    """
+    objs = list(objs)
+    _, type_name = _common_type(objs)
+    return _json_dumps({'version': FORMAT_VERSION, 'type': type_name, 'items': [_fields(obj) for obj in objs]})
+
+
+def from_json(data: Union[str, bytes]) -> Serializable:
+    """
+    Decodes object encoded with :func:`to_json`
+
+    versionadded:: 2.1
+
+    :raises :exc:`ValueError` if document was encoded by newer version of the library or has unknown type
+
+    :param data: JSON document
+    :return: Decoded object
+    """
+    document = _json_loads(data)
+    return _json_class(document.get('type'))(**document['data'])
+
+
+def from_json_many(data: Union[str, bytes]) -> List[Serializable]:
+    """
+    Decodes list encoded with :func:`to_json_many`
+
+    versionadded:: 2.1
+
+    :raises :exc:`ValueError` if document was encoded by newer version of the library or has unknown type
+
+    :param data: JSON document
+    :return: List of decoded objects
+    """
+    document = _json_loads(data)
+    if not document['items']:
+        return []
+    cls = _json_class(document.get('type'))
+    return [cls(**fields) for fields in document['items']]
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encodes supported object or list of them with :func:`encode` or :func:`encode_many`.
+    Default serializer of :class:`PageStore`
+
+    versionadded:: 2.1
+
+    :raises :exc:`TypeError` if object is not one of the types supported by :func:`encode`
+
+    :param obj: Object to serialize
+    :return: Serialized object
+    """
+    if isinstance(obj, list):
+        return encode_many(obj)
+    return encode(obj)
+
+
+def loads(data: bytes) -> Any:
+    """
+    Reverses :func:`dumps`. Only data, never code, is decoded, so stored results can not execute anything on load
+
+    versionadded:: 2.1
+
+    :raises :exc:`ValueError` if data was not written by :func:`dumps`
+
+    :param data: Serialized object
+    :return: Deserialized object
+    """
+    _, _, is_list = _read_header(data)
+    return decode_many(data) if is_list else decode(data)
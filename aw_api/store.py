@@ -0,0 +1,225 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import time
+import logging
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+
+from . import serialization
+
+__all__ = ['PageStore', 'StoredPage']
+
+logger = logging.getLogger()
+
+
+class StoredPage(NamedTuple):
+    """
+    Page entry kept by :class:`PageStore`
+
+    versionadded:: 2.1
+    """
+    url: str
+    content_hash: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    parse_key: Optional[str]
+    parsed: Optional[bytes]
+    updated_at: float
+    # Deserialized ``parsed``, decoded once by :meth:`PageStore.get`
+    result: Any = None
+
+
+class PageStore:
+    """
+    Persistent SQLite store of fetched pages, survives process restarts.
+
+    For every URL the store keeps hash of the page content, ``ETag`` and ``Last-Modified`` validators sent by the site
+    and serialized result of parsing the page. Clients send the validators back as ``If-None-Match`` and
+    ``If-Modified-Since``, and if the site answers "304 Not Modified" or returns a page with the same hash,
+    the stored result is returned without parsing the page again.
+
+    The store is thread-safe and can be shared between several clients.
+
+    versionadded:: 2.1
+    """
+
+    def __init__(self, path: str = 'aw_api_pages.sqlite3', dumps: Callable[[Any], bytes] = serialization.dumps,
+                 loads: Callable[[bytes], Any] = serialization.loads):
+        """
+        :param path: Path to SQLite database, created if it does not exist. ``":memory:"`` keeps store in memory
+        :param dumps: Function that serializes parsed results
+        :param loads: Function that deserializes parsed results
+
+        By default results are stored in versioned binary format of :mod:`aw_api.serialization`, which holds
+        only data, so whoever can write the database file can not make the client execute code. Only statistics and
+        battalion rosters can be stored this way. Entries that can not be decoded are treated as missing.
+        Pass ``dumps=pickle.dumps, loads=pickle.loads`` to store other results, if the database file is trusted
+        """
+        self.path = path
+        self.__dumps = dumps
+        self.__loads = loads
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self.__lock:
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+            self.__connection.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                'url TEXT PRIMARY KEY, content_hash TEXT NOT NULL, etag TEXT, last_modified TEXT, '
+                'parse_key TEXT, parsed BLOB, updated_at REAL NOT NULL)'
+            )
+
+    @staticmethod
+    def hash_page(page: Union[str, bytes]) -> str:
+        """
+        :param page: Page content
+        :return: Hex digest of the page content
+        """
+        if isinstance(page, str):
+            page = page.encode('utf-8')
+        return hashlib.blake2b(page, digest_size=16).hexdigest()
+
+    @staticmethod
+    def parse_key(parse: Callable) -> str:
+        """
+        :param parse: Function that turns page into result
+        :return: Name stored next to parsed result, so results of different parse functions are not mixed up
+        """
+        return f'{parse.__module__}.{parse.__qualname__}'
+
+    def get(self, url: str) -> Optional[StoredPage]:
+        """
+        :param url: URL of the page
+        :return: :class:`StoredPage` with decoded ``result``,
+         or None if page was never stored or its parsed result can not be decoded
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                'SELECT url, content_hash, etag, last_modified, parse_key, parsed, updated_at FROM pages WHERE url = ?',
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = StoredPage(*row)
+        if entry.parsed is None:
+            return entry
+        try:
+            result = self.__loads(entry.parsed)
+        except Exception as exc:
+            # E.g. entry written by another serializer, the page is fetched and parsed again
+            logger.warning('Stored result of {0} can not be decoded: {1!r}'.format(url, exc))
+            return None
+        return entry._replace(result=result)
+
+    def put(self, url: str, page: Union[str, bytes], etag: Optional[str] = None, last_modified: Optional[str] = None,
+            parse_key: Optional[str] = None, parsed: Any = None):
+        """
+        Stores page hash, validators and parsed result, replacing previous entry
+
+        :param url: URL of the page
+        :param page: Page content, only its hash is stored
+        :param etag: Value of ``ETag`` response header
+        :param last_modified: Value of ``Last-Modified`` response header
+        :param parse_key: :meth:`parse_key` of function that produced ``parsed``, None if page was not parsed
+        :param parsed: Result of parsing the page
+
+        :raises :exc:`TypeError` if ``parsed`` can not be serialized
+        """
+        blob = self.__dumps(parsed) if parse_key is not None else None
+        with self.__lock:
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO pages (url, content_hash, etag, last_modified, parse_key, parsed, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, self.hash_page(page), etag, last_modified, parse_key, blob, time.time())
+            )
+
+    def touch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """
+        Marks stored page as revalidated, keeping its parsed result
+
+        :param url: URL of the page
+        :param etag: New value of ``ETag`` response header, previous one is kept if None
+        :param last_modified: New value of ``Last-Modified`` response header, previous one is kept if None
+        """
+        with self.__lock:
+            self.__connection.execute(
+                'UPDATE pages SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), '
+                'updated_at = ? WHERE url = ?',
+                (etag, last_modified, time.time(), url)
+            )
+
+    def load(self, entry: StoredPage) -> Any:
+        """
+        :param entry: Stored page with parsed result
+        :return: Deserialized parsed result, already decoded by :meth:`get` if entry was returned by it
+        """
+        if entry.result is not None:
+            return entry.result
+        return self.__loads(entry.parsed)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[StoredPage]) -> Dict[str, str]:
+        """
+        :param entry: Stored page or None
+        :return: ``If-None-Match`` and ``If-Modified-Since`` headers for revalidating the page
+        """
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def invalidate(self, url: str):
+        """
+        :param url: URL of the page to remove
+        """
+        with self.__lock:
+            self.__connection.execute('DELETE FROM pages WHERE url = ?', (url,))
+
+    def clear(self):
+        """Removes all stored pages"""
+        with self.__lock:
+            self.__connection.execute('DELETE FROM pages')
+
+    def close(self):
+        """Closes database connection"""
+        with self.__lock:
+            self.__connection.close()
+
+    def __len__(self):
+        with self.__lock:
+            return self.__connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def __enter__(self) -> 'PageStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,227 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import time
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from .async_client import AIOClient
+from .dataobjects import PlayerStatistics, PlayerStatisticsDelta
+from .enums import GameMode
+from .exceptions import UserNotFoundException, UserHasClosedStatisticsException
+from .utils import as_completed_bounded
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['PlayerTracker']
+
+
+class _TrackedPlayer:
+    __slots__ = ('nickname', 'player_id', 'statistics', 'refreshed_at', 'next_refresh_at', 'interval')
+
+    def __init__(self, nickname: str, player_id: int, next_refresh_at: float, interval: float):
+        self.nickname = nickname
+        self.player_id = player_id
+        self.statistics: Dict[GameMode, PlayerStatistics] = {}
+        self.refreshed_at: Optional[float] = None
+        self.next_refresh_at = next_refresh_at
+        self.interval = interval
+
+
+class PlayerTracker:
+    """
+    Keeps last known statistics of tracked players and refreshes them on a schedule based on player activity.
+
+    After every refresh the tracker estimates how many battles a player plays per second and schedules next refresh
+    for the moment player is expected to have played ``battles_per_refresh`` more battles. Players that did not play
+    since the last refresh are checked twice as rarely every time, so inactive accounts cost almost no requests.
+    Intervals are always kept between ``min_interval`` and ``max_interval``.
+
+    Example::
+
+        tracker = PlayerTracker(client)
+        tracker.track('Googlemen')
+        async for nickname, deltas in tracker.refresh_due():
+            ...
+        await asyncio.sleep(tracker.seconds_until_next())
+
+    versionadded:: 2.1
+    """
+
+    def __init__(self, client: AIOClient, modes: Iterable[Union[int, GameMode]] = (GameMode.PVP,),
+                 min_interval: float = 3600.0, max_interval: float = 7 * 86400.0, battles_per_refresh: int = 10,
+                 concurrency: int = 5):
+        """
+        :param client: Client used to retrieve statistics
+        :param modes: Game modes to track
+        :param min_interval: Minimal number of seconds between refreshes of one player
+        :param max_interval: Maximal number of seconds between refreshes of one player
+        :param battles_per_refresh: Number of new battles player is expected to have at the next refresh
+        :param concurrency: Maximum number of players refreshed at the same time
+        """
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f'Intervals must satisfy 0 < min_interval <= max_interval, '
+                             f'{min_interval} and {max_interval} were given')
+
+        self.client = client
+        self.modes: List[GameMode] = [GameMode(mode) for mode in modes]
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.battles_per_refresh = battles_per_refresh
+        self.concurrency = concurrency
+
+        self.__players: Dict[str, _TrackedPlayer] = {}
+
+    def track(self, nickname: str, player_id: int = 0, statistics: Optional[Dict[GameMode, PlayerStatistics]] = None,
+              refreshed_at: Optional[float] = None):
+        """
+        Starts tracking player, player is due for refresh immediately
+
+        :param nickname: Nickname of player
+        :param player_id: CSA ID of player, if given it is used for lookups instead of nickname
+        :param statistics: Previously known statistics by game mode, e.g. restored from a database
+        :param refreshed_at: Unix time ``statistics`` were retrieved at
+        """
+        player = _TrackedPlayer(nickname, player_id, time.time(), self.min_interval)
+        if statistics:
+            player.statistics = {GameMode(mode): item for mode, item in statistics.items()}
+            player.refreshed_at = refreshed_at if refreshed_at is not None else time.time()
+        self.__players[nickname] = player
+
+    def untrack(self, nickname: str):
+        """
+        :param nickname: Nickname of player to stop tracking
+        """
+        self.__players.pop(nickname, None)
+
+    def __contains__(self, nickname: str) -> bool:
+        return nickname in self.__players
+
+    def __len__(self):
+        return len(self.__players)
+
+    def last_statistics(self, nickname: str) -> Dict[GameMode, PlayerStatistics]:
+        """
+        :param nickname: Nickname of tracked player
+        :return: Last known statistics by game mode, empty if player was not refreshed yet
+        """
+        return dict(self.__players[nickname].statistics)
+
+    def next_refresh_at(self, nickname: str) -> float:
+        """
+        :param nickname: Nickname of tracked player
+        :return: Unix time player is due for refresh at
+        """
+        return self.__players[nickname].next_refresh_at
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """
+        :param now: Unix time to check against, current time by default
+        :return: Nicknames of players due for refresh, most overdue first
+        """
+        now = time.time() if now is None else now
+        players = sorted((player for player in self.__players.values() if player.next_refresh_at <= now),
+                         key=lambda player: player.next_refresh_at)
+        return [player.nickname for player in players]
+
+    def seconds_until_next(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        :param now: Unix time to count from, current time by default
+        :return: Seconds until the next player is due for refresh, None if nobody is tracked
+        """
+        if not self.__players:
+            return None
+        now = time.time() if now is None else now
+        return max(0.0, min(player.next_refresh_at for player in self.__players.values()) - now)
+
+    async def refresh(self, nickname: str) -> List[PlayerStatisticsDelta]:
+        """
+        Retrieves statistics of tracked player in all tracked modes and schedules next refresh
+
+        :raises :exc:`UserHasClosedStatisticsException`, :exc:`NotAuthException`,:exc:`UserNotFoundException`
+
+        :param nickname: Nickname of tracked player
+        :return: Deltas for modes player has played since the last refresh, empty on the first refresh
+        """
+        player = self.__players[nickname]
+        try:
+            results = await asyncio.gather(
+                *(self.client.get_statistic_by_nickname(player.nickname, mode, player.player_id)
+                  for mode in self.modes)
+            )
+        except (UserNotFoundException, UserHasClosedStatisticsException):
+            # Nothing to track for now, check again much later
+            self.__schedule(player, time.time(), self.max_interval)
+            raise
+
+        now = time.time()
+        deltas = []
+        if player.refreshed_at is not None:
+            interval = now - player.refreshed_at
+            for mode, current in zip(self.modes, results):
+                previous = player.statistics.get(mode)
+                if previous is not None and current.battles != previous.battles:
+                    deltas.append(PlayerStatisticsDelta(current.nickname, mode, previous, current, interval))
+        self.__schedule(player, now, self.__next_interval(player, now, deltas))
+
+        player.statistics = dict(zip(self.modes, results))
+        player.refreshed_at = now
+        return deltas
+
+    async def refresh_due(self, now: Optional[float] = None
+                          ) -> AsyncIterator[Tuple[str, Union[List[PlayerStatisticsDelta], Exception]]]:
+        """
+        Refreshes every player that is due, running at most ``concurrency`` refreshes at the same time.
+
+        :exc:`UserNotFoundException` and :exc:`UserHasClosedStatisticsException` are yielded as values
+        instead of being raised, any other exception aborts the whole batch.
+
+        :param now: Unix time to check against, current time by default
+        :return: Async iterator of ``(nickname, deltas or exception)`` tuples in order of completion
+        """
+
+        async def refresh(nickname: str) -> Union[List[PlayerStatisticsDelta], Exception]:
+            try:
+                return await self.refresh(nickname)
+            except (UserNotFoundException, UserHasClosedStatisticsException) as exc:
+                return exc
+
+        async for nickname, result in as_completed_bounded(refresh, self.due(now), self.concurrency):
+            yield nickname, result
+
+    def __next_interval(self, player: _TrackedPlayer, now: float, deltas: List[PlayerStatisticsDelta]) -> float:
+        if player.refreshed_at is None:
+            return self.min_interval
+        new_battles = sum(delta.new_battles for delta in deltas)
+        if new_battles <= 0:
+            return player.interval * 2
+        battles_per_second = new_battles / max(now - player.refreshed_at, 1.0)
+        return self.battles_per_refresh / battles_per_second
+
+    def __schedule(self, player: _TrackedPlayer, now: float, interval: float):
+        player.interval = min(self.max_interval, max(self.min_interval, interval))
+        player.next_refresh_at = now + player.interval
+        logger.debug('Next refresh of {0} in {1:.0f}s'.format(player.nickname, player.interval))
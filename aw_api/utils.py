@@ -0,0 +1,152 @@
+"""
+MIT License
+
+Copyright (c) 2020-2021 Dmitriy Trofimov
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+import asyncio
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Tuple, \
+    TypeVar, Union
+
+__all__ = ['as_completed_bounded', 'as_completed_threaded']
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+async def as_completed_bounded(func: Callable[[T], Awaitable[R]], items: Union[Iterable[T], AsyncIterable[T]],
+                               concurrency: int) -> AsyncIterator[Tuple[T, R]]:
+    """
+    Runs ``func`` for every item, keeping at most ``concurrency`` calls in flight,
+    and yields ``(item, result)`` pairs in order of completion.
+
+    Items are pulled from ``items`` lazily, so generators of any length are fine.
+    Async iterables are supported as well, calls start as soon as items arrive.
+    If one of the calls raises, the remaining calls are cancelled and the exception is propagated.
+
+    versionadded:: 2.1
+
+    versionchanged:: 2.1 Accepts async iterables
+
+    :param func: Coroutine function that will be called with every item
+    :param items: Items to process
+    :param concurrency: Maximum number of calls running at the same time
+    :return: Async iterator of ``(item, result)`` tuples
+    """
+    if concurrency < 1:
+        raise ValueError(f'Concurrency must be positive, {concurrency} was given')
+
+    is_async = hasattr(items, '__aiter__')
+    iterator = items.__aiter__() if is_async else iter(items)
+    pending = {}
+    # Task waiting for the next item of async iterable
+    pulling: Optional[asyncio.Future] = None
+    exhausted = False
+
+    def schedule() -> bool:
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return False
+        pending[asyncio.ensure_future(func(item))] = item
+        return True
+
+    try:
+        while True:
+            if not is_async:
+                while len(pending) < concurrency and schedule():
+                    pass
+            elif pulling is None and not exhausted and len(pending) < concurrency:
+                pulling = asyncio.ensure_future(iterator.__anext__())
+
+            waiting = set(pending)
+            if pulling is not None:
+                waiting.add(pulling)
+            if not waiting:
+                break
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if pulling in done:
+                done.discard(pulling)
+                try:
+                    item = pulling.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    pending[asyncio.ensure_future(func(item))] = item
+                pulling = None
+
+            for task in done:
+                item = pending.pop(task)
+                yield item, task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pulling is not None:
+            pulling.cancel()
+
+
+def as_completed_threaded(func: Callable[[T], R], items: Iterable[T], executor: Executor,
+                          concurrency: int) -> Iterator[Tuple[T, R]]:
+    """
+    Synchronous counterpart of :func:`as_completed_bounded`.
+    Runs ``func`` for every item in ``executor``, keeping at most ``concurrency`` calls submitted,
+    and yields ``(item, result)`` pairs in order of completion.
+
+    If one of the calls raises, calls that have not started yet are cancelled and the exception is propagated.
+
+    versionadded:: 2.1
+
+    :param func: Function that will be called with every item
+    :param items: Items to process, pulled lazily
+    :param executor: Executor to run calls in
+    :param concurrency: Maximum number of calls submitted at the same time
+    :return: Iterator of ``(item, result)`` tuples
+    """
+    if concurrency < 1:
+        raise ValueError(f'Concurrency must be positive, {concurrency} was given')
+
+    iterator = iter(items)
+    pending: Dict[Future, T] = {}
+
+    def schedule() -> bool:
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return False
+        pending[executor.submit(func, item)] = item
+        return True
+
+    try:
+        while len(pending) < concurrency and schedule():
+            pass
+
+        while pending:
+            done, _ = wait(pending.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                yield item, future.result()
+                schedule()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,94 @@
+"""
+Offline benchmark for :class:`aw_api.parser.Parser`.
+
+Parses saved pages from ``test_module/fixtures`` with every installed HTML backend and reports
+parses per second and peak memory allocated by one parse. No network access or cookies are needed.
+
+Usage::
+
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --backend bs4 --filter battalion --number 50
+
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from aw_api.backends import available_backends  # noqa: E402
+from aw_api.exceptions import BaseAWStatsException  # noqa: E402
+from aw_api.parser import Parser  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'test_module', 'fixtures')
+
+
+def make_parse_call(parser: Parser, fixture_name: str, page: str) -> Callable[[], None]:
+    if fixture_name.startswith('battalion'):
+        def call():
+            try:
+                list(parser.parse_battalion_players(page, 0))
+            except BaseAWStatsException:
+                pass
+    else:
+        def call():
+            try:
+                parser.parse_player_statistics(page)
+            except BaseAWStatsException:
+                pass
+    return call
+
+
+def measure(call: Callable[[], None], number: int, repeat: int):
+    # Warm up, so lazily compiled queries do not affect results
+    call()
+
+    best = float('inf')
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            call()
+        best = min(best, (time.perf_counter() - started_at) / number)
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main(argv: List[str] = None):
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    argument_parser.add_argument('--backend', action='append', choices=['bs4', 'lxml', 'selectolax'],
+                                 help='Backend to benchmark, may be repeated. All installed backends by default')
+    argument_parser.add_argument('--filter', default='', help='Only run fixtures which names contain this string')
+    argument_parser.add_argument('--number', type=int, default=100, help='Parses per measurement')
+    argument_parser.add_argument('--repeat', type=int, default=3, help='Measurements per fixture, best is reported')
+    argument_parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Directory with saved pages')
+    arguments = argument_parser.parse_args(argv)
+
+    # Parser logs every error page, that would flood the output
+    logging.disable(logging.CRITICAL)
+
+    backends = arguments.backend or available_backends()
+    fixtures = sorted(name for name in os.listdir(arguments.fixtures)
+                      if name.endswith('.html') and arguments.filter in name)
+
+    print(f'{"fixture":<28} {"backend":<11} {"parses/s":>10} {"us/parse":>10} {"peak KiB":>10}')
+    for fixture_name in fixtures:
+        with open(os.path.join(arguments.fixtures, fixture_name), encoding='utf-8') as fixture:
+            page = fixture.read()
+        for backend in backends:
+            seconds, peak = measure(make_parse_call(Parser(backend), fixture_name, page),
+                                    arguments.number, arguments.repeat)
+            print(f'{fixture_name[:-5]:<28} {backend:<11} {1 / seconds:>10.0f} {seconds * 1e6:>10.1f} '
+                  f'{peak / 1024:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,14 @@ setup(
     author_email='',
     #install_requires=['beautifulsoup4', 'aiohttp', 'requests'],
     install_requires=requirements,
+    extras_require={
+        'lxml': ['lxml'],
+        'selectolax': ['selectolax'],
+        'orjson': ['orjson'],
+    },
+    entry_points={
+        'console_scripts': ['aw-api = aw_api.cli:main'],
+    },
 
     python_requires='>=3.7.0',
     keywords=['armored warfare', 'aw', 'armored warfare api', 'armata', 'армата'],
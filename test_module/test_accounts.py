@@ -0,0 +1,25 @@
+import pytest
+
+from aw_api.accounts import AccountPool
+from aw_api.exceptions import NotAuthException
+
+
+def test_round_robin_and_cookies():
+    pool = AccountPool([[{'name': 'sid', 'value': 'a'}], {'sid': 'b'}])
+    assert [pool.acquire().cookies['sid'] for _ in range(4)] == ['a', 'b', 'a', 'b']
+    assert [account.name for account in pool.accounts] == ['account-0', 'account-1']
+
+
+def test_quarantine_and_update():
+    pool = AccountPool([{'sid': 'a'}, {'sid': 'b'}], quarantine_time=60)
+    first = pool.acquire()
+    pool.quarantine(first)
+    assert pool.healthy == [pool.accounts[1]]
+    assert {pool.acquire().cookies['sid'] for _ in range(3)} == {'b'}
+
+    pool.quarantine(pool.accounts[1])
+    with pytest.raises(NotAuthException):
+        pool.acquire()
+
+    pool.update('account-0', {'sid': 'fresh'})
+    assert pool.acquire().cookies == {'sid': 'fresh'}
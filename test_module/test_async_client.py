@@ -0,0 +1,758 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import aiohttp
+import pytest
+
+from aw_api import AIOClient, AccountPool, PageStore, ResultCache, RetryPolicy, TokenBucket
+from aw_api.dataobjects import BattalionSearchResultEntry
+from aw_api.enums import GameMode, VehicleType
+from aw_api.instrumentation import Instrumentation
+from aw_api.exceptions import NotAuthException, UserNotFoundException, BattalionSearchTooShortQuery, \
+    BattalionSearchBattalionNotFound, UserHasClosedStatisticsException, BadHTTPStatusCode
+from aw_api.parser import Parser
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as fixture:
+        return fixture.read()
+
+
+class FakeContent:
+    def __init__(self, body, chunk_size):
+        self.__body = body
+        self.__chunk_size = chunk_size
+        self.position = 0
+
+    async def iter_any(self):
+        while self.position < len(self.__body):
+            chunk = self.__body[self.position:self.position + self.__chunk_size]
+            self.position += len(chunk)
+            yield chunk
+
+
+class FakeResponse:
+    def __init__(self, status, body, headers, chunk_size):
+        self.status = status
+        self.headers = headers
+        self.content = FakeContent(body, chunk_size)
+        self.content_length = len(body)
+        self.__body = body
+
+    async def read(self):
+        self.content.position = len(self.__body)
+        return self.__body
+
+    def get_encoding(self):
+        content_type = self.headers.get('Content-Type', '')
+        if 'charset=' not in content_type:
+            raise RuntimeError('Cannot compute fallback encoding of a not yet read body')
+        return content_type.split('charset=')[1]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class FakeSession:
+    """
+    Stands in for aiohttp.ClientSession, answers every request with ``await handler(request)``,
+    where handler returns body or ``(status, body, headers)``
+    """
+    chunk_size = 1024
+
+    def __init__(self, handler, **settings):
+        self.handler = handler
+        self.settings = settings
+        self.requests = []
+        self.responses = []
+        self.closed = False
+
+    def request(self, method, url, headers=None, data=None, cookies=None):
+        request = {'method': method, 'url': url, 'headers': headers, 'data': data, 'cookies': cookies}
+        self.requests.append(request)
+        session = self
+
+        class Context:
+            async def __aenter__(self):
+                result = await session.handler(request)
+                status, body, response_headers = result if isinstance(result, tuple) else (200, result, {})
+                response = FakeResponse(status, body, response_headers, session.chunk_size)
+                session.responses.append(response)
+                return response
+
+            async def __aexit__(self, exc_type, exc_val, exc_tb):
+                pass
+
+        return Context()
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records delays of retries instead of waiting for them"""
+    delays = []
+    sleep = asyncio.sleep
+
+    async def record(delay, *args, **kwargs):
+        delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', record)
+    return delays
+
+
+def query(request):
+    """:return: Query parameters of requested URL, one value per name"""
+    return {name: values[0] for name, values in parse_qs(urlsplit(request['url']).query).items()}
+
+
+class ConcurrencyProbe:
+    """Wraps handler and remembers the highest number of requests handled at the same time"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            # Hold the request for a moment, so other requests start before this one is answered
+            await asyncio.sleep(0.01)
+            return await self.handler(request)
+        finally:
+            self.active -= 1
+
+
+async def search_handler(request):
+    """Answers battalion search like the site does, only battalions starting with "RAGE" exist"""
+    name = request['data']['name']
+    if len(name) < 4:
+        return b'{"error":1}'
+    if not name.casefold().startswith('rage'):
+        return b'{"error":2}'
+    return '{"error":0,"data":{"1305":"RAGE_Team","4871":"RAGE_Титаны"}}'.encode('utf-8')
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """
+    Replaces aiohttp sessions with :class:`FakeSession`. Set ``sessions.handler`` before the first request,
+    created sessions are appended to the list
+    """
+    class Sessions(list):
+        handler = None
+
+    created = Sessions()
+
+    def make_session(**settings):
+        session = FakeSession(created.handler, **settings)
+        created.append(session)
+        return session
+
+    monkeypatch.setattr(aiohttp, 'ClientSession', make_session)
+    monkeypatch.setattr(aiohttp, 'TCPConnector', lambda **settings: settings)
+    return created
+
+
+def test_battalion_roster_fails_over_to_next_account(sessions):
+    async def handler(request):
+        if request['cookies'] == {'sid': 'expired'}:
+            return load_fixture('battalion_not_auth.html')
+        return load_fixture('battalion_small.html')
+
+    sessions.handler = handler
+    pool = AccountPool([{'sid': 'expired'}, {'sid': 'valid'}])
+
+    async def main():
+        async with AIOClient(account_pool=pool) as client:
+            return [player async for player in client.iter_battalion_players(1)]
+
+    assert len(asyncio.run(main())) == 8
+    assert pool.accounts[0].quarantined and not pool.accounts[1].quarantined
+
+
+def test_battalion_roster_fails_when_every_account_is_expired(sessions):
+    async def handler(request):
+        return load_fixture('battalion_not_auth.html')
+
+    sessions.handler = handler
+    pool = AccountPool([{'sid': 'first'}, {'sid': 'second'}])
+
+    async def main():
+        async with AIOClient(account_pool=pool) as client:
+            await client.get_battalion_statistics(1)
+
+    with pytest.raises(NotAuthException):
+        asyncio.run(main())
+    assert len(sessions[0].requests) == 2
+
+
+def test_page_charset_is_honored(sessions):
+    page = load_fixture('stats_normal.html').decode('utf-8')
+
+    async def handler(request):
+        return 200, page.encode('windows-1251'), {'Content-Type': 'text/html; charset=windows-1251'}
+
+    sessions.handler = handler
+
+    async def main():
+        async with AIOClient() as client:
+            return await client.get_statistic_by_nickname('Googlemen')
+
+    assert asyncio.run(main()).battalion_full == 'RAGE_Team'
+
+
+@pytest.mark.parametrize('padding, fully_read', [(1024, True), (1024 * 1024, False)])
+def test_error_page_is_aborted_early(sessions, padding, fully_read):
+    page = load_fixture('stats_not_found.html') + b' ' * padding
+
+    async def handler(request):
+        return page
+
+    sessions.handler = handler
+
+    async def main():
+        async with AIOClient() as client:
+            await client.get_statistic_by_nickname('Nobody')
+
+    with pytest.raises(UserNotFoundException):
+        asyncio.run(main())
+    # Short rest of the page is drained so connection can be reused, long one is left unread
+    response = sessions[0].responses[0]
+    assert (response.content.position == len(page)) is fully_read
+
+
+def test_search_battalion_caches_negative_results(sessions):
+    sessions.handler = search_handler
+    cache = ResultCache(negative_exceptions=(BattalionSearchBattalionNotFound,))
+
+    async def main():
+        async with AIOClient(search_cache=cache) as client:
+            for _ in range(2):
+                assert await client.search_battalion('RAGE') == [
+                    BattalionSearchResultEntry('RAGE_Team', 1305), BattalionSearchResultEntry('RAGE_Титаны', 4871)]
+                with pytest.raises(BattalionSearchBattalionNotFound):
+                    await client.search_battalion('QWERTY')
+            return client.search_index
+
+    index = asyncio.run(main())
+    assert [request['data']['name'] for request in sessions[0].requests] == ['RAGE', 'QWERTY']
+    assert 1305 in index and 4871 in index
+    # Both found and empty results cover longer queries
+    assert index.is_covered('rage_t') and index.is_covered('QWERTYUIOP')
+
+
+def test_search_battalions_many_yields_exceptions(sessions):
+    sessions.handler = search_handler
+
+    async def main():
+        async with AIOClient() as client:
+            return {name: result async for name, result in client.search_battalions_many(['RAGE', 'RA', 'QWERTY'])}
+
+    results = asyncio.run(main())
+    assert [entry.id for entry in results['RAGE']] == [1305, 4871]
+    assert isinstance(results['RA'], BattalionSearchTooShortQuery)
+    assert isinstance(results['QWERTY'], BattalionSearchBattalionNotFound)
+
+
+def test_autocomplete_battalion_uses_index(sessions):
+    sessions.handler = search_handler
+
+    async def main():
+        async with AIOClient() as client:
+            assert [entry.id for entry in await client.autocomplete_battalion('rage')] == [1305, 4871]
+            # Covered by the previous query and too short queries are answered from the index only
+            assert [entry.id for entry in await client.autocomplete_battalion('RAGE_Т')] == [4871]
+            assert [entry.id for entry in await client.autocomplete_battalion('RA', limit=1)] == [1305]
+            assert await client.autocomplete_battalion('QWERTY') == []
+            assert await client.autocomplete_battalion('QWERTYUIOP') == []
+
+    asyncio.run(main())
+    assert [request['data']['name'] for request in sessions[0].requests] == ['rage', 'QWERTY']
+
+
+def test_concurrent_requests_share_one_fetch(sessions):
+    release = None
+
+    async def handler(request):
+        await release.wait()
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = handler
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        async with AIOClient() as client:
+            first = asyncio.ensure_future(client.get_statistic_by_nickname('Googlemen'))
+            second = asyncio.ensure_future(client.get_statistic_by_nickname('Googlemen'))
+            other = asyncio.ensure_future(client.get_statistic_by_nickname('Googlemen', mode=1))
+            await asyncio.sleep(0)
+            release.set()
+            return await asyncio.gather(first, second, other)
+
+    first, second, other = asyncio.run(main())
+    assert first is second and first.nickname == other.nickname == 'Googlemen'
+    # One request for both callers of the same page, another one for different mode
+    assert len(sessions[0].requests) == 2
+
+
+def test_concurrent_requests_share_exception(sessions):
+    release = None
+
+    async def handler(request):
+        await release.wait()
+        return load_fixture('stats_not_found.html')
+
+    sessions.handler = handler
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        async with AIOClient() as client:
+            lookups = [asyncio.ensure_future(client.get_statistic_by_nickname('Nobody')) for _ in range(3)]
+            await asyncio.sleep(0)
+            release.set()
+            return await asyncio.gather(*lookups, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, UserNotFoundException) for result in results)
+    assert len(sessions[0].requests) == 1
+
+
+def test_cancelled_waiter_does_not_cancel_shared_request(sessions):
+    release = None
+
+    async def handler(request):
+        await release.wait()
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = handler
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        async with AIOClient() as client:
+            cancelled = asyncio.ensure_future(client.get_statistic_by_nickname('Googlemen'))
+            waiting = asyncio.ensure_future(client.get_statistic_by_nickname('Googlemen'))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            assert (await waiting).nickname == 'Googlemen'
+            assert cancelled.cancelled()
+            # Finished request is forgotten, the next call fetches the page again
+            await client.get_statistic_by_nickname('Googlemen')
+
+    asyncio.run(main())
+    assert len(sessions[0].requests) == 2
+
+
+@pytest.mark.parametrize('use_executor', [True, False])
+def test_parsing_runs_in_parse_executor(sessions, monkeypatch, use_executor):
+    parse_threads = []
+    parse_player_statistics = Parser.parse_player_statistics
+
+    def recording_parse(self, page, *args):
+        parse_threads.append(threading.current_thread())
+        return parse_player_statistics(self, page, *args)
+
+    async def handler(request):
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = handler
+    monkeypatch.setattr(Parser, 'parse_player_statistics', recording_parse)
+
+    async def main(executor):
+        async with AIOClient(parse_executor=executor) as client:
+            assert (await client.get_statistic_by_nickname('Googlemen')).nickname == 'Googlemen'
+
+    if use_executor:
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='parser') as executor:
+            asyncio.run(main(executor))
+        assert parse_threads[0].name.startswith('parser')
+    else:
+        asyncio.run(main(None))
+        assert parse_threads == [threading.main_thread()]
+
+
+def test_session_is_created_lazily(sessions):
+    async def handler(request):
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = handler
+    # No event loop is running here
+    client = AIOClient(connection_limit=10, keepalive_timeout=30.0, timeout=5)
+    assert sessions == []
+
+    async def main():
+        await client.get_statistic_by_nickname('Googlemen')
+        await client.get_statistic_by_nickname('Googlemen', mode=1)
+        await client.close()
+
+    asyncio.run(main())
+    assert len(sessions) == 1 and sessions[0].closed and len(sessions[0].requests) == 2
+    assert sessions[0].settings['connector']['limit'] == 10
+    assert sessions[0].settings['connector']['keepalive_timeout'] == 30.0
+    assert sessions[0].settings['timeout'].total == 5
+
+    # Closed session is replaced on the next request, e.g. in another event loop
+    asyncio.run(main())
+    assert len(sessions) == 2 and sessions[1].closed
+
+
+def test_all_modes_are_requested_concurrently(sessions):
+    async def handler(request):
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = probe = ConcurrencyProbe(handler)
+
+    async def main():
+        async with AIOClient() as client:
+            return await client.get_all_modes('googlemen')
+
+    snapshot = asyncio.run(main())
+    assert snapshot.nickname == 'Googlemen'
+    assert list(snapshot) == list(GameMode) and snapshot[GameMode.RANKED].battles == 48
+    assert sorted(int(query(request)['mode']) for request in sessions[0].requests) == [0, 1, 2, 3, 4]
+    assert probe.max_active == len(GameMode)
+
+
+def test_all_modes_raise_after_every_request_finished(sessions):
+    async def handler(request):
+        if query(request)['mode'] == '0':
+            return load_fixture('stats_closed.html')
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = ConcurrencyProbe(handler)
+
+    async def main():
+        async with AIOClient() as client:
+            await client.get_all_modes('Googlemen')
+
+    with pytest.raises(UserHasClosedStatisticsException):
+        asyncio.run(main())
+    assert len(sessions[0].requests) == len(sessions[0].responses) == len(GameMode)
+
+
+def test_vehicle_statistics_matrix(sessions):
+    page = load_fixture('stats_normal.html')
+
+    async def handler(request):
+        parameters = query(request)
+        # Answer the first cells last, and tell cells apart by nickname
+        if parameters['type'] == '101':
+            await asyncio.sleep(0.05)
+        cell = f"T{parameters['type']}C{parameters['maintype']}M{parameters['mode']}"
+        return page.replace(b'Googlemen', cell.encode('utf-8'))
+
+    sessions.handler = probe = ConcurrencyProbe(handler)
+
+    async def main():
+        async with AIOClient() as client:
+            return await client.get_vehicle_statistics('Googlemen', tank_ids=[101, 202], vehicle_types=[VehicleType.LT],
+                                                       modes=[GameMode.PVP, 1], concurrency=2)
+
+    matrix = asyncio.run(main())
+    assert len(sessions[0].requests) == len(matrix) == 6 and probe.max_active == 2
+    # Cells are in requested order, not in order of completion
+    assert list(matrix.statistics) == [(vehicle, mode) for vehicle in (101, 202, VehicleType.LT)
+                                       for mode in (GameMode.PVP, GameMode.PVE)]
+    assert matrix[101, 1].nickname == 'T101C0M1'
+    assert matrix[VehicleType.LT, GameMode.PVP].nickname == 'T0C2M0'
+    assert matrix.nickname == 'T101C0M0'
+
+
+def test_battalion_statistics_lookups_overlap_with_roster(sessions, monkeypatch):
+    events = []
+    iter_battalion_players = AIOClient.iter_battalion_players
+    parse_battalion_players = Parser.parse_battalion_players
+
+    def recording_parse(self, page, battalion_id=0):
+        events.append(('parsed', threading.current_thread().name))
+        return parse_battalion_players(self, page, battalion_id)
+
+    async def recording_iter(self, battalion_id):
+        async for player in iter_battalion_players(self, battalion_id):
+            events.append(('yielded', player.id))
+            yield player
+
+    async def handler(request):
+        if '/aliance/' in request['url']:
+            return load_fixture('battalion_small.html')
+        events.append(('lookup', int(query(request)['data'])))
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = probe = ConcurrencyProbe(handler)
+    monkeypatch.setattr(Parser, 'parse_battalion_players', recording_parse)
+    monkeypatch.setattr(AIOClient, 'iter_battalion_players', recording_iter)
+
+    async def main(executor):
+        async with AIOClient(parse_executor=executor) as client:
+            return await client.get_battalion_statistics(1, concurrency=2)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='parser') as executor:
+        battalion = asyncio.run(main(executor))
+    assert len(battalion.members) == len(battalion.statistics) == 8 and not battalion.errors
+    # Roster is parsed in the executor like every other page
+    assert events[0][0] == 'parsed' and events[0][1].startswith('parser')
+    # Members were looked up before the whole roster was handed out, never more than two at a time
+    assert events.index(('lookup', 430427945)) < events.index(('yielded', battalion.members[-1].id))
+    assert probe.max_active == 2
+
+
+def test_battalion_statistics_collects_member_errors(sessions):
+    failing = {486150123: 'stats_closed.html', 476923525: 'stats_not_found.html'}
+
+    async def handler(request):
+        if '/aliance/' in request['url']:
+            return load_fixture('battalion_small.html')
+        return load_fixture(failing.get(int(query(request)['data']), 'stats_normal.html'))
+
+    sessions.handler = handler
+
+    async def main():
+        async with AIOClient() as client:
+            return await client.get_battalion_statistics(1, modes=[GameMode.PVP, GameMode.PVE])
+
+    battalion = asyncio.run(main())
+    assert [member.id for member in battalion.members][:3] == [430427945, 486150123, 476923525]
+    assert len(battalion.statistics) == 12 and len(battalion.errors) == 4
+    assert set(battalion.errors) == {(player_id, mode) for player_id in failing
+                                   for mode in (GameMode.PVP, GameMode.PVE)}
+    assert isinstance(battalion.errors[486150123, GameMode.PVE], UserHasClosedStatisticsException)
+    assert isinstance(battalion.errors[476923525, GameMode.PVP], UserNotFoundException)
+    assert (430427945, GameMode.PVP) in battalion.statistics
+
+
+def test_search_errors_cross_process_pool(sessions):
+    async def handler(request):
+        if 'clan_search' in request['url']:
+            return await search_handler(request)
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = handler
+
+    async def main(executor):
+        async with AIOClient(parse_executor=executor) as client:
+            with pytest.raises(BattalionSearchTooShortQuery) as too_short:
+                await client.search_battalion('RA')
+            assert too_short.value.length == 2
+            with pytest.raises(BattalionSearchBattalionNotFound) as not_found:
+                await client.search_battalion('QWERTY')
+            assert not_found.value.battalion_name == 'QWERTY'
+            # Exceptions came back from the worker, so the pool is still usable
+            return await client.get_statistic_by_nickname('Googlemen')
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        assert asyncio.run(main(executor)).nickname == 'Googlemen'
+
+
+def test_server_error_is_retried(sessions, sleeps):
+    statuses = iter([503, 500, 200])
+
+    async def handler(request):
+        status = next(statuses)
+        return status, load_fixture('stats_normal.html') if status == 200 else b'', {}
+
+    sessions.handler = handler
+
+    async def main():
+        async with AIOClient(retry_policy=RetryPolicy(retries=3, backoff_base=0.1)) as client:
+            return await client.get_statistic_by_nickname('Googlemen')
+
+    assert asyncio.run(main()).nickname == 'Googlemen'
+    assert len(sessions[0].requests) == 3
+    assert len(sleeps) == 2 and all(0 <= delay <= 0.2 for delay in sleeps)
+
+
+def test_retry_after_is_clamped(sessions, sleeps):
+    responses = iter([(503, b'', {'Retry-After': '3600'}), (200, load_fixture('stats_normal.html'), {})])
+
+    async def handler(request):
+        return next(responses)
+
+    sessions.handler = handler
+
+    async def main():
+        async with AIOClient(retry_policy=RetryPolicy(retries=1, max_retry_after=2.5)) as client:
+            await client.get_statistic_by_nickname('Googlemen')
+
+    asyncio.run(main())
+    assert sleeps == [2.5]
+
+
+def test_connection_error_is_retried(sessions, sleeps):
+    async def handler(request):
+        if len(sessions[0].requests) == 1:
+            raise aiohttp.ClientConnectionError('Connection reset by peer')
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = handler
+
+    async def main():
+        async with AIOClient(retry_policy=RetryPolicy(retries=1)) as client:
+            return await client.get_statistic_by_nickname('Googlemen')
+
+    assert asyncio.run(main()).nickname == 'Googlemen'
+    assert len(sessions[0].requests) == 2 and len(sleeps) == 1
+
+
+def test_too_many_requests_slows_limiter_down(sessions, sleeps):
+    responses = iter([(429, b'', {'Retry-After': '0'}), (200, load_fixture('stats_normal.html'), {})])
+
+    async def handler(request):
+        return next(responses)
+
+    sessions.handler = handler
+    limiter = TokenBucket(rate=1000.0, burst=10)
+
+    async def main():
+        async with AIOClient(rate_limiter=limiter, retry_policy=RetryPolicy(retries=1)) as client:
+            await client.get_statistic_by_nickname('Googlemen')
+
+    asyncio.run(main())
+    # Halved by 429, then raised a bit by the successful retry
+    assert limiter.rate == 1000.0 / 2 + 1000.0 / 20
+
+
+def test_gives_up_after_retries(sessions, sleeps):
+    async def handler(request):
+        return 502, b'', {}
+
+    sessions.handler = handler
+
+    async def main():
+        async with AIOClient(retry_policy=RetryPolicy(retries=2, backoff_base=0.0)) as client:
+            await client.get_statistic_by_nickname('Googlemen')
+
+    with pytest.raises(BadHTTPStatusCode) as exc_info:
+        asyncio.run(main())
+    assert exc_info.value.status_code == 502
+    assert len(sessions[0].requests) == 3 and len(sleeps) == 2
+
+
+@pytest.mark.parametrize('revalidation', ['not_modified', 'same_content'])
+def test_page_store_reuses_result_of_unchanged_page(sessions, monkeypatch, revalidation):
+    page = load_fixture('stats_normal.html')
+    parsed_pages = []
+    parse_player_statistics = Parser.parse_player_statistics
+
+    def recording_parse(self, page, *args):
+        parsed_pages.append(page)
+        return parse_player_statistics(self, page, *args)
+
+    async def handler(request):
+        if revalidation == 'not_modified':
+            if request['headers'] and request['headers'].get('If-None-Match') == '"v1"':
+                return 304, b'', {'ETag': '"v1"'}
+            return 200, page, {'ETag': '"v1"'}
+        return page
+
+    sessions.handler = handler
+    monkeypatch.setattr(Parser, 'parse_player_statistics', recording_parse)
+    store = PageStore(':memory:')
+
+    async def main():
+        async with AIOClient(page_store=store) as client:
+            return [await client.get_statistic_by_nickname('Googlemen') for _ in range(2)]
+
+    first, second = asyncio.run(main())
+    assert first == second and second.nickname == 'Googlemen'
+    assert len(sessions[0].requests) == 2 and len(parsed_pages) == 1
+    if revalidation == 'not_modified':
+        assert sessions[0].requests[1]['headers'] == {'If-None-Match': '"v1"'}
+        assert sessions[0].responses[1].status == 304
+
+
+def test_statistics_many_is_bounded_and_yields_errors(sessions):
+    pages = {'Closed': 'stats_closed.html', 'Nobody': 'stats_not_found.html'}
+
+    async def handler(request):
+        return load_fixture(pages.get(query(request)['name'], 'stats_normal.html'))
+
+    sessions.handler = probe = ConcurrencyProbe(handler)
+    nicknames = ['Googlemen', 'Closed', 'Nobody'] + [f'Player{index}' for index in range(7)]
+
+    async def main():
+        async with AIOClient() as client:
+            return {nickname: result async for nickname, result in client.get_statistics_many(nicknames, concurrency=3)}
+
+    results = asyncio.run(main())
+    assert probe.max_active == 3 and len(sessions[0].requests) == len(nicknames)
+    assert isinstance(results.pop('Closed'), UserHasClosedStatisticsException)
+    assert isinstance(results.pop('Nobody'), UserNotFoundException)
+    # Errors of some players did not abort the batch
+    assert len(results) == 8 and all(result.battles == 48 for result in results.values())
+
+
+def test_result_cache_serves_repeated_lookups(sessions):
+    async def handler(request):
+        if query(request)['name'] == 'Nobody':
+            return load_fixture('stats_not_found.html')
+        return load_fixture('stats_normal.html')
+
+    sessions.handler = handler
+    cache = ResultCache()
+
+    async def main():
+        async with AIOClient(cache=cache) as client:
+            first = await client.get_statistic_by_nickname('Googlemen')
+            assert await client.get_statistic_by_nickname('Googlemen') is first
+            errors = []
+            for _ in range(2):
+                with pytest.raises(UserNotFoundException) as exc_info:
+                    await client.get_statistic_by_nickname('Nobody')
+                errors.append(exc_info.value)
+            return errors
+
+    first_error, cached_error = asyncio.run(main())
+    assert len(sessions[0].requests) == 2
+    # Cached exception is raised as a fresh copy every time
+    assert cached_error is not first_error and cached_error.nickname == first_error.nickname
+    assert cache.cache_info().hits == 1 and cache.cache_info().negative_hits == 1
+
+
+def test_instrumentation_events(sessions, sleeps):
+    page = load_fixture('stats_normal.html')
+    statuses = iter([503, 200])
+
+    async def handler(request):
+        status = next(statuses)
+        return status, page if status == 200 else b'', {}
+
+    sessions.handler = handler
+    instrumentation = Instrumentation()
+    fetches, parses, lookups = [], [], []
+    instrumentation.add_fetch_hook(fetches.append)
+    instrumentation.add_parse_hook(parses.append)
+    instrumentation.add_cache_hook(lookups.append)
+
+    async def main():
+        async with AIOClient(cache=ResultCache(), retry_policy=RetryPolicy(retries=1),
+                             instrumentation=instrumentation) as client:
+            for _ in range(2):
+                await client.get_statistic_by_nickname('Googlemen')
+
+    asyncio.run(main())
+    url = sessions[0].requests[0]['url']
+    assert [(event.url, event.method, event.attempt, event.status, event.bytes_received, event.exception)
+            for event in fetches] == [(url, 'GET', 0, 503, 0, None), (url, 'GET', 1, 200, len(page), None)]
+    assert all(0 <= event.time_to_first_byte <= event.elapsed for event in fetches)
+    parse, = parses
+    assert (parse.url, parse.parser, parse.in_event_loop, parse.exception) == (
+        url, 'Parser.parse_player_statistics', True, None)
+    assert [event.result for event in lookups] == ['miss', 'hit']
+    assert lookups[0].key == lookups[1].key == ResultCache.statistics_key('Googlemen', 0, 0, 0, 0, 0)
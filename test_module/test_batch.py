@@ -0,0 +1,55 @@
+import math
+
+import pytest
+
+from aw_api.dataobjects import CompactPlayerStatistics, PlayerStatistics, PlayerStatisticsBatch
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+players = [
+    PlayerStatistics(winrate=65.6, battles=326, damage=6815.85, clantag=None, battalion_full=None,
+                     average_spotting=613.4325153374233, average_kills=2.25, average_level=8.223926380368098,
+                     nickname='IterasuGr1njo'),
+    PlayerStatistics(winrate=87.5, battles=48, damage=2598.97, clantag='R7GEx', battalion_full='RAGE_Team',
+                     average_spotting=900.875, average_kills=1.19, average_level=7.333333333333333,
+                     nickname='Googlemen'),
+    PlayerStatistics(winrate=0.0, battles=0, damage=0.0, clantag=None, battalion_full=None, average_spotting=0.0,
+                     average_kills=0.0, average_level=None, nickname='Newbie'),
+]
+
+
+def test_compact_statistics_round_trip():
+    compact = CompactPlayerStatistics.from_statistics(players[1])
+    assert not hasattr(compact, '__dict__')
+    assert compact['clantag'] == 'R7GEx'
+    assert compact.to_statistics() == players[1]
+
+
+@pytest.fixture(params=[False] + ([True] if numpy is not None else []), ids=lambda use_numpy: f'numpy={use_numpy}')
+def batch(request):
+    return PlayerStatisticsBatch.from_statistics(players, use_numpy=request.param)
+
+
+def test_batch_round_trip(batch):
+    assert len(batch) == 3
+    assert batch.to_statistics() == players
+    assert batch[2].average_level is None
+    assert [item.to_statistics() for item in batch.to_compact_statistics()] == players
+
+
+def test_batch_aggregates(batch):
+    assert batch.total_battles == 374
+    assert batch.mean_winrate() == pytest.approx((65.6 + 87.5) / 3)
+    assert batch.mean_level() == pytest.approx((8.223926380368098 + 7.333333333333333) / 2)
+    assert batch.percentile_damage(50) == pytest.approx(2598.97)
+    assert batch.percentile_winrate(25) == pytest.approx(32.8)
+    assert batch.weighted_mean('winrate') == pytest.approx((65.6 * 326 + 87.5 * 48) / 374)
+
+
+def test_batch_played(batch):
+    played = batch.played()
+    assert [item.nickname for item in played] == ['IterasuGr1njo', 'Googlemen']
+    assert math.isnan(played.played(1000).mean_damage())
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from aw_api.cache import ResultCache
+from aw_api.dataobjects import PlayerStatistics
+from aw_api.exceptions import UserNotFoundException, NotAuthException, BattalionSearchBattalionNotFound
+
+player = PlayerStatistics(winrate=65.6, battles=326, damage=6815.85, clantag=None, nickname='IterasuGr1njo',
+                          average_spotting=613.4325153374233, average_kills=2.25, battalion_full=None,
+                          average_level=8.223926380368098)
+
+
+def test_hit_and_miss():
+    cache = ResultCache()
+    key = cache.statistics_key('IterasuGr1njo', 0, 0, 0, 0)
+    assert cache.get(key) is None
+    cache.set(key, player)
+    assert cache.get(key) is player
+    assert cache.cache_info() == (1, 0, 1, 1024, 1)
+
+
+def test_player_id_overrides_nickname():
+    assert ResultCache.statistics_key('A', 0, 42, 0, 0) == ResultCache.statistics_key('B', 0, 42, 0, 0)
+    assert ResultCache.statistics_key('A', 0, 0, 0, 0) != ResultCache.statistics_key('B', 0, 0, 0, 0)
+
+
+def test_lru_eviction():
+    cache = ResultCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_ttl_expiration():
+    cache = ResultCache(ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_negative_caching():
+    cache = ResultCache()
+    assert cache.set_exception('a', UserNotFoundException('not found', nickname='1'))
+    assert not cache.set_exception('b', NotAuthException('not authenticated'))
+
+    with pytest.raises(UserNotFoundException) as exc_info:
+        cache.get('a')
+    assert exc_info.value.nickname == '1'
+    assert cache.get('b') is None
+    assert cache.cache_info().negative_hits == 1
+
+
+def test_negative_entry_is_raised_as_copy():
+    cache = ResultCache(negative_exceptions=(BattalionSearchBattalionNotFound,))
+    exception = BattalionSearchBattalionNotFound('not found', 'QWERTY')
+    cache.set_exception('a', exception)
+
+    with pytest.raises(BattalionSearchBattalionNotFound) as exc_info:
+        cache.get('a')
+    assert exc_info.value is not exception
+    assert exc_info.value.battalion_name == 'QWERTY' and exc_info.value.args == ('not found',)
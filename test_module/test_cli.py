@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+from aw_api.cli import Checkpoint, crawl, main, read_keys
+from aw_api.dataobjects import PlayerStatistics
+from aw_api.exceptions import UserNotFoundException, BadHTTPStatusCode
+from aw_api.export import open_writer
+
+
+class StubClient:
+    async def get_statistic_by_nickname(self, nickname, mode=0, player_id=0):
+        if nickname == 'missing':
+            raise UserNotFoundException('not found', nickname=nickname)
+        if nickname == 'broken':
+            raise BadHTTPStatusCode('bad status', status_code=500)
+        return PlayerStatistics(winrate=50.0, battles=1, damage=1000.0, clantag=None, battalion_full=None,
+                                average_spotting=500.0, average_kills=1.0, average_level=None, nickname=nickname)
+
+
+def test_read_keys(tmp_path):
+    path = tmp_path / 'keys.txt'
+    path.write_text('# comment\n12\n\n 7 \n12\n', encoding='utf-8')
+    assert read_keys(str(path), 'player-ids') == [12, 7]
+    assert read_keys(str(path), 'nicknames') == ['12', '7']
+
+
+def test_checkpoint_ignores_torn_line(tmp_path):
+    path = str(tmp_path / 'crawl.checkpoint')
+    checkpoint = Checkpoint(path)
+    checkpoint.add_many(['a', 1])
+    checkpoint.close()
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('torn')
+    checkpoint = Checkpoint(path)
+    assert 'a' in checkpoint and 1 in checkpoint and 'torn' not in checkpoint
+
+
+def test_crawl_resumes(tmp_path):
+    output = str(tmp_path / 'players.ndjson')
+    keys = ['first', 'missing', 'broken', 'second']
+    checkpoint = Checkpoint(output + '.checkpoint')
+    checkpoint.add_many(['first'])
+    with open_writer(output, append=True) as writer:
+        summary = asyncio.run(crawl(StubClient(), keys, 'nicknames', writer, checkpoint, batch_size=2))
+    checkpoint.close()
+
+    assert (summary.done, summary.skipped, summary.missing) == (1, 1, 1)
+    assert [key for key, _ in summary.failed] == ['broken']
+    with open(output, encoding='utf-8') as file:
+        assert [json.loads(line)['nickname'] for line in file] == ['second']
+    assert 'missing' in checkpoint and 'broken' not in checkpoint
+
+
+def test_main_rejects_unknown_format(tmp_path, capsys):
+    keys = tmp_path / 'keys.txt'
+    keys.write_text('Player\n', encoding='utf-8')
+    assert main(['nicknames', str(keys), '-o', str(tmp_path / 'out.txt')]) == 2
+    assert 'export format' in capsys.readouterr().err
+
+
+def test_main_rejects_parquet(tmp_path, capsys):
+    keys = tmp_path / 'keys.txt'
+    keys.write_text('Player\n', encoding='utf-8')
+    assert main(['nicknames', str(keys), '-o', str(tmp_path / 'out.parquet')]) == 2
+    assert 'error' in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(['nicknames', str(keys), '-o', str(tmp_path / 'out.bin'), '--format', 'parquet'])
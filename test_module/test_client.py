@@ -0,0 +1,313 @@
+import os
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from aw_api import client as client_module
+from aw_api import PageStore, ResultCache, RetryPolicy, TokenBucket
+from aw_api.client import Client
+from aw_api.dataobjects import BattalionSearchResultEntry
+from aw_api.exceptions import BadHTTPStatusCode, BattalionNotFound, UserHasClosedStatisticsException, \
+    UserNotFoundException, BattalionSearchBattalionNotFound
+from aw_api.instrumentation import Instrumentation
+from aw_api.parser import Parser
+
+# Synchronous client is deprecated, every construction warns
+pytestmark = pytest.mark.filterwarnings('ignore::DeprecationWarning')
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as fixture:
+        return fixture.read()
+
+
+def query(request):
+    """:return: Query parameters of requested URL, one value per name"""
+    return {name: values[0] for name, values in parse_qs(urlsplit(request.url).query).items()}
+
+
+class FakeAdapter(HTTPAdapter):
+    """
+    Transport adapter that answers every request with ``handler(request)``,
+    where handler returns body or ``(status, body, headers)``, or raises
+    """
+
+    def __init__(self, handler, **settings):
+        super().__init__(**settings)
+        self.handler = handler
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        result = self.handler(request)
+        status, body, headers = result if isinstance(result, tuple) else (200, result, {})
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        return response
+
+
+@pytest.fixture
+def adapters(monkeypatch):
+    """
+    Replaces transport adapters mounted by :class:`Client` with :class:`FakeAdapter`.
+    Set ``adapters.handler`` before the first request, created adapters are appended to the list
+    """
+    class Adapters(list):
+        handler = None
+
+    created = Adapters()
+
+    def make_adapter(**settings):
+        adapter = FakeAdapter(lambda request: created.handler(request), **settings)
+        created.append(adapter)
+        return adapter
+
+    monkeypatch.setattr(client_module, 'HTTPAdapter', make_adapter)
+    return created
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records delays of retries instead of waiting for them"""
+    delays = []
+    monkeypatch.setattr(time, 'sleep', delays.append)
+    return delays
+
+
+def test_server_error_is_retried(adapters, sleeps):
+    statuses = iter([503, 500, 200])
+
+    def handler(request):
+        status = next(statuses)
+        return status, load_fixture('stats_normal.html') if status == 200 else b'', {}
+
+    adapters.handler = handler
+    with Client(retry_policy=RetryPolicy(retries=3, backoff_base=0.1)) as client:
+        assert client.get_statistic_by_nickname('Googlemen').nickname == 'Googlemen'
+    assert len(adapters[0].requests) == 3
+    assert len(sleeps) == 2 and all(0 <= delay <= 0.2 for delay in sleeps)
+
+
+def test_retry_after_is_clamped(adapters, sleeps):
+    responses = iter([(503, b'', {'Retry-After': '3600'}), (200, load_fixture('stats_normal.html'), {})])
+    adapters.handler = lambda request: next(responses)
+    with Client(retry_policy=RetryPolicy(retries=1, max_retry_after=2.5)) as client:
+        client.get_statistic_by_nickname('Googlemen')
+    assert sleeps == [2.5]
+
+
+def test_connection_error_is_retried(adapters, sleeps):
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise requests.ConnectionError('Connection reset by peer')
+        return load_fixture('stats_normal.html')
+
+    adapters.handler = handler
+    with Client(retry_policy=RetryPolicy(retries=1)) as client:
+        assert client.get_statistic_by_nickname('Googlemen').nickname == 'Googlemen'
+    assert len(attempts) == 2 and len(sleeps) == 1
+
+
+def test_too_many_requests_slows_limiter_down(adapters, sleeps):
+    responses = iter([(429, b'', {'Retry-After': '0'}), (200, load_fixture('stats_normal.html'), {})])
+    adapters.handler = lambda request: next(responses)
+    limiter = TokenBucket(rate=1000.0, burst=10)
+    with Client(rate_limiter=limiter, retry_policy=RetryPolicy(retries=1)) as client:
+        client.get_statistic_by_nickname('Googlemen')
+    # Halved by 429, then raised a bit by the successful retry
+    assert limiter.rate == 1000.0 / 2 + 1000.0 / 20
+
+
+def test_gives_up_after_retries(adapters, sleeps):
+    adapters.handler = lambda request: (502, b'', {})
+    with Client(retry_policy=RetryPolicy(retries=2, backoff_base=0.0)) as client:
+        with pytest.raises(BadHTTPStatusCode) as exc_info:
+            client.get_statistic_by_nickname('Googlemen')
+    assert exc_info.value.status_code == 502
+    assert len(adapters[0].requests) == 3 and len(sleeps) == 2
+
+
+def test_status_outside_retry_statuses_is_not_retried(adapters, sleeps):
+    adapters.handler = lambda request: (403, b'', {})
+    with Client(retry_policy=RetryPolicy(retries=2)) as client:
+        with pytest.raises(BadHTTPStatusCode):
+            client.get_statistic_by_nickname('Googlemen')
+    assert len(adapters[0].requests) == 1 and sleeps == []
+
+
+@pytest.mark.parametrize('revalidation', ['not_modified', 'same_content'])
+def test_page_store_reuses_result_of_unchanged_page(adapters, monkeypatch, revalidation):
+    page = load_fixture('stats_normal.html')
+    parsed_pages = []
+    parse_player_statistics = Parser.parse_player_statistics
+
+    def recording_parse(self, page, *args):
+        parsed_pages.append(page)
+        return parse_player_statistics(self, page, *args)
+
+    def handler(request):
+        if revalidation == 'not_modified':
+            if request.headers.get('If-None-Match') == '"v1"':
+                return 304, b'', {'ETag': '"v1"'}
+            return 200, page, {'ETag': '"v1"'}
+        return page
+
+    adapters.handler = handler
+    monkeypatch.setattr(Parser, 'parse_player_statistics', recording_parse)
+    with Client(page_store=PageStore(':memory:')) as client:
+        first, second = [client.get_statistic_by_nickname('Googlemen') for _ in range(2)]
+    assert first == second and second.nickname == 'Googlemen'
+    assert len(adapters[0].requests) == 2 and len(parsed_pages) == 1
+    if revalidation == 'not_modified':
+        assert adapters[0].requests[1].headers['If-None-Match'] == '"v1"'
+
+
+def test_statistics_many_uses_parser_per_thread(adapters, monkeypatch):
+    pages = {'Closed': 'stats_closed.html', 'Nobody': 'stats_not_found.html'}
+    # The first two requests wait for each other, so both worker threads are busy at once
+    both_started = threading.Barrier(2)
+    lock = threading.Lock()
+    parsers = {}
+    parse_player_statistics = Parser.parse_player_statistics
+
+    def recording_parse(self, page, *args):
+        with lock:
+            parsers.setdefault(threading.current_thread().name, set()).add(id(self))
+        return parse_player_statistics(self, page, *args)
+
+    def handler(request):
+        if len(adapters[0].requests) <= 2:
+            both_started.wait(timeout=5)
+        return load_fixture(pages.get(query(request)['name'], 'stats_normal.html'))
+
+    adapters.handler = handler
+    monkeypatch.setattr(Parser, 'parse_player_statistics', recording_parse)
+    nicknames = ['Googlemen', 'Closed', 'Nobody'] + [f'Player{index}' for index in range(5)]
+    with Client(max_workers=2) as client:
+        results = dict(client.get_statistics_many(nicknames))
+
+    assert isinstance(results.pop('Closed'), UserHasClosedStatisticsException)
+    assert isinstance(results.pop('Nobody'), UserNotFoundException)
+    assert len(results) == 6 and all(result.nickname == 'Googlemen' for result in results.values())
+    # Every worker thread parsed with its own parser
+    assert len(parsers) == 2 and all(len(instances) == 1 for instances in parsers.values())
+    assert len(set.union(*parsers.values())) == 2
+
+
+def test_battalions_many_yields_missing_battalions(adapters):
+    def handler(request):
+        if query(request)['data'] == '2':
+            return load_fixture('battalion_not_found.html')
+        return load_fixture('battalion_small.html')
+
+    adapters.handler = handler
+    with Client(max_workers=2) as client:
+        results = dict(client.get_battalions_many([1, 2, 3]))
+
+    assert isinstance(results[2], BattalionNotFound)
+    assert [len(results[1]), len(results[3])] == [8, 8]
+    assert results[3][0].battalion_id == 3
+
+
+def test_result_cache_serves_repeated_lookups(adapters):
+    def handler(request):
+        if query(request)['name'] == 'Nobody':
+            return load_fixture('stats_not_found.html')
+        return load_fixture('stats_normal.html')
+
+    adapters.handler = handler
+    cache = ResultCache()
+    errors = []
+    with Client(cache=cache) as client:
+        first = client.get_statistic_by_nickname('Googlemen')
+        assert client.get_statistic_by_nickname('Googlemen') is first
+        for _ in range(2):
+            with pytest.raises(UserNotFoundException) as exc_info:
+                client.get_statistic_by_nickname('Nobody')
+            errors.append(exc_info.value)
+
+    assert len(adapters[0].requests) == 2
+    # Cached exception is raised as a fresh copy every time
+    assert errors[1] is not errors[0] and errors[1].nickname == errors[0].nickname
+    assert cache.cache_info().hits == 1 and cache.cache_info().negative_hits == 1
+
+
+def test_instrumentation_events(adapters, sleeps):
+    page = load_fixture('stats_normal.html')
+    statuses = iter([503, 200])
+
+    def handler(request):
+        status = next(statuses)
+        return status, page if status == 200 else b'', {}
+
+    adapters.handler = handler
+    instrumentation = Instrumentation()
+    fetches, parses, lookups = [], [], []
+    instrumentation.add_fetch_hook(fetches.append)
+    instrumentation.add_parse_hook(parses.append)
+    instrumentation.add_cache_hook(lookups.append)
+    with Client(cache=ResultCache(), retry_policy=RetryPolicy(retries=1), instrumentation=instrumentation) as client:
+        for _ in range(2):
+            client.get_statistic_by_nickname('Googlemen')
+
+    url = adapters[0].requests[0].url
+    assert [(event.url, event.method, event.attempt, event.status, event.bytes_received, event.exception)
+            for event in fetches] == [(url, 'GET', 0, 503, 0, None), (url, 'GET', 1, 200, len(page), None)]
+    parse, = parses
+    assert (parse.url, parse.parser, parse.in_event_loop, parse.exception) == (
+        url, 'Parser.parse_player_statistics', False, None)
+    assert [event.result for event in lookups] == ['miss', 'hit']
+
+
+def search_handler(request):
+    """Answers battalion search like the site does, only battalions starting with "RAGE" exist"""
+    name = parse_qs(request.body)['name'][0]
+    if len(name) < 4:
+        return b'{"error":1}'
+    if not name.casefold().startswith('rage'):
+        return b'{"error":2}'
+    return '{"error":0,"data":{"1305":"RAGE_Team","4871":"RAGE_Титаны"}}'.encode('utf-8')
+
+
+def search_queries(adapter):
+    return [parse_qs(request.body)['name'][0] for request in adapter.requests]
+
+
+def test_search_battalion_is_cached(adapters):
+    adapters.handler = search_handler
+    cache = ResultCache(negative_exceptions=(BattalionSearchBattalionNotFound,))
+    with Client(search_cache=cache) as client:
+        for _ in range(2):
+            assert client.search_battalion('RAGE') == [
+                BattalionSearchResultEntry('RAGE_Team', 1305), BattalionSearchResultEntry('RAGE_Титаны', 4871)]
+            with pytest.raises(BattalionSearchBattalionNotFound):
+                client.search_battalion('QWERTY')
+        assert 1305 in client.search_index and 4871 in client.search_index
+    assert search_queries(adapters[0]) == ['RAGE', 'QWERTY']
+    assert cache.cache_info().hits == 1 and cache.cache_info().negative_hits == 1
+
+
+def test_autocomplete_battalion_uses_index(adapters):
+    adapters.handler = search_handler
+    with Client() as client:
+        assert [entry.id for entry in client.autocomplete_battalion('rage')] == [1305, 4871]
+        # Covered by the previous query and too short queries are answered from the index only
+        assert [entry.id for entry in client.autocomplete_battalion('RAGE_Т')] == [4871]
+        assert [entry.id for entry in client.autocomplete_battalion('RA', limit=1)] == [1305]
+        assert client.autocomplete_battalion('QWERTY') == []
+        assert client.autocomplete_battalion('QWERTYUIOP') == []
+    assert search_queries(adapters[0]) == ['rage', 'QWERTY']
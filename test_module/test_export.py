@@ -0,0 +1,82 @@
+import asyncio
+import csv
+import json
+import os
+
+import pytest
+
+from aw_api.dataobjects import PlayerStatistics, BattalionMemberEntry
+from aw_api.export import NDJSONWriter, export, export_async, open_writer
+
+players = [PlayerStatistics(winrate=50.0 + index, battles=index, damage=1000.0, clantag=None, battalion_full='RAGE',
+                            average_spotting=500.0, average_kills=1.0, average_level=None, nickname=f'Player{index}')
+           for index in range(5)]
+members = [BattalionMemberEntry(nickname=f'Player{index}', id=index, role='Рядовой', battalion_id=1305)
+           for index in range(5)]
+
+
+def test_ndjson_batches(tmp_path):
+    path = str(tmp_path / 'players.ndjson')
+    with NDJSONWriter(path, batch_size=2) as writer:
+        writer.write_many(players[:3])
+        # Full batch is on disk, the third player is still in memory
+        assert writer.written == 2
+        with open(path, encoding='utf-8') as file:
+            assert len(file.readlines()) == 2
+    with open(path, encoding='utf-8') as file:
+        rows = [json.loads(line) for line in file]
+    assert [PlayerStatistics(**row) for row in rows] == players[:3]
+
+
+def test_sync_fsyncs_file(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, 'fsync', synced.append)
+    path = str(tmp_path / 'players.csv')
+    with open_writer(path, batch_size=10) as writer:
+        writer.write_many(players[:3])
+        writer.sync()
+        assert writer.written == 3 and len(synced) == 1
+    with pytest.raises(ValueError):
+        writer.sync()
+
+
+def test_csv_append(tmp_path):
+    path = str(tmp_path / 'members.csv')
+    assert export(members[:2], path) == 2
+    assert export(members[2:], path, append=True) == 3
+    with open(path, encoding='utf-8', newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row['nickname'] for row in rows] == [member.nickname for member in members]
+    assert rows[0]['role'] == 'Рядовой'
+
+
+def test_export_async(tmp_path):
+    async def stream():
+        for member in members:
+            yield member
+
+    path = str(tmp_path / 'members.jsonl')
+    assert asyncio.run(export_async(stream(), path, batch_size=2)) == 5
+    with open(path, encoding='utf-8') as file:
+        assert [BattalionMemberEntry(**json.loads(line)) for line in file] == members
+
+
+def test_errors(tmp_path):
+    with pytest.raises(ValueError):
+        open_writer(str(tmp_path / 'players.txt'))
+    with pytest.raises(TypeError):
+        export(players[:1] + members[:1], str(tmp_path / 'mixed.csv'))
+
+
+def test_parquet(tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'players.parquet')
+    assert export(players, path, batch_size=2) == 5
+    table = parquet.read_table(path)
+    assert table.num_rows == 5 and table.column('average_level').null_count == 5
+    # Rows are not durable before the footer is written on close
+    with open_writer(str(tmp_path / 'synced.parquet')) as writer:
+        assert not writer.resumable
+        writer.write(players[0])
+        with pytest.raises(ValueError):
+            writer.sync()
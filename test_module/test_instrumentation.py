@@ -0,0 +1,34 @@
+from aw_api.instrumentation import Instrumentation
+from aw_api.exceptions import UserNotFoundException
+
+
+def test_recorders_are_not_created_without_hooks():
+    instrumentation = Instrumentation()
+    assert instrumentation.record_fetch('url') is None
+    assert instrumentation.record_parse('url', len, in_event_loop=True) is None
+
+
+def test_fetch_event():
+    instrumentation = Instrumentation()
+    events = []
+    instrumentation.add_fetch_hook(events.append)
+    recorder = instrumentation.record_fetch('url', attempt=1)
+    recorder.first_byte(200)
+    recorder.finish(bytes_received=10)
+    event, = events
+    assert (event.url, event.attempt, event.status, event.bytes_received, event.exception) == ('url', 1, 200, 10, None)
+    assert 0 <= event.time_to_first_byte <= event.elapsed
+
+
+def test_slow_parse_and_failing_hook():
+    instrumentation = Instrumentation(slow_parse_threshold=0)
+    slow = []
+    instrumentation.add_parse_hook(lambda event: 1 / 0)
+    instrumentation.add_slow_parse_hook(slow.append)
+    exc = UserNotFoundException('not found')
+    instrumentation.record_parse('url', len, in_event_loop=True).finish(exc)
+    instrumentation.record_parse('url', len, in_event_loop=False).finish()
+    assert [(event.parser, event.in_event_loop, event.exception) for event in slow] == [('len', True, exc)]
+
+    instrumentation.remove_hook(slow.append)
+    assert instrumentation.slow_parse_hooks == []
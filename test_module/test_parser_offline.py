@@ -0,0 +1,134 @@
+import os
+
+import pytest
+
+from aw_api.backends import available_backends
+from aw_api.dataobjects import BattalionMemberEntry, BattalionSearchResultEntry, PlayerStatistics
+from aw_api.exceptions import NotAuthException, UserNotFoundException, UserHasClosedStatisticsException, \
+    BattalionNotFound, BattalionSearchTooShortQuery, BattalionSearchBattalionNotFound
+from aw_api.parser import Parser
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as fixture:
+        return fixture.read()
+
+
+def roster_page(*entries):
+    return ('<html><body><div class="header"></div><div class="aliance"><div class="cont">'
+            '<div class="head">Игрок / Звание</div>' + ''.join(entries) + '</div></div></body></html>')
+
+
+@pytest.fixture(params=available_backends())
+def parser(request):
+    return Parser(request.param)
+
+
+class TestPlayerStatistics:
+    def test_normal(self, parser):
+        assert parser.parse_player_statistics(load_fixture('stats_normal.html')) == PlayerStatistics(
+            winrate=87.5, battles=48, damage=2598.97, clantag='R7GEx', battalion_full='RAGE_Team',
+            average_spotting=900.875, average_kills=1.19, average_level=7.333333333333333, nickname='Googlemen')
+
+    def test_no_battalion(self, parser):
+        assert parser.parse_player_statistics(load_fixture('stats_no_battalion.html')) == PlayerStatistics(
+            winrate=65.6, battles=326, damage=6815.85, clantag=None, battalion_full=None,
+            average_spotting=613.4325153374233, average_kills=2.25, average_level=8.223926380368098,
+            nickname='IterasuGr1njo')
+
+    def test_no_battles(self, parser):
+        assert parser.parse_player_statistics(load_fixture('stats_no_battles.html')) == PlayerStatistics(
+            winrate=0.0, battles=0, damage=0.0, clantag=None, battalion_full=None, average_spotting=0.0,
+            average_kills=0.0, average_level=None, nickname='IterasuGr1njo')
+
+    def test_no_levels(self, parser):
+        assert parser.parse_player_statistics(load_fixture('stats_no_levels.html')) == PlayerStatistics(
+            winrate=65.6, battles=32, damage=8611.4, clantag=None, battalion_full=None, average_spotting=422.28125,
+            average_kills=2.81, average_level=None, nickname='IterasuGr1njo')
+
+    @pytest.mark.parametrize('fixture_name, exception', [
+        ('stats_closed.html', UserHasClosedStatisticsException),
+        ('stats_not_found.html', UserNotFoundException),
+        ('stats_not_auth.html', NotAuthException),
+        ('stats_not_auth_signup.html', NotAuthException),
+    ])
+    def test_error_pages(self, parser, fixture_name, exception):
+        with pytest.raises(exception):
+            parser.parse_player_statistics(load_fixture(fixture_name), 'Tuka_Chinchilla')
+
+    def test_bytes(self, parser):
+        page = load_fixture('stats_normal.html')
+        assert parser.parse_player_statistics(page.encode('utf-8')) == parser.parse_player_statistics(page)
+
+    @pytest.mark.parametrize('fixture_name, exception', [
+        ('stats_closed.html', UserHasClosedStatisticsException),
+        ('stats_not_found.html', UserNotFoundException),
+        ('stats_not_auth.html', NotAuthException),
+        ('stats_not_auth_signup.html', NotAuthException),
+    ])
+    def test_error_pages_are_recognized_by_head(self, parser, fixture_name, exception):
+        with pytest.raises(exception):
+            parser.check_player_statistics_head(load_fixture(fixture_name), 'Tuka_Chinchilla')
+
+    def test_normal_page_head(self, parser):
+        page = load_fixture('stats_normal.html')
+        assert parser.check_player_statistics_head(page[:100]) is False
+        assert parser.check_player_statistics_head(page) is True
+
+
+class TestBattalionPlayers:
+    @pytest.mark.parametrize('fixture_name, size', [
+        ('battalion_small.html', 8), ('battalion_medium.html', 60), ('battalion_large.html', 600)
+    ])
+    def test_roster(self, parser, fixture_name, size):
+        players = list(parser.parse_battalion_players(load_fixture(fixture_name), 42))
+        assert len(players) == size
+        assert players[0].role == 'Командир'
+        assert all(isinstance(player, BattalionMemberEntry) and player.battalion_id == 42 for player in players)
+
+    def test_small_roster_entries(self, parser):
+        players = list(parser.parse_battalion_players(load_fixture('battalion_small.html'), 1))
+        # BattalionMemberEntry equality ignores nickname, so fields are compared explicitly
+        assert [(p.nickname, p.id, p.role, p.battalion_id) for p in players[:2]] == [
+            ('WqyfkrFAZ', 430427945, 'Командир', 1), ('6_6X', 486150123, 'Офицер', 1)]
+
+    def test_entities_are_unescaped(self, parser):
+        page = roster_page('<div><a href="/user/stats?data=1">Tom&amp;&quot;Jerry&quot;</a><br/>'
+                           '<span>Rock &amp; &quot;Roll&quot;</span></div>')
+        assert [(p.nickname, p.id, p.role) for p in parser.parse_battalion_players(page)] == [
+            ('Tom&"Jerry"', 1, 'Rock & "Roll"')]
+
+    def test_attributes_split_across_lines(self, parser):
+        page = roster_page('<div>\n  <a\n    class="user"\n    href="/user/stats?data=2"\n    target="_blank">Jerry</a>'
+                           '\n  <br />\n  <span>Офицер</span>\n</div>')
+        assert [(p.nickname, p.id, p.role) for p in parser.parse_battalion_players(page)] == [
+            ('Jerry', 2, 'Офицер')]
+
+    def test_nickname_with_spaces(self, parser):
+        page = roster_page('<div><a href="/user/stats?data=3">Big Bad  Wolf</a><br/><span>Рядовой</span></div>')
+        assert [(p.nickname, p.id, p.role) for p in parser.parse_battalion_players(page)] == [
+            ('Big Bad  Wolf', 3, 'Рядовой')]
+
+    @pytest.mark.parametrize('fixture_name, exception', [
+        ('battalion_not_found.html', BattalionNotFound),
+        ('battalion_not_auth.html', NotAuthException),
+    ])
+    def test_error_pages(self, parser, fixture_name, exception):
+        with pytest.raises(exception):
+            list(parser.parse_battalion_players(load_fixture(fixture_name)))
+
+
+class TestBattalionSearch:
+    def test_found(self):
+        content = '{"error":0,"data":{"1305":"RAGE_Team","4871":"RAGE_\\u0422\\u0438\\u0442\\u0430\\u043d\\u044b"}}'
+        assert Parser().parse_battalion_search(content.encode('utf-8'), 'RAGE') == [
+            BattalionSearchResultEntry('RAGE_Team', 1305), BattalionSearchResultEntry('RAGE_Титаны', 4871)]
+
+    def test_errors(self):
+        with pytest.raises(BattalionSearchTooShortQuery) as too_short:
+            Parser().parse_battalion_search(b'{"error":1}', 'RA')
+        assert too_short.value.length == 2
+        with pytest.raises(BattalionSearchBattalionNotFound):
+            Parser().parse_battalion_search('{"error":2}', 'QWERTYUIOP')
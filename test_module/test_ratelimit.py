@@ -0,0 +1,46 @@
+import time
+from email.utils import formatdate
+
+from aw_api.ratelimit import TokenBucket, RetryPolicy, parse_retry_after
+
+
+def test_burst_is_free_and_then_limited():
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert 0.09 < bucket.reserve() <= 0.1
+
+
+def test_adaptive_rate():
+    bucket = TokenBucket(rate=8, min_rate=1)
+    for _ in range(10):
+        bucket.penalize()
+    assert bucket.rate == 1
+    for _ in range(100):
+        bucket.reward()
+    assert bucket.rate == 8
+
+
+def test_non_adaptive_rate():
+    bucket = TokenBucket(rate=8, adaptive=False)
+    bucket.penalize()
+    assert bucket.rate == 8
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(retries=2, backoff_base=1, backoff_max=3)
+    assert policy.can_retry(1) and not policy.can_retry(2)
+    assert all(0 <= policy.delay(10) <= 3 for _ in range(100))
+    assert policy.delay(0, '2') == 2
+
+
+def test_retry_after_is_clamped():
+    assert RetryPolicy(backoff_max=3).delay(0, '86400') == 3
+    assert RetryPolicy(backoff_max=3, max_retry_after=60).delay(0, '86400') == 60
+    assert RetryPolicy(backoff_max=3, max_retry_after=60).delay(0, '7') == 7
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('garbage') is None
+    assert parse_retry_after('120') == 120
+    assert 50 < parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
@@ -0,0 +1,32 @@
+from aw_api.dataobjects import BattalionSearchResultEntry
+from aw_api.search_index import BattalionSearchIndex
+
+rage = BattalionSearchResultEntry('RAGE_Team', 1)
+rage_two = BattalionSearchResultEntry('Rage Two', 2)
+other = BattalionSearchResultEntry('Steel Wolves', 3)
+
+
+def test_prefix_search():
+    index = BattalionSearchIndex([other, rage_two, rage])
+    assert index.search('rag') == [rage_two, rage]
+    assert index.search('RAGE_', limit=5) == [rage]
+    assert index.search('rag', limit=1) == [rage_two]
+    assert index.search('x') == []
+    assert len(index) == 3 and 3 in index
+
+
+def test_rename():
+    index = BattalionSearchIndex([rage])
+    index.add([BattalionSearchResultEntry('Calm_Team', 1)])
+    assert index.search('rage') == []
+    assert index.search('calm') == [BattalionSearchResultEntry('Calm_Team', 1)]
+    assert len(index) == 1
+
+
+def test_covered_queries():
+    index = BattalionSearchIndex()
+    index.add([rage, rage_two], query='Rage')
+    assert index.is_covered('rage_t')
+    assert index.is_covered('RAGE')
+    assert not index.is_covered('rag')
+    assert not index.is_covered('steel')
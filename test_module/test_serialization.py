@@ -0,0 +1,72 @@
+import pickle
+import struct
+
+import pytest
+
+from aw_api import serialization
+from aw_api.dataobjects import PlayerStatistics, CompactPlayerStatistics, BattalionMemberEntry, \
+    BattalionSearchResultEntry
+
+player = PlayerStatistics(winrate=65.6, battles=326, damage=6815.85, clantag=None, nickname='IterasuGr1njo',
+                          average_spotting=613.4325153374233, average_kills=2.25, battalion_full=None,
+                          average_level=None)
+member = BattalionMemberEntry(nickname='T57Heavy-Tank', id=458829630, role='Рядовой', battalion_id=1305)
+search_result = BattalionSearchResultEntry('RAGE_Team', 1305)
+
+
+@pytest.mark.parametrize('obj', [player, member, search_result])
+def test_round_trip(obj):
+    assert serialization.decode(serialization.encode(obj)) == obj
+    assert serialization.from_json(serialization.to_json(obj)) == obj
+    assert serialization.decode_many(serialization.encode_many([obj, obj])) == [obj, obj]
+    assert serialization.from_json_many(serialization.to_json_many([obj])) == [obj]
+
+
+def test_compact_statistics_and_empty_list():
+    assert serialization.decode(serialization.encode(CompactPlayerStatistics.from_statistics(player))) == player
+    assert serialization.decode_many(serialization.encode_many([])) == []
+    assert serialization.from_json_many(serialization.to_json_many([])) == []
+    with pytest.raises(TypeError):
+        serialization.encode_many([player, member])
+
+
+def test_versioning():
+    data = bytearray(serialization.encode(player))
+    data[3] = serialization.FORMAT_VERSION + 1
+    with pytest.raises(ValueError):
+        serialization.decode(bytes(data))
+    with pytest.raises(ValueError):
+        serialization.from_json('{"version": %d, "type": "player_statistics", "data": {}}'
+                                % (serialization.FORMAT_VERSION + 1))
+
+
+def test_dumps_is_data_only():
+    players = [PlayerStatistics(50.0, index, 1000.0, 'TAG', 'Battalion', 500.0, 1.0, None, f'Player{index}')
+               for index in range(50)]
+    assert len(serialization.dumps(players)) < len(pickle.dumps(players))
+    assert serialization.loads(serialization.dumps(players)) == players
+    with pytest.raises(TypeError):
+        serialization.dumps({'a': 1})
+    with pytest.raises(ValueError):
+        serialization.loads(pickle.dumps([member]))
+
+
+def test_long_strings(monkeypatch):
+    longest = PlayerStatistics(50.0, 1, 1000.0, None, None, 500.0, 1.0, None, 'a' * 0xFFFF)
+    assert serialization.decode(serialization.encode(longest)).nickname == 'a' * 0xFFFF
+    # Lengths are 4 bytes long, so too long string is emulated with 2 bytes long ones
+    monkeypatch.setattr(serialization, '_LENGTH', struct.Struct('<H'))
+    with pytest.raises(ValueError):
+        serialization.encode(longest)
+
+
+def test_unknown_versions_and_types():
+    # Version 1 was never released, its data is not decoded
+    data = b'AWD\x01\x02\x00' + struct.pack('<qq', member.id, member.battalion_id) + \
+        struct.pack('<H', len(member.nickname)) + member.nickname.encode('utf-8') + struct.pack('<H', 0xFFFF)
+    with pytest.raises(ValueError):
+        serialization.decode(data)
+    with pytest.raises(ValueError, match='Unknown type'):
+        serialization.from_json('{"version": 2, "type": "tank", "data": {}}')
+    with pytest.raises(ValueError, match='Unknown type'):
+        serialization.from_json_many('{"version": 2, "type": "tank", "items": [{}]}')
@@ -0,0 +1,69 @@
+import pickle
+
+import pytest
+
+from aw_api import serialization
+from aw_api.dataobjects import PlayerStatistics
+from aw_api.store import PageStore
+
+player = PlayerStatistics(winrate=65.6, battles=326, damage=6815.85, clantag=None, nickname='IterasuGr1njo',
+                          average_spotting=613.4325153374233, average_kills=2.25, battalion_full=None,
+                          average_level=8.223926380368098)
+
+
+def test_put_and_load():
+    store = PageStore(':memory:')
+    assert store.get('url') is None
+    store.put('url', '<html>page</html>', etag='"abc"', parse_key='parse', parsed=player)
+    entry = store.get('url')
+    assert entry.content_hash == PageStore.hash_page('<html>page</html>'.encode('utf-8'))
+    assert entry.parse_key == 'parse'
+    assert store.load(entry) == player
+    assert len(store) == 1
+
+
+def test_conditional_headers_and_touch():
+    store = PageStore(':memory:')
+    assert store.conditional_headers(store.get('url')) == {}
+    store.put('url', 'page', etag='"abc"', last_modified='Wed, 21 Oct 2015 07:28:00 GMT', parse_key='parse', parsed=player)
+    assert store.conditional_headers(store.get('url')) == {'If-None-Match': '"abc"',
+                                                           'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    store.touch('url', etag='"def"')
+    entry = store.get('url')
+    assert entry.etag == '"def"' and entry.last_modified == 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert store.load(entry) == player
+
+
+def test_survives_reopening(tmp_path):
+    path = str(tmp_path / 'pages.sqlite3')
+    with PageStore(path) as store:
+        store.put('url', 'page', parse_key='parse', parsed=player)
+    with PageStore(path) as store:
+        assert store.load(store.get('url')) == player
+        store.invalidate('url')
+        assert store.get('url') is None
+
+
+def test_rejects_code_by_default(tmp_path):
+    path = str(tmp_path / 'pages.sqlite3')
+    with PageStore(path, dumps=pickle.dumps, loads=pickle.loads) as store:
+        store.put('url', 'page', parse_key='parse', parsed={'any': 'object'})
+        assert store.load(store.get('url')) == {'any': 'object'}
+    with PageStore(path) as store:
+        # Pickled row is not unpickled, the page is treated as never stored
+        assert store.get('url') is None
+        with pytest.raises(TypeError):
+            store.put('url', 'page', parse_key='parse', parsed={'any': 'object'})
+
+
+def test_stored_result_is_decoded_once():
+    decoded = []
+
+    def loads(data):
+        decoded.append(data)
+        return serialization.loads(data)
+
+    store = PageStore(':memory:', loads=loads)
+    store.put('url', 'page', parse_key='parse', parsed=player)
+    assert store.load(store.get('url')) == player
+    assert len(decoded) == 1
@@ -0,0 +1,72 @@
+import asyncio
+import dataclasses
+import types
+
+from aw_api.dataobjects import PlayerStatistics, PlayerStatisticsDelta
+from aw_api.enums import GameMode
+from aw_api.exceptions import UserHasClosedStatisticsException
+from aw_api import tracker as tracker_module
+from aw_api.tracker import PlayerTracker
+
+player = PlayerStatistics(winrate=50.0, battles=100, damage=2000.0, clantag=None, battalion_full=None,
+                          average_spotting=500.0, average_kills=1.0, average_level=8.0, nickname='Googlemen')
+
+
+class FakeClient:
+    def __init__(self):
+        self.statistics = {'Googlemen': player, 'Closed': None}
+
+    async def get_statistic_by_nickname(self, nickname, mode=0, player_id=0):
+        if self.statistics[nickname] is None:
+            raise UserHasClosedStatisticsException('closed', nickname)
+        return self.statistics[nickname]
+
+
+def test_delta_interval_averages():
+    current = dataclasses.replace(player, battles=110, winrate=50.0 * 100 / 110 + 10 * 100 / 110, damage=2100.0)
+    delta = PlayerStatisticsDelta('Googlemen', GameMode.PVP, player, current, 86400.0)
+    assert delta.new_battles == 10
+    assert abs(delta.winrate - 100.0) < 1e-9
+    assert abs(delta.damage - 3100.0) < 1e-9
+    assert delta.battles_per_day == 10
+    assert PlayerStatisticsDelta('Googlemen', GameMode.PVP, player, player, 60.0).winrate is None
+
+
+def test_refresh_and_schedule(monkeypatch):
+    # Tracker reads wall clock through its module-level ``time``, so intervals can be asserted exactly
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(tracker_module, 'time', types.SimpleNamespace(time=lambda: clock.now))
+
+    client = FakeClient()
+    tracker = PlayerTracker(client, min_interval=60, max_interval=10000, battles_per_refresh=10)
+    tracker.track('Googlemen')
+    tracker.track('Closed')
+
+    async def refresh_all():
+        return dict([item async for item in tracker.refresh_due()])
+
+    results = asyncio.run(refresh_all())
+    assert results['Googlemen'] == []
+    assert isinstance(results['Closed'], UserHasClosedStatisticsException)
+    assert tracker.last_statistics('Googlemen') == {GameMode.PVP: player}
+    assert tracker.next_refresh_at('Googlemen') == 1060.0
+    assert tracker.next_refresh_at('Closed') == 11000.0
+    assert tracker.due() == []
+    tracker.untrack('Closed')
+
+    # Inactive player is checked twice as rarely every time, up to max_interval
+    previous_interval = 60.0
+    for _ in range(10):
+        clock.now = tracker.next_refresh_at('Googlemen')
+        asyncio.run(tracker.refresh('Googlemen'))
+        interval = tracker.next_refresh_at('Googlemen') - clock.now
+        assert interval == min(2 * previous_interval, 10000.0)
+        previous_interval = interval
+    assert previous_interval == 10000.0
+
+    client.statistics['Googlemen'] = dataclasses.replace(player, battles=105)
+    clock.now += 10
+    deltas = asyncio.run(tracker.refresh('Googlemen'))
+    assert [delta.new_battles for delta in deltas] == [5]
+    # Player is very active, so it is refreshed as often as allowed
+    assert tracker.seconds_until_next() == 60.0
@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from aw_api.utils import as_completed_bounded, as_completed_threaded
+
+
+async def double(item):
+    await asyncio.sleep(0.001 * (5 - item))
+    return item * 2
+
+
+async def collect(items, concurrency):
+    return [pair async for pair in as_completed_bounded(double, items, concurrency)]
+
+
+def test_sync_iterable():
+    assert sorted(asyncio.run(collect(range(5), 2))) == [(item, item * 2) for item in range(5)]
+
+
+def test_async_iterable_is_consumed_while_calls_run():
+    pulled = []
+
+    async def items():
+        for item in range(5):
+            pulled.append(item)
+            yield item
+
+    async def run():
+        results = []
+        async for item, result in as_completed_bounded(double, items(), 2):
+            # Never more than concurrency items are pulled ahead of completed calls
+            assert len(pulled) - len(results) <= 2
+            results.append((item, result))
+        return results
+
+    assert sorted(asyncio.run(run())) == [(item, item * 2) for item in range(5)]
+
+
+def test_threaded():
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(as_completed_threaded(lambda item: item * 2, range(10), executor, 3))
+    assert sorted(results) == [(item, item * 2) for item in range(10)]